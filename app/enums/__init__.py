@@ -1,4 +1,5 @@
+from .codec_format import CodecFormat
 from .locale import Locale
 from .middleware_event_type import MiddlewareEventType
 
-__all__ = ["Locale", "MiddlewareEventType"]
+__all__ = ["CodecFormat", "Locale", "MiddlewareEventType"]
@@ -0,0 +1,13 @@
+from enum import StrEnum, auto
+
+
+class CodecFormat(StrEnum):
+    """
+    Перелік форматів серіалізації значень, що зберігаються в Redis.
+    
+    JSON - текстовий формат, зручний для перегляду даних в Redis.
+    MSGPACK - компактний бінарний формат, швидший та менший за розміром.
+    """
+    
+    JSON = auto()  # Текстовий JSON
+    MSGPACK = auto()  # Бінарний MessagePack
@@ -1,11 +1,14 @@
 from .app_config import create_app_config
-from .redis import create_redis
+from .cache_policy import create_cache_policy
+from .redis import create_client_tracking, create_redis
 from .session_pool import create_session_pool
 from .telegram import create_bot, create_dispatcher
 
 __all__ = [
     "create_app_config",
     "create_bot",
+    "create_cache_policy",
+    "create_client_tracking",
     "create_dispatcher",
     "create_redis",
     "create_session_pool",
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from app.models.config import AppConfig
+from app.services.cache_policy import AdaptiveCachePolicy, CachePolicy
+from app.utils.ttl_cache import TTLCache
+
+
+def create_cache_policy(
+    config: AppConfig,
+    local_cache: Optional[TTLCache[Any, Any]] = None,
+) -> CachePolicy:
+    """
+    Створює політику часу життя користувачів у кеші Redis.
+    
+    Якщо адаптивний час кешування увімкнено, час життя запису залежить
+    від частоти звернень до користувача, інакше використовується
+    фіксований users_cache_time. В обох випадках застосовуються
+    випадкове відхилення та раннє оновлення записів. Метрики політики
+    разом з лічильниками кешу процесу періодично записуються в логи.
+    
+    Args:
+        config: Об'єкт конфігурації додатку з налаштуваннями кешування
+        local_cache: Кеш користувачів у пам'яті процесу, якщо він увімкнений
+        
+    Returns:
+        Політика часу життя записів кешу
+    """
+    if config.common.users_cache_adaptive:
+        return AdaptiveCachePolicy(
+            min_ttl=config.common.users_cache_min_time,
+            max_ttl=config.common.users_cache_max_time,
+            half_life=config.common.users_cache_half_life,
+            jitter=config.common.users_cache_jitter,
+            beta=config.common.users_cache_early_refresh,
+            metrics_interval=config.common.users_cache_metrics_interval,
+            local_cache=local_cache,
+        )
+    return CachePolicy(
+        ttl=config.common.users_cache_time,
+        jitter=config.common.users_cache_jitter,
+        beta=config.common.users_cache_early_refresh,
+        metrics_interval=config.common.users_cache_metrics_interval,
+        local_cache=local_cache,
+    )
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import URL, NullPool
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -8,6 +12,104 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.models.config import AppConfig
+from app.services.database.sql.pool import InstrumentedQueuePool, PoolTuner
+from app.services.database.sql.repositories.raw_users import UNNAMED_STATEMENTS_INFO
+from app.services.database.sql.routing import ROUTER_INFO, ReplicaRouter, RoutedSession
+
+
+def _statement_name() -> str:
+    """
+    Створює унікальну назву підготовленого запиту.
+    
+    За transaction pooling сусідні транзакції клієнта потрапляють на різні
+    з'єднання сервера, тож назви на зразок __asyncpg_stmt_1__ різних
+    процесів конфліктували б на одному з'єднанні.
+    
+    Returns:
+        Назва підготовленого запиту
+    """
+    return f"__asyncpg_{uuid4()}__"
+
+
+def create_engine(url: URL, config: AppConfig) -> AsyncEngine:
+    """
+    Створює асинхронний двигун SQLAlchemy з параметрами пулу з конфігурації.
+    
+    У режимі PgBouncer (transaction pooling) підготовлені запити не можуть
+    пережити транзакцію, тож кеші запитів asyncpg та SQLAlchemy вимикаються,
+    а пул з'єднань замінюється на NullPool або невеликий пул без переповнення:
+    пулом серверних з'єднань керує сам PgBouncer.
+    
+    Пул з'єднань (InstrumentedQueuePool) рахує очікування, використання
+    додаткових з'єднань і тайм-аути та періодично записує ці метрики в логи.
+    Якщо увімкнено автоналаштування (поза режимом PgBouncer), межа додаткових
+    з'єднань змінюється в налаштованих межах за часом очікування та затримкою.
+    
+    Args:
+        url: URL для підключення до PostgreSQL
+        config: Об'єкт конфігурації додатку з налаштуваннями SQLAlchemy
+        
+    Returns:
+        Асинхронний двигун SQLAlchemy
+    """
+    options: dict[str, Any]
+    if not config.sql_alchemy.pgbouncer:
+        # Налаштування пулу з'єднань
+        options = {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": config.sql_alchemy.pool_size,
+            "max_overflow": config.sql_alchemy.max_overflow,
+            "pool_timeout": config.sql_alchemy.pool_timeout,
+            "pool_recycle": config.sql_alchemy.pool_recycle,
+        }
+    else:
+        options = {
+            "connect_args": {
+                # Кеш підготовлених запитів asyncpg
+                "statement_cache_size": 0,
+                # Кеш підготовлених запитів адаптера asyncpg SQLAlchemy
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _statement_name,
+                # PgBouncer приймає лише деякі параметри запуску з'єднання
+                "server_settings": {"application_name": config.sql_alchemy.application_name},
+            },
+        }
+        if config.sql_alchemy.pgbouncer_pool_size > 0:
+            options.update(
+                poolclass=InstrumentedQueuePool,
+                pool_size=config.sql_alchemy.pgbouncer_pool_size,
+                max_overflow=0,
+                pool_timeout=config.sql_alchemy.pool_timeout,
+                pool_recycle=config.sql_alchemy.pool_recycle,
+            )
+        else:
+            options["poolclass"] = NullPool
+    engine: AsyncEngine = create_async_engine(
+        # URL для підключення до PostgreSQL
+        url=url,
+        # Налаштування логування SQL-запитів
+        echo=config.sql_alchemy.echo,
+        echo_pool=config.sql_alchemy.echo_pool,
+        **options,
+    )
+    pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.configure(
+            metrics_interval=config.sql_alchemy.pool_metrics_interval,
+            # За PgBouncer кількість з'єднань задається явно, тож межа не змінюється
+            tuner=(
+                PoolTuner(
+                    min_overflow=config.sql_alchemy.pool_autotune_min_overflow,
+                    max_overflow=config.sql_alchemy.pool_autotune_max_overflow,
+                    target_wait=config.sql_alchemy.pool_autotune_target_wait,
+                    latency_tolerance=config.sql_alchemy.pool_autotune_latency_tolerance,
+                    interval=config.sql_alchemy.pool_autotune_interval,
+                )
+                if config.sql_alchemy.pool_autotune and not config.sql_alchemy.pgbouncer
+                else None
+            ),
+        )
+    return engine
 
 
 def create_session_pool(config: AppConfig) -> async_sessionmaker[AsyncSession]:
@@ -17,6 +119,10 @@ def create_session_pool(config: AppConfig) -> async_sessionmaker[AsyncSession]:
     Функція ініціалізує асинхронний двигун SQLAlchemy з параметрами з конфігурації
     та створює фабрику сесій для роботи з базою даних.
     
+    Якщо в конфігурації вказано репліки, для кожної створюється окремий двигун,
+    а маршрутизатор реплік передається сесіям через Session.info: контексти
+    SQLSessionContext у режимі лише читання спрямовуються на репліки.
+    
     Args:
         config: Об'єкт конфігурації додатку, що містить налаштування для PostgreSQL та SQLAlchemy
         
@@ -25,19 +131,29 @@ def create_session_pool(config: AppConfig) -> async_sessionmaker[AsyncSession]:
         нових сесій для взаємодії з базою даних
     """
     # Створюємо асинхронний двигун SQLAlchemy з параметрами з конфігурації
-    engine: AsyncEngine = create_async_engine(
-        # URL для підключення до PostgreSQL
-        url=config.postgres.build_url(),
-        # Налаштування логування SQL-запитів
-        echo=config.sql_alchemy.echo,
-        echo_pool=config.sql_alchemy.echo_pool,
-        # Налаштування пулу з'єднань
-        pool_size=config.sql_alchemy.pool_size,
-        max_overflow=config.sql_alchemy.max_overflow,
-        pool_timeout=config.sql_alchemy.pool_timeout,
-        pool_recycle=config.sql_alchemy.pool_recycle,
-    )
+    engine: AsyncEngine = create_engine(url=config.postgres.build_url(), config=config)
     
-    # Створюємо та повертаємо фабрику асинхронних сесій
-    # expire_on_commit=False запобігає автоматичному оновленню об'єктів після commit
-    return async_sessionmaker(engine, expire_on_commit=False)
+    # Дані, що передаються всім сесіям через Session.info
+    info: dict[str, Any] = {}
+    if config.sql_alchemy.pgbouncer:
+        # Іменовані підготовлені запити не переживають транзакцію за PgBouncer
+        info[UNNAMED_STATEMENTS_INFO] = True
+    
+    replica_urls: list[URL] = config.postgres.build_replica_urls()
+    if not replica_urls:
+        # Створюємо та повертаємо фабрику асинхронних сесій
+        # expire_on_commit=False запобігає автоматичному оновленню об'єктів після commit
+        return async_sessionmaker(engine, expire_on_commit=False, info=info)
+        
+    router: ReplicaRouter = ReplicaRouter(
+        replicas=[create_engine(url=url, config=config) for url in replica_urls],
+        eject_time=config.postgres.replica_eject_time,
+        consistency_window=config.postgres.replica_consistency_window,
+    )
+    return async_sessionmaker(
+        engine,
+        expire_on_commit=False,
+        # Сесії повідомляють маршрутизатор про записи для вікна read-your-writes
+        sync_session_class=RoutedSession,
+        info={**info, ROUTER_INFO: router},
+    )
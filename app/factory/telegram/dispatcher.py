@@ -1,18 +1,27 @@
 from __future__ import annotations
 
+from typing import Any, Optional
+
 from aiogram import Dispatcher
-from aiogram.fsm.storage.redis import RedisStorage
 from aiogram.utils.callback_answer import CallbackAnswerMiddleware
 from aiogram_i18n import I18nMiddleware
-from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.models.config import AppConfig
+from app.models.dto.user import UserDto
 from app.services.database.redis import RedisRepository
+from app.services.database.redis.client import RedisClient
+from app.services.database.redis.codec import CodecRegistry
+from app.services.database.redis.storage import RedisFSMStorage
+from app.services.database.redis.tracking import ClientTracking
+from app.services.user_writer import UserWriter
 from app.telegram.handlers import admin, common, extra
-from app.telegram.middlewares import UserMiddleware
+from app.telegram.middlewares import SQLSessionMiddleware, UserMiddleware
 from app.utils import mjson
+from app.utils.ttl_cache import TTLCache
 
-from ..redis import create_redis
+from ..cache_policy import create_cache_policy
+from ..redis import create_client_tracking, create_redis
 from ..session_pool import create_session_pool
 from .i18n import create_i18n_middleware
 
@@ -31,7 +40,37 @@ def create_dispatcher(config: AppConfig) -> Dispatcher:
         Налаштований диспетчер Aiogram з усіма необхідними компонентами
     """
     # Створюємо клієнт Redis для сховища станів та репозиторію
-    redis: Redis = create_redis(url=config.redis.build_url())
+    # (один вузол або Redis Cluster, залежно від конфігурації)
+    redis: RedisClient = create_redis(config=config)
+    # Відстеження ключів користувачів сервером для кешування читань (якщо увімкнено)
+    tracking: Optional[ClientTracking] = create_client_tracking(redis=redis, config=config)
+    
+    # Створюємо пул сесій для роботи з базою даних
+    session_pool: async_sessionmaker[AsyncSession] = create_session_pool(config=config)
+    
+    # Створюємо буфер відкладеного запису змін користувачів, якщо його увімкнено
+    user_writer: Optional[UserWriter] = None
+    if config.common.users_write_behind:
+        user_writer = UserWriter(
+            session_pool=session_pool,
+            batch_size=config.common.users_write_behind_batch_size,
+            flush_interval=config.common.users_write_behind_interval,
+        )
+    
+    # Кеш користувачів у пам'яті процесу перед Redis (якщо увімкнено)
+    users_cache: Optional[TTLCache[Any, UserDto]] = (
+        TTLCache(
+            maxsize=config.common.users_local_cache_size,
+            # З відстеженням актуальність забезпечують повідомлення сервера
+            ttl=(
+                config.redis.client_tracking_cache_time
+                if tracking is not None
+                else config.common.users_local_cache_time
+            ),
+        )
+        if config.common.users_local_cache_size > 0
+        else None
+    )
     
     # Створюємо middleware для інтернаціоналізації
     i18n_middleware: I18nMiddleware = create_i18n_middleware(config)
@@ -40,23 +79,51 @@ def create_dispatcher(config: AppConfig) -> Dispatcher:
     dispatcher: Dispatcher = Dispatcher(
         name="main_dispatcher",  # Ім'я диспетчера для логування
         # Сховище для FSM на основі Redis з власними функціями для JSON
-        storage=RedisStorage(
+        storage=RedisFSMStorage(
             redis=redis,
             json_loads=mjson.decode,
             json_dumps=mjson.encode,
         ),
         config=config,  # Передаємо конфігурацію для доступу в обробниках
-        # Створюємо пул сесій для роботи з базою даних
-        session_pool=create_session_pool(config=config),
+        session_pool=session_pool,  # Пул сесій для роботи з базою даних
         # Репозиторій Redis для кешування та зберігання даних
-        redis=RedisRepository(client=redis),
+        redis=RedisRepository(
+            client=redis,
+            # Кеш користувачів у пам'яті процесу перед Redis
+            users_cache=users_cache,
+            # Кешовані кодеки значень у форматі з конфігурації
+            codecs=CodecRegistry(format_=config.redis.codec),
+            # Зберігання користувачів як хешів з оновленням лише змінених полів
+            users_hash=config.common.users_cache_hash,
+            # Локальний кеш читань, записи якого інвалідує сервер Redis
+            tracking=tracking,
+        ),
+        # Буфер відкладеного запису змін користувачів (якщо увімкнено)
+        user_writer=user_writer,
+        # Спільна політика часу життя користувачів у Redis
+        # (jitter, раннє оновлення та, за потреби, адаптивний час життя)
+        user_cache_policy=create_cache_policy(config=config, local_cache=users_cache),
     )
+    
+    # Гарантуємо запис усіх відкладених змін при зупинці бота
+    if user_writer is not None:
+        dispatcher.shutdown.register(user_writer.close)
+    
+    # З'єднання відстеження ключів живе разом з ботом
+    if tracking is not None:
+        dispatcher.startup.register(tracking.start)
+        dispatcher.shutdown.register(tracking.close)
 
     # Підключаємо маршрутизатори з обробниками повідомлень
     dispatcher.include_routers(admin.router, common.router, extra.router)
     
+    # Додаємо middleware спільної сесії SQL: щонайбільше одна сесія на оновлення
+    # (реєструється першим, щоб сесія була доступна всім наступним middleware)
+    dispatcher.update.outer_middleware(SQLSessionMiddleware())
+    
     # Додаємо middleware для роботи з користувачами
-    dispatcher.update.outer_middleware(UserMiddleware())
+    # (користувач завантажується лише для обробників, яким він потрібен)
+    UserMiddleware().setup(dispatcher=dispatcher)
     
     # Налаштовуємо middleware для інтернаціоналізації
     i18n_middleware.setup(dispatcher=dispatcher)
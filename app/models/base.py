@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Self, cast
 
 from pydantic import BaseModel as _BaseModel
 from pydantic import ConfigDict, PrivateAttr
@@ -44,6 +44,19 @@ class PydanticModel(_BaseModel):
         """
         return self.__updated
 
+    def model_detach(self) -> Self:
+        """
+        Створює незалежну копію моделі з порожнім станом змін.
+        
+        Використовується, коли один і той самий об'єкт міг би потрапити
+        до кількох обробників (наприклад, з кешу процесу): зміни, зроблені
+        в одному обробнику, не повинні накопичуватися в model_state іншого.
+        
+        Returns:
+            Копія моделі без записаних змін полів
+        """
+        return cast(Self, self.model_construct(_fields_set=self.model_fields_set, **self.__dict__))
+
     def __setattr__(self, name: str, value: Any) -> None:
         """
         Перевизначений метод для встановлення значень атрибутів.
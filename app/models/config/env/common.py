@@ -15,7 +15,76 @@ class CommonConfig(EnvSettings, env_prefix="COMMON_"):
         users_cache_time: Час (у секундах) зберігання інформації про користувачів
                          у кеші Redis. Завантажується з змінної COMMON_USERS_CACHE_TIME.
                          За замовчуванням: 30 секунд.
+        users_cache_jitter: Частка випадкового відхилення часу зберігання користувачів
+                           у Redis (0.1 - до ±10%), щоб записи, збережені одночасно,
+                           не застарівали в один момент. Завантажується з
+                           COMMON_USERS_CACHE_JITTER. За замовчуванням: 0.1.
+        users_cache_early_refresh: Коефіцієнт імовірнісного раннього оновлення записів
+                                  (XFetch). Більші значення оновлюють записи раніше,
+                                  0 вимикає раннє оновлення. Завантажується з
+                                  COMMON_USERS_CACHE_EARLY_REFRESH. За замовчуванням: 1.
+        users_cache_adaptive: Прапорець адаптивного часу зберігання користувачів у Redis
+                             за частотою звернень: активні користувачі зберігаються
+                             довше, одноразові - коротше. Замінює users_cache_time.
+                             Завантажується з COMMON_USERS_CACHE_ADAPTIVE.
+                             За замовчуванням: False.
+        users_cache_min_time: Мінімальний адаптивний час зберігання (у секундах).
+                             Завантажується з COMMON_USERS_CACHE_MIN_TIME.
+                             За замовчуванням: 10 секунд.
+        users_cache_max_time: Максимальний адаптивний час зберігання (у секундах).
+                             Завантажується з COMMON_USERS_CACHE_MAX_TIME.
+                             За замовчуванням: 600 секунд.
+        users_cache_half_life: Період напіврозпаду лічильника звернень (у секундах).
+                              Завантажується з COMMON_USERS_CACHE_HALF_LIFE.
+                              За замовчуванням: 600 секунд.
+        users_cache_metrics_interval: Інтервал (у секундах) запису метрик кешу користувачів
+                                     (влучання, ранні оновлення, об'єднані звернення,
+                                     лічильники кешу процесу) у логи. 0 - не записувати.
+                                     Завантажується з COMMON_USERS_CACHE_METRICS_INTERVAL.
+                                     За замовчуванням: 300 секунд.
+        users_local_cache_size: Максимальна кількість користувачів у кеші процесу,
+                               який працює перед Redis. 0 вимикає кеш процесу.
+                               Завантажується з COMMON_USERS_LOCAL_CACHE_SIZE.
+                               За замовчуванням: 10000.
+        users_local_cache_time: Час (у секундах) зберігання користувачів у кеші процесу.
+                               Завантажується з COMMON_USERS_LOCAL_CACHE_TIME.
+                               За замовчуванням: 5 секунд.
+        users_write_behind: Прапорець відкладеного (пакетного) запису змін користувачів
+                           у базу даних. Завантажується з COMMON_USERS_WRITE_BEHIND.
+                           За замовчуванням: False.
+        users_write_behind_batch_size: Кількість користувачів зі змінами, що запускає
+                                      пакетний запис. Завантажується з
+                                      COMMON_USERS_WRITE_BEHIND_BATCH_SIZE. За замовчуванням: 500.
+        users_write_behind_interval: Максимальний час (у секундах) між пакетними записами.
+                                    Завантажується з COMMON_USERS_WRITE_BEHIND_INTERVAL.
+                                    За замовчуванням: 1 секунда.
+        users_prefetch: Прапорець попереднього завантаження користувачів усього пакета
+                       getUpdates (один MGET та один SELECT замість запитів для кожного
+                       оновлення). Діє лише в режимі polling.
+                       Завантажується з COMMON_USERS_PREFETCH. За замовчуванням: True.
+        users_cache_hash: Прапорець зберігання користувачів у Redis як хешів, при якому
+                         оновлення записує лише змінені поля і не скидає час життя запису.
+                         Завантажується з COMMON_USERS_CACHE_HASH. За замовчуванням: False.
+        users_raw_queries: Прапорець виконання найчастіших запитів до користувачів
+                          (за Telegram ID, за ID, отримання або створення, оновлення)
+                          як підготовлених запитів asyncpg замість запитів ORM.
+                          Завантажується з COMMON_USERS_RAW_QUERIES. За замовчуванням: False.
     """
     
     admin_chat_id: int  # ID чату адміністратора для системних повідомлень
     users_cache_time: int = 30  # Час кешування користувачів у секундах (за замовчуванням: 30)
+    users_cache_jitter: float = 0.1  # Частка випадкового відхилення часу кешування
+    users_cache_early_refresh: float = 1  # Коефіцієнт раннього оновлення (XFetch), 0 - вимкнено
+    users_cache_adaptive: bool = False  # Адаптивний час кешування за частотою звернень
+    users_cache_min_time: int = 10  # Мінімальний адаптивний час кешування (секунди)
+    users_cache_max_time: int = 600  # Максимальний адаптивний час кешування (секунди)
+    users_cache_half_life: float = 600  # Період напіврозпаду лічильника звернень (секунди)
+    users_cache_metrics_interval: int = 300  # Інтервал запису метрик кешу (секунди, 0 - вимкнено)
+    users_local_cache_size: int = 10_000  # Розмір кешу користувачів у пам'яті процесу
+    users_local_cache_time: float = 5  # Час кешування користувачів у пам'яті процесу
+    users_write_behind: bool = False  # Відкладений пакетний запис змін користувачів
+    users_write_behind_batch_size: int = 500  # Розмір пакета відкладеного запису
+    users_write_behind_interval: float = 1  # Інтервал відкладеного запису (секунди)
+    users_prefetch: bool = True  # Попереднє завантаження користувачів пакета getUpdates
+    users_cache_hash: bool = False  # Зберігання користувачів у Redis як хешів
+    users_raw_queries: bool = False  # Підготовлені запити asyncpg замість запитів ORM
@@ -1,5 +1,9 @@
+from typing import Optional
+
 from pydantic import SecretStr
-from sqlalchemy import URL
+from sqlalchemy import URL, make_url
+
+from app.utils.custom_types import StringList
 
 from .base import EnvSettings
 
@@ -20,6 +24,19 @@ class PostgresConfig(EnvSettings, env_prefix="POSTGRES_"):
         port: Порт сервера PostgreSQL. Завантажується з POSTGRES_PORT.
         user: Ім'я користувача для підключення. Завантажується з POSTGRES_USER.
         data: Додаткові дані для підключення. Завантажується з POSTGRES_DATA.
+        replicas: DSN реплік для читання, розділені комами. Відсутні в DSN ім'я
+                 користувача, пароль, порт та назва бази даних беруться з
+                 налаштувань основного сервера. Завантажується з POSTGRES_REPLICAS.
+                 За замовчуванням: None (усі запити до основного сервера).
+        replica_eject_time: Час (у секундах), на який репліка з помилкою з'єднання
+                           виключається з розподілу читань. Завантажується
+                           з POSTGRES_REPLICA_EJECT_TIME. За замовчуванням: 30 секунд.
+        replica_consistency_window: Час (у секундах) після запису, протягом якого
+                                   читання тих самих даних виконуються на основному
+                                   сервері (read-your-writes). Має перевищувати
+                                   типове відставання реплік. Завантажується
+                                   з POSTGRES_REPLICA_CONSISTENCY_WINDOW.
+                                   За замовчуванням: 5 секунд.
     """
     
     host: str  # Хост сервера PostgreSQL
@@ -28,6 +45,9 @@ class PostgresConfig(EnvSettings, env_prefix="POSTGRES_"):
     port: int  # Порт сервера PostgreSQL
     user: str  # Ім'я користувача
     data: str  # Додаткові дані для підключення
+    replicas: Optional[StringList] = None  # DSN реплік для читання
+    replica_eject_time: float = 30  # Час виключення репліки після помилки з'єднання
+    replica_consistency_window: float = 5  # Вікно read-your-writes після запису
 
     def build_url(self) -> URL:
         """
@@ -48,3 +68,27 @@ class PostgresConfig(EnvSettings, env_prefix="POSTGRES_"):
             port=self.port,  # Порт сервера
             database=self.db,  # Назва бази даних
         )
+
+    def build_replica_urls(self) -> list[URL]:
+        """
+        Створює URL для підключення до реплік PostgreSQL.
+        
+        Returns:
+            list[URL]: Об'єкти URL SQLAlchemy з драйвером asyncpg; відсутні
+                       в DSN параметри підключення взяті з основного сервера
+        """
+        urls: list[URL] = []
+        for dsn in self.replicas or ():
+            if not dsn.strip():
+                continue
+            url: URL = make_url(dsn.strip())
+            urls.append(
+                url.set(
+                    drivername="postgresql+asyncpg",
+                    username=url.username or self.user,
+                    password=url.password or self.password.get_secret_value(),
+                    port=url.port or self.port,
+                    database=url.database or self.db,
+                )
+            )
+        return urls
@@ -1,5 +1,10 @@
+from typing import Optional
+
 from pydantic import SecretStr
 
+from app.enums import CodecFormat
+from app.utils.custom_types import StringList
+
 from .base import EnvSettings
 
 
@@ -18,6 +23,51 @@ class RedisConfig(EnvSettings, env_prefix="REDIS_"):
         port: Порт сервера Redis. Завантажується з REDIS_PORT.
         db: Номер бази даних Redis. Завантажується з REDIS_DB.
         data: Додаткові дані для підключення. Завантажується з REDIS_DATA.
+        codec: Формат серіалізації значень (json або msgpack). Значення обох
+              форматів читаються завжди, тому формат можна змінити без очищення
+              Redis. Завантажується з REDIS_CODEC. За замовчуванням: json.
+        client_tracking: Прапорець кешування читань користувачів на стороні клієнта
+                        з інвалідацією сервером (CLIENT TRACKING, RESP3, Redis 6+).
+                        Завантажується з REDIS_CLIENT_TRACKING. За замовчуванням: False.
+        client_tracking_cache_size: Максимальна кількість значень у локальному кеші
+                                   відстежуваних ключів. Завантажується
+                                   з REDIS_CLIENT_TRACKING_CACHE_SIZE.
+                                   За замовчуванням: 10000.
+        client_tracking_cache_time: Найбільший час (у секундах) зберігання значень
+                                   у локальних кешах з відстеженням. Актуальність
+                                   забезпечують повідомлення сервера, тож час може
+                                   бути значно більшим, ніж COMMON_USERS_LOCAL_CACHE_TIME.
+                                   Завантажується з REDIS_CLIENT_TRACKING_CACHE_TIME.
+                                   За замовчуванням: 300 секунд.
+        cluster: Прапорець підключення до Redis Cluster. host та port тоді задають
+                один з початкових вузлів кластера, а db не використовується.
+                Завантажується з REDIS_CLUSTER. За замовчуванням: False.
+        cluster_nodes: Додаткові початкові вузли кластера у форматі host:port,
+                      розділені комами. Завантажується з REDIS_CLUSTER_NODES.
+                      За замовчуванням: None.
+        unix_socket: Шлях до unix-сокета Redis. Якщо вказано, підключення
+                    виконується через сокет замість TCP (host та port не
+                    використовуються). Завантажується з REDIS_UNIX_SOCKET.
+                    За замовчуванням: None.
+        max_connections: Максимальна кількість з'єднань у пулі. Якщо вказано,
+                        використовується блокуючий пул: при зайнятих з'єднаннях
+                        запити чекають на звільнення, а не відкривають нові.
+                        Завантажується з REDIS_MAX_CONNECTIONS.
+                        За замовчуванням: None (без обмеження).
+        pool_timeout: Найбільший час (у секундах) очікування вільного з'єднання
+                     в блокуючому пулі. Завантажується з REDIS_POOL_TIMEOUT.
+                     За замовчуванням: 5 секунд.
+        pool_metrics_interval: Інтервал (у секундах) запису метрик блокуючого пулу
+                              (видачі, очікування, зайнятість) у логи. 0 вимикає
+                              запис. Завантажується з REDIS_POOL_METRICS_INTERVAL.
+                              За замовчуванням: 300 секунд.
+        socket_keepalive: Прапорець TCP keepalive для з'єднань (не застосовується
+                         до unix-сокета). Завантажується з REDIS_SOCKET_KEEPALIVE.
+                         За замовчуванням: False.
+        health_check_interval: Інтервал (у секундах), після якого з'єднання без
+                              активності перевіряється командою PING перед
+                              використанням. 0 вимикає перевірку. Завантажується
+                              з REDIS_HEALTH_CHECK_INTERVAL. За замовчуванням: 0.
     """
     
     host: str  # Хост сервера Redis
@@ -25,6 +75,18 @@ class RedisConfig(EnvSettings, env_prefix="REDIS_"):
     port: int  # Порт сервера Redis
     db: int  # Номер бази даних Redis
     data: str  # Додаткові дані для підключення
+    codec: CodecFormat = CodecFormat.JSON  # Формат серіалізації значень
+    client_tracking: bool = False  # Локальний кеш з інвалідацією сервером
+    client_tracking_cache_size: int = 10_000  # Розмір локального кешу відстежуваних ключів
+    client_tracking_cache_time: float = 300  # Найбільший час зберігання у локальних кешах
+    cluster: bool = False  # Підключення до Redis Cluster
+    cluster_nodes: Optional[StringList] = None  # Додаткові початкові вузли кластера
+    unix_socket: Optional[str] = None  # Шлях до unix-сокета замість TCP
+    max_connections: Optional[int] = None  # Розмір блокуючого пулу з'єднань
+    pool_timeout: float = 5  # Час очікування вільного з'єднання в пулі
+    pool_metrics_interval: float = 300  # Інтервал запису метрик пулу (секунди, 0 - вимкнено)
+    socket_keepalive: bool = False  # TCP keepalive для з'єднань
+    health_check_interval: float = 0  # Інтервал перевірки з'єднань без активності
 
     def build_url(self) -> str:
         """
@@ -35,6 +97,25 @@ class RedisConfig(EnvSettings, env_prefix="REDIS_"):
         
         Returns:
             str: URL-рядок для підключення до Redis у форматі
-                 "redis://:[password]@[host]:[port]/[db]"
+                 "redis://:[password]@[host]:[port]/[db]" або, для unix-сокета,
+                 "unix://:[password]@[unix_socket]?db=[db]"
+        """
+        password: str = self.password.get_secret_value()
+        if self.unix_socket:
+            return f"unix://:{password}@{self.unix_socket}?db={self.db}"
+        return f"redis://:{password}@{self.host}:{self.port}/{self.db}"
+
+    def build_cluster_nodes(self) -> list[tuple[str, int]]:
+        """
+        Формує список початкових вузлів Redis Cluster.
+        
+        Returns:
+            list[tuple[str, int]]: Пари (хост, порт): спершу host і port,
+                                   потім вузли з cluster_nodes
         """
-        return f"redis://:{self.password.get_secret_value()}@{self.host}:{self.port}/{self.db}"
+        nodes: list[tuple[str, int]] = [(self.host, self.port)]
+        for node in self.cluster_nodes or ():
+            host, _, port = node.strip().rpartition(":")
+            if host:
+                nodes.append((host, int(port)))
+        return nodes
@@ -22,6 +22,44 @@ class SQLAlchemyConfig(EnvSettings, env_prefix="ALCHEMY_"):
                      Завантажується з ALCHEMY_POOL_TIMEOUT. За замовчуванням: 10.
         pool_recycle: Час у секундах, після якого з'єднання буде перестворено.
                      Завантажується з ALCHEMY_POOL_RECYCLE. За замовчуванням: 3600 (1 година).
+        pgbouncer: Прапорець сумісності з PgBouncer у режимі transaction pooling:
+                  кеші підготовлених запитів asyncpg вимикаються, підготовлені
+                  запити отримують унікальні назви, а пул з'єднань замінюється
+                  на NullPool або невеликий пул розміру pgbouncer_pool_size.
+                  Завантажується з ALCHEMY_PGBOUNCER. За замовчуванням: False.
+        pgbouncer_pool_size: Кількість постійних з'єднань з PgBouncer (без додаткових).
+                            0 - без пулу (NullPool), з'єднання відкривається для
+                            кожної сесії. Завантажується з ALCHEMY_PGBOUNCER_POOL_SIZE.
+                            За замовчуванням: 0.
+        application_name: Назва додатку для сервера (pg_stat_activity, логи PgBouncer),
+                         що передається в параметрах з'єднання в режимі PgBouncer.
+                         Завантажується з ALCHEMY_APPLICATION_NAME. За замовчуванням: "bot".
+        pool_metrics_interval: Інтервал запису метрик пулу з'єднань (видачі, очікування,
+                              додаткові з'єднання, тайм-аути) у логи в секундах.
+                              0 - не записувати. Завантажується з ALCHEMY_POOL_METRICS_INTERVAL.
+                              За замовчуванням: 300.
+        pool_autotune: Прапорець автоматичного налаштування межі додаткових з'єднань
+                      (max_overflow) за часом очікування з'єднання та затримкою бази даних.
+                      Не застосовується в режимі PgBouncer.
+                      Завантажується з ALCHEMY_POOL_AUTOTUNE. За замовчуванням: False.
+        pool_autotune_min_overflow: Найменша межа додаткових з'єднань при автоналаштуванні.
+                                   Завантажується з ALCHEMY_POOL_AUTOTUNE_MIN_OVERFLOW.
+                                   За замовчуванням: 0.
+        pool_autotune_max_overflow: Найбільша межа додаткових з'єднань при автоналаштуванні.
+                                   Завантажується з ALCHEMY_POOL_AUTOTUNE_MAX_OVERFLOW.
+                                   За замовчуванням: 100.
+        pool_autotune_target_wait: Допустимий середній час очікування з'єднання в секундах,
+                                  понад який межа додаткових з'єднань збільшується.
+                                  Завантажується з ALCHEMY_POOL_AUTOTUNE_TARGET_WAIT.
+                                  За замовчуванням: 0.05.
+        pool_autotune_latency_tolerance: Допустиме зростання затримки бази даних відносно
+                                        базової (у разах), понад яке межа додаткових
+                                        з'єднань зменшується. Завантажується з
+                                        ALCHEMY_POOL_AUTOTUNE_LATENCY_TOLERANCE.
+                                        За замовчуванням: 2.0.
+        pool_autotune_interval: Тривалість вікна спостережень автоналаштування в секундах.
+                               Завантажується з ALCHEMY_POOL_AUTOTUNE_INTERVAL.
+                               За замовчуванням: 10.
     """
     
     echo: bool = False  # Виведення SQL-запитів у логи
@@ -30,3 +68,13 @@ class SQLAlchemyConfig(EnvSettings, env_prefix="ALCHEMY_"):
     max_overflow: int = 25  # Максимальна кількість додаткових з'єднань
     pool_timeout: int = 10  # Час очікування доступного з'єднання (секунди)
     pool_recycle: int = 3600  # Час до перестворення з'єднання (секунди, 1 година)
+    pgbouncer: bool = False  # Сумісність з PgBouncer (transaction pooling)
+    pgbouncer_pool_size: int = 0  # Розмір пулу з'єднань з PgBouncer (0 - NullPool)
+    application_name: str = "bot"  # Назва додатку для сервера в режимі PgBouncer
+    pool_metrics_interval: int = 300  # Інтервал запису метрик пулу в логи (секунди, 0 - вимкнено)
+    pool_autotune: bool = False  # Автоматичне налаштування межі додаткових з'єднань
+    pool_autotune_min_overflow: int = 0  # Найменша межа додаткових з'єднань
+    pool_autotune_max_overflow: int = 100  # Найбільша межа додаткових з'єднань
+    pool_autotune_target_wait: float = 0.05  # Допустимий середній час очікування (секунди)
+    pool_autotune_latency_tolerance: float = 2.0  # Допустиме зростання затримки (у разах)
+    pool_autotune_interval: int = 10  # Тривалість вікна спостережень (секунди)
@@ -0,0 +1,404 @@
+"""
+Модуль з політикою часу життя записів кешу користувачів.
+
+Політика розподіляє час життя записів випадковим відхиленням (jitter), щоб
+користувачі, закешовані одночасно (після перезапуску або розсилки), не
+втрачали актуальність в один момент, і вирішує, чи оновити запис заздалегідь
+за алгоритмом XFetch (probabilistic early expiration): чим ближче запис до
+завершення життя і чим довше триває його завантаження з бази даних, тим
+вища ймовірність, що одне зі звернень оновить його раніше за інших.
+
+Адаптивна політика додатково враховує частоту звернень до кожного запису:
+активні користувачі зберігаються довше, а ті, що зайшли один раз, - коротше.
+
+Лічильники політики (влучання, ранні оновлення, об'єднані звернення) разом
+з лічильниками кешу процесу повертає метод metrics та періодично записує в логи.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from time import monotonic
+from typing import Any, Hashable, Optional
+
+from app.utils.logging import database as logger
+from app.utils.ttl_cache import TTLCache
+
+
+class CachePolicy:
+    """
+    Політика часу життя записів кешу з jitter та раннім оновленням (XFetch).
+
+    Attributes:
+        ttl: Базовий час життя запису в секундах
+        jitter: Частка випадкового відхилення часу життя (0.1 - до ±10%)
+        beta: Коефіцієнт XFetch; більші значення оновлюють записи раніше, 0 вимикає
+        delta: Згладжений (EWMA) час завантаження запису з бази даних у секундах
+        refreshes: Кількість ранніх оновлень записів
+        stampedes: Кількість звернень, що приєдналися до вже запущеного
+                   завантаження того самого запису замість власного запиту до бази даних
+        hits: Кількість звернень, для яких запис знайдено в Redis
+        misses: Кількість звернень, для яких запису в Redis не було
+        assigned: Кількість записів, яким призначено час життя
+        assigned_time: Сумарний призначений час життя записів у секундах
+        metrics_interval: Інтервал запису метрик у логи (в секундах, 0 - не записувати)
+        local_cache: Кеш користувачів у пам'яті процесу, лічильники якого
+                     включаються до метрик, або None
+    """
+
+    __slots__ = (
+        "ttl",
+        "jitter",
+        "beta",
+        "delta",
+        "refreshes",
+        "stampedes",
+        "hits",
+        "misses",
+        "assigned",
+        "assigned_time",
+        "metrics_interval",
+        "local_cache",
+        "_started",
+        "_logged_at",
+    )
+
+    # Вага нового вимірювання в згладженому часі завантаження
+    SMOOTHING: float = 0.2
+
+    def __init__(
+        self,
+        ttl: int,
+        jitter: float = 0.0,
+        beta: float = 0.0,
+        metrics_interval: float = 0.0,
+        local_cache: Optional[TTLCache[Any, Any]] = None,
+    ) -> None:
+        """
+        Ініціалізує політику.
+
+        Args:
+            ttl: Базовий час життя запису в секундах
+            jitter: Частка випадкового відхилення часу життя
+            beta: Коефіцієнт раннього оновлення XFetch
+            metrics_interval: Інтервал запису метрик у логи (в секундах, 0 - не записувати)
+            local_cache: Кеш користувачів у пам'яті процесу для звітів про влучання
+
+        Raises:
+            ValueError: Якщо параметри виходять за допустимі межі
+        """
+        if ttl <= 0:
+            raise ValueError(f"Cache ttl must be positive, got {ttl!r}")
+        if not 0 <= jitter < 1:
+            raise ValueError(f"Cache ttl jitter must be in [0, 1), got {jitter!r}")
+        if beta < 0:
+            raise ValueError(f"XFetch beta must not be negative, got {beta!r}")
+        self.ttl = ttl
+        self.jitter = jitter
+        self.beta = beta
+        self.delta = 0.0
+        self.refreshes = 0
+        self.stampedes = 0
+        self.hits = 0
+        self.misses = 0
+        self.assigned = 0
+        self.assigned_time = 0
+        self.metrics_interval = metrics_interval
+        self.local_cache = local_cache
+        self._started = self._logged_at = monotonic()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Повертає частку звернень, для яких запис знайдено в Redis.
+
+        Returns:
+            float: Значення від 0 до 1 або 0, якщо звернень ще не було
+        """
+        total: int = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def average_time(self) -> float:
+        """
+        Повертає середній призначений час життя запису.
+
+        Разом з кількістю записів за секунду визначає, скільки записів
+        одночасно зберігається в Redis (тобто використання пам'яті).
+
+        Returns:
+            float: Час у секундах або 0, якщо записів ще не було
+        """
+        return self.assigned_time / self.assigned if self.assigned else 0.0
+
+    @property
+    def estimated_entries(self) -> float:
+        """
+        Оцінює кількість записів, що одночасно зберігаються в Redis.
+
+        За законом Літтла: частота призначення записів, помножена на середній
+        час їх життя. Оцінка коректна для усталеного навантаження і не перевищує
+        кількості призначених записів.
+
+        Returns:
+            float: Оцінена кількість записів
+        """
+        uptime: float = monotonic() - self._started
+        if uptime <= 0:
+            return 0.0
+        return min(float(self.assigned), self.assigned / uptime * self.average_time)
+
+    def touch(self, key: Hashable) -> None:
+        """
+        Враховує звернення до запису.
+
+        Базова політика частоту звернень не враховує.
+
+        Args:
+            key: Ключ запису
+        """
+
+    def record(self, hit: bool) -> None:
+        """
+        Враховує результат пошуку запису в Redis.
+
+        Args:
+            hit: True, якщо запис знайдено
+        """
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._observe()
+
+    def metrics(self) -> dict[str, float]:
+        """
+        Повертає знімок метрик політики та кешу процесу.
+
+        Returns:
+            Словник з назвами та значеннями метрик
+        """
+        metrics: dict[str, float] = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "refreshes": self.refreshes,
+            "stampedes": self.stampedes,
+            "load_time": self.delta,
+            "assigned": self.assigned,
+            "assigned_time": self.assigned_time,
+            "average_time": self.average_time,
+            "estimated_entries": self.estimated_entries,
+        }
+        if self.local_cache is not None:
+            metrics.update(
+                (f"local_{name}", value) for name, value in self.local_cache.metrics().items()
+            )
+        return metrics
+
+    def _observe(self) -> None:
+        """
+        Записує метрики в логи, якщо минув інтервал metrics_interval.
+        """
+        now: float = monotonic()
+        if not self.metrics_interval or now - self._logged_at < self.metrics_interval:
+            return
+        self._logged_at = now
+        logger.info(
+            "Users cache: %s",
+            ", ".join(f"{name}={value:g}" for name, value in self.metrics().items()),
+        )
+
+    def expiry(self, key: Hashable = None) -> int:
+        """
+        Повертає час життя нового запису з випадковим відхиленням.
+
+        Args:
+            key: Ключ запису
+
+        Returns:
+            Час життя в секундах (щонайменше 1)
+        """
+        ttl: int = self.base_expiry(key)
+        if self.jitter:
+            ttl = max(1, round(ttl * random.uniform(1 - self.jitter, 1 + self.jitter)))
+        self.assigned += 1
+        self.assigned_time += ttl
+        return ttl
+
+    def base_expiry(self, key: Hashable) -> int:
+        """
+        Повертає час життя запису без випадкового відхилення.
+
+        Args:
+            key: Ключ запису
+
+        Returns:
+            Час життя в секундах
+        """
+        return self.ttl
+
+    def should_refresh(self, remaining: float) -> bool:
+        """
+        Вирішує, чи оновити запис до завершення його життя (XFetch).
+
+        Args:
+            remaining: Час, що залишився до завершення життя запису, в секундах
+
+        Returns:
+            True, якщо запис слід завантажити з бази даних заздалегідь
+        """
+        if not self.beta or not self.delta:
+            return False
+        # 1 - random() лежить у (0, 1], тому логарифм визначений
+        if -self.delta * self.beta * math.log(1 - random.random()) < remaining:
+            return False
+        self.refreshes += 1
+        return True
+
+    def observe(self, elapsed: float) -> None:
+        """
+        Враховує тривалість завантаження запису з бази даних.
+
+        Args:
+            elapsed: Час завантаження в секундах
+        """
+        if not self.delta:
+            self.delta = elapsed
+        else:
+            self.delta += self.SMOOTHING * (elapsed - self.delta)
+
+
+class AdaptiveCachePolicy(CachePolicy):
+    """
+    Політика, що призначає час життя запису за частотою звернень до нього.
+
+    Для кожного ключа ведеться лічильник звернень, що експоненційно згасає
+    з періодом напіврозпаду half_life. Час життя запису пропорційний лічильнику
+    і обмежений межами [min_ttl, max_ttl]: користувач, що звернувся один раз,
+    отримує min_ttl, а активний користувач - до max_ttl. Лічильники зберігаються
+    в обмеженому кеші процесу, тож пам'ять під них не зростає необмежено.
+
+    Компроміс між часткою влучань та пам'яттю Redis видно з метрик: поряд
+    з hit_rate звітуються середній і сумарний призначений час життя, оцінка
+    кількості записів у Redis, кількість записів з часом життя max_ttl (hot)
+    та min_ttl (cold) і кількість ключів з лічильниками звернень.
+
+    Attributes:
+        min_ttl: Мінімальний час життя запису в секундах
+        max_ttl: Максимальний час життя запису в секундах
+        half_life: Період напіврозпаду лічильника звернень у секундах
+        hot: Кількість записів, яким призначено max_ttl
+        cold: Кількість записів, яким призначено min_ttl
+    """
+
+    __slots__ = ("min_ttl", "max_ttl", "half_life", "hot", "cold", "_scores")
+
+    def __init__(
+        self,
+        min_ttl: int,
+        max_ttl: int,
+        half_life: float,
+        jitter: float = 0.0,
+        beta: float = 0.0,
+        tracked: int = 100_000,
+        metrics_interval: float = 0.0,
+        local_cache: Optional[TTLCache[Any, Any]] = None,
+    ) -> None:
+        """
+        Ініціалізує адаптивну політику.
+
+        Args:
+            min_ttl: Мінімальний час життя запису в секундах
+            max_ttl: Максимальний час життя запису в секундах
+            half_life: Період напіврозпаду лічильника звернень у секундах
+            jitter: Частка випадкового відхилення часу життя
+            beta: Коефіцієнт раннього оновлення XFetch
+            tracked: Максимальна кількість ключів, для яких ведуться лічильники
+            metrics_interval: Інтервал запису метрик у логи (в секундах, 0 - не записувати)
+            local_cache: Кеш користувачів у пам'яті процесу для звітів про влучання
+
+        Raises:
+            ValueError: Якщо межі часу життя або період напіврозпаду некоректні
+        """
+        super().__init__(
+            ttl=min_ttl,
+            jitter=jitter,
+            beta=beta,
+            metrics_interval=metrics_interval,
+            local_cache=local_cache,
+        )
+        if max_ttl < min_ttl:
+            raise ValueError(f"Cache max ttl {max_ttl!r} is less than min ttl {min_ttl!r}")
+        if half_life <= 0:
+            raise ValueError(f"Access counter half-life must be positive, got {half_life!r}")
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.half_life = half_life
+        self.hot = 0
+        self.cold = 0
+        # Ключ -> (лічильник звернень, момент останнього звернення).
+        # Через 8 періодів напіврозпаду лічильник згасає до долі відсотка
+        self._scores: TTLCache[Any, tuple[float, float]] = TTLCache(
+            maxsize=tracked,
+            ttl=half_life * 8,
+        )
+
+    def score(self, key: Hashable) -> float:
+        """
+        Повертає поточне значення лічильника звернень до ключа.
+
+        Args:
+            key: Ключ запису
+
+        Returns:
+            Згаслий на поточний момент лічильник (0, якщо звернень не було)
+        """
+        entry: Optional[tuple[float, float]] = self._scores.get(key)
+        if entry is None:
+            return 0.0
+        score, last = entry
+        decay: float = 0.5 ** ((monotonic() - last) / self.half_life)
+        return score * decay
+
+    def touch(self, key: Hashable) -> None:
+        """
+        Збільшує лічильник звернень до ключа.
+
+        Args:
+            key: Ключ запису
+        """
+        self._scores.set(key, (self.score(key) + 1, monotonic()))
+
+    def base_expiry(self, key: Hashable) -> int:
+        """
+        Повертає час життя запису за частотою звернень до нього.
+
+        Args:
+            key: Ключ запису
+
+        Returns:
+            Час життя в секундах у межах [min_ttl, max_ttl]
+        """
+        ttl: int = round(min(self.max_ttl, max(self.min_ttl, self.min_ttl * self.score(key))))
+        if ttl >= self.max_ttl:
+            self.hot += 1
+        elif ttl <= self.min_ttl:
+            self.cold += 1
+        return ttl
+
+    def metrics(self) -> dict[str, float]:
+        """
+        Повертає знімок метрик політики з розподілом записів за частотою звернень.
+
+        Returns:
+            Словник з назвами та значеннями метрик
+        """
+        metrics: dict[str, float] = super().metrics()
+        metrics.update(
+            hot=self.hot,
+            cold=self.cold,
+            tracked=len(self._scores),
+        )
+        return metrics
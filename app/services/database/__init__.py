@@ -1,4 +1,4 @@
 from .redis import RedisRepository
-from .sql import Repository, SQLSessionContext, UoW
+from .sql import Repository, SQLSessionContext, SQLSessionScope, UoW
 
-__all__ = ["Repository", "UoW", "SQLSessionContext", "RedisRepository"]
+__all__ = ["Repository", "UoW", "SQLSessionContext", "SQLSessionScope", "RedisRepository"]
@@ -0,0 +1,264 @@
+"""
+Модуль для пакетного виконання операцій Redis.
+
+Операції над ключами StorageKey накопичуються і виконуються одним конвеєром
+(pipeline) - за один мережевий обмін, а за потреби атомарно через MULTI/EXEC.
+"""
+
+from __future__ import annotations
+
+from types import TracebackType
+from typing import Any, Callable, Generic, Optional, TypeVar, Union, cast
+
+from redis.asyncio.client import Pipeline
+from redis.asyncio.cluster import ClusterPipeline
+from redis.typing import ExpiryT
+
+from app.utils.key_builder import StorageKeyLike, pack_key
+
+from .client import RedisClient
+from .codec import CodecRegistry
+
+# Типовий параметр для результату операції
+T = TypeVar("T", bound=Any)
+
+
+class RedisResult(Generic[T]):
+    """
+    Результат операції, доданої до пакета.
+
+    Значення стає доступним лише після виконання пакета.
+    """
+
+    __slots__ = ("_value", "_ready")
+
+    def __init__(self) -> None:
+        self._value: Optional[T] = None
+        self._ready = False
+
+    @property
+    def ready(self) -> bool:
+        """
+        Повертає True, якщо пакет вже виконано.
+        """
+        return self._ready
+
+    @property
+    def value(self) -> T:
+        """
+        Повертає результат операції.
+
+        Returns:
+            Результат операції
+
+        Raises:
+            RuntimeError: Якщо пакет ще не виконано
+        """
+        if not self._ready:
+            raise RuntimeError("Redis batch has not been executed yet")
+        return cast(T, self._value)
+
+    def _resolve(self, value: T) -> None:
+        self._value = value
+        self._ready = True
+
+
+class RedisBatch:
+    """
+    Пакет операцій Redis, що виконується одним конвеєром.
+
+    Кожна операція одразу повертає типізований RedisResult, значення якого
+    заповнюється після виконання пакета. При використанні як асинхронного
+    контекстного менеджера пакет виконується при виході з блоку (якщо в ньому
+    не виник виняток).
+
+    Приклад використання:
+        async with redis.batch() as batch:
+            user = batch.get(UserKey(key=1), validator=UserDto)
+            batch.delete(UserKey(key=2))
+        print(user.value)
+
+    Attributes:
+        transaction: Чи виконується пакет атомарно (MULTI/EXEC)
+    """
+
+    __slots__ = ("transaction", "_codecs", "_pipeline", "_results")
+
+    def __init__(
+        self,
+        client: RedisClient,
+        codecs: CodecRegistry,
+        transaction: bool = False,
+    ) -> None:
+        """
+        Ініціалізує порожній пакет.
+
+        Args:
+            client: Асинхронний клієнт Redis (один вузол або кластер)
+            codecs: Реєстр кодеків для кодування та декодування значень
+            transaction: Виконувати пакет атомарно через MULTI/EXEC
+            
+        Raises:
+            redis.RedisClusterException: Якщо атомарне виконання запитано для кластера
+        """
+        self.transaction = transaction
+        self._codecs = codecs
+        self._pipeline: Union[Pipeline, ClusterPipeline] = client.pipeline(
+            transaction=transaction
+        )
+        self._results: list[tuple[RedisResult[Any], Callable[[Any], Any]]] = []
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: StorageKeyLike, validator: type[T]) -> RedisResult[Optional[T]]:
+        """
+        Додає до пакета отримання даних з валідацією вказаним типом.
+
+        Args:
+            key: Ключ для пошуку даних у Redis
+            validator: Тип для валідації отриманих даних
+
+        Returns:
+            Результат: валідований об'єкт або None, якщо дані не знайдено
+        """
+        self._pipeline.get(pack_key(key))
+        codec = self._codecs.get(validator)
+        return self._add(lambda value: None if value is None else codec.decode(value))
+
+    def set(
+        self,
+        key: StorageKeyLike,
+        value: Any,
+        ex: Optional[ExpiryT] = None,
+    ) -> RedisResult[bool]:
+        """
+        Додає до пакета збереження даних.
+
+        Args:
+            key: Ключ для збереження даних
+            value: Дані для збереження (можуть бути Pydantic моделлю)
+            ex: Час життя запису (в секундах або як Redis ExpiryT)
+
+        Returns:
+            Результат: True, якщо дані збережено
+        """
+        self._pipeline.set(name=pack_key(key), value=self._codecs.encode(value), ex=ex)
+        return self._add(bool)
+
+    def delete(self, key: StorageKeyLike) -> RedisResult[int]:
+        """
+        Додає до пакета видалення даних.
+
+        Args:
+            key: Ключ для видалення даних
+
+        Returns:
+            Результат: кількість видалених ключів
+        """
+        self._pipeline.delete(pack_key(key))
+        return self._add(int)
+
+    def hgetall(self, key: StorageKeyLike, validator: type[T]) -> RedisResult[Optional[T]]:
+        """
+        Додає до пакета отримання моделі, збереженої як хеш.
+
+        Args:
+            key: Ключ хеша
+            validator: Тип для валідації отриманих даних
+
+        Returns:
+            Результат: валідований об'єкт або None, якщо хеш не знайдено
+        """
+        self._pipeline.hgetall(pack_key(key))
+        codec = self._codecs.get(validator)
+        return self._add(codec.decode_fields)
+
+    def hset(self, key: StorageKeyLike, value: Any) -> RedisResult[int]:
+        """
+        Додає до пакета збереження моделі як хеша (усі поля).
+
+        Args:
+            key: Ключ хеша
+            value: Модель для збереження
+
+        Returns:
+            Результат: кількість нових полів хеша
+        """
+        codec = self._codecs.get(type(value))
+        self._pipeline.hset(pack_key(key), mapping=codec.encode_fields(value))
+        return self._add(int)
+
+    def expire(self, key: StorageKeyLike, time: ExpiryT) -> RedisResult[bool]:
+        """
+        Додає до пакета встановлення часу життя запису.
+
+        Args:
+            key: Ключ запису
+            time: Час життя запису (в секундах або як timedelta)
+
+        Returns:
+            Результат: True, якщо ключ існує і час життя встановлено
+        """
+        self._pipeline.expire(pack_key(key), time)
+        return self._add(bool)
+
+    def pttl(self, key: StorageKeyLike) -> RedisResult[Optional[float]]:
+        """
+        Додає до пакета отримання часу, що залишився до завершення життя запису.
+
+        Args:
+            key: Ключ запису
+
+        Returns:
+            Результат: час у секундах або None, якщо ключа немає чи він безстроковий
+        """
+        self._pipeline.pttl(pack_key(key))
+        return self._add(lambda value: value / 1000 if value >= 0 else None)
+
+    async def execute(self) -> None:
+        """
+        Виконує всі операції пакета за один мережевий обмін.
+
+        Raises:
+            redis.RedisError: Якщо будь-яка з операцій завершилася помилкою
+        """
+        if not self._results:
+            return
+        try:
+            values: list[Any] = await self._pipeline.execute()
+        finally:
+            results, self._results = self._results, []
+        for (result, convert), value in zip(results, values):
+            result._resolve(convert(value))
+
+    async def __aenter__(self) -> RedisBatch:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        try:
+            if exc_type is None:
+                await self.execute()
+        finally:
+            # Конвеєр кластера очищується сам після виконання
+            if isinstance(self._pipeline, Pipeline):
+                await self._pipeline.reset()  # type: ignore[no-untyped-call]
+
+    def _add(self, convert: Callable[[Any], T]) -> RedisResult[T]:
+        """
+        Реєструє результат щойно доданої до конвеєра операції.
+
+        Args:
+            convert: Функція перетворення сирої відповіді Redis
+
+        Returns:
+            Результат операції
+        """
+        result: RedisResult[T] = RedisResult()
+        self._results.append((result, convert))
+        return result
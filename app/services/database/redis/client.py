@@ -0,0 +1,30 @@
+"""
+Модуль з типом клієнта Redis.
+
+Додаток працює як з одним вузлом Redis, так і з Redis Cluster. Обидва
+клієнти мають однаковий набір команд для окремих ключів, але відрізняються
+в командах для кількох ключів, конвеєрах та закритті з'єднань.
+"""
+
+from __future__ import annotations
+
+from typing import TypeAlias, Union
+
+from redis.asyncio import Redis, RedisCluster
+
+# Асинхронний клієнт Redis: один вузол або кластер
+RedisClient: TypeAlias = Union[Redis, RedisCluster]
+
+
+async def close_client(client: RedisClient) -> None:
+    """
+    Закриває клієнт Redis разом з усіма його з'єднаннями.
+    
+    Args:
+        client: Асинхронний клієнт Redis
+    """
+    if isinstance(client, RedisCluster):
+        # Клієнт кластера закриває з'єднання з усіма вузлами сам
+        await client.aclose()
+        return
+    await client.aclose(close_connection_pool=True)
@@ -0,0 +1,234 @@
+"""
+Модуль для кодування та декодування значень, що зберігаються в Redis.
+
+Для кожного типу валідатора один раз створюється та кешується кодек
+(Pydantic TypeAdapter), тож повторні операції не будують схему валідації
+заново. JSON декодується з байтів одразу в цільовий тип, без проміжного словника.
+
+Закодовані значення мають 2-байтовий заголовок: маркер 0xC1 (цей байт не
+може починати ні JSON, ні MessagePack) та байт з версією формату й ідентифікатором
+формату. Значення без заголовка вважаються JSON, записаним до появи заголовків.
+Значення з іншою версією формату вважаються відсутніми (промах кешу), тому
+зміна формату не потребує очищення Redis.
+
+Моделі також можна зберігати як хеші Redis: кожне поле кодується в JSON
+окремо, а службове поле з версією формату дозволяє так само відкидати
+застарілі записи.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Final, Generic, Optional, TypeVar
+
+from msgspec import json, msgpack
+from pydantic import TypeAdapter
+
+from app.enums import CodecFormat
+
+# Типовий параметр для валідації даних
+T = TypeVar("T", bound=Any)
+
+# Маркер заголовка закодованого значення
+MAGIC: Final[int] = 0xC1
+# Версія формату; її зміна робить усі раніше записані значення промахами кешу
+CODEC_VERSION: Final[int] = 1
+# Ідентифікатори форматів у байті заголовка
+FORMAT_IDS: Final[dict[CodecFormat, int]] = {
+    CodecFormat.JSON: 1,
+    CodecFormat.MSGPACK: 2,
+}
+
+# Службове поле хеша з версією формату
+VERSION_FIELD: Final[str] = "__v"
+
+_msgpack_encode = msgpack.Encoder().encode
+_msgpack_decode = msgpack.Decoder().decode
+_json_encode = json.Encoder().encode
+_json_decode = json.Decoder().decode
+
+
+def _header(format_: CodecFormat) -> bytes:
+    """
+    Формує заголовок значення для вказаного формату.
+
+    Args:
+        format_: Формат серіалізації
+
+    Returns:
+        Два байти заголовка
+    """
+    return bytes((MAGIC, (CODEC_VERSION << 4) | FORMAT_IDS[format_]))
+
+
+class Codec(Generic[T]):
+    """
+    Кодек значень одного типу.
+
+    Attributes:
+        adapter: Скомпільований TypeAdapter для типу значень
+        format: Формат, у якому кодуються нові значення
+    """
+
+    __slots__ = ("adapter", "format", "_header")
+
+    def __init__(self, validator: type[T], format_: CodecFormat) -> None:
+        """
+        Створює кодек для вказаного типу.
+
+        Args:
+            validator: Тип значень
+            format_: Формат, у якому кодуються нові значення
+        """
+        self.adapter: TypeAdapter[T] = TypeAdapter(validator)
+        self.format = format_
+        self._header = _header(format_)
+
+    def encode(self, value: T) -> bytes:
+        """
+        Кодує значення з заголовком формату.
+
+        Поля зі значеннями за замовчуванням не зберігаються.
+
+        Args:
+            value: Значення для кодування
+
+        Returns:
+            Закодовані байти
+        """
+        if self.format is CodecFormat.MSGPACK:
+            body: bytes = _msgpack_encode(
+                self.adapter.dump_python(value, mode="json", exclude_defaults=True)
+            )
+        else:
+            body = self.adapter.dump_json(value, exclude_defaults=True)
+        return self._header + body
+
+    def decode(self, data: bytes) -> Optional[T]:
+        """
+        Декодує значення в цільовий тип.
+
+        Формат визначається за заголовком значення, а не за налаштуваннями
+        кодека, тому під час переходу між форматами читаються обидва.
+
+        Args:
+            data: Закодовані байти з Redis
+
+        Returns:
+            Валідований об'єкт або None, якщо значення записане в іншій версії формату
+        """
+        if not data or data[0] != MAGIC:
+            # Значення без заголовка - JSON, записаний попередніми версіями
+            return self.adapter.validate_json(data)
+        tag: int = data[1]
+        if tag >> 4 != CODEC_VERSION:
+            return None
+        body: bytes = data[2:]
+        format_id: int = tag & 0x0F
+        if format_id == FORMAT_IDS[CodecFormat.JSON]:
+            return self.adapter.validate_json(body)
+        if format_id == FORMAT_IDS[CodecFormat.MSGPACK]:
+            return self.adapter.validate_python(_msgpack_decode(body))
+        return None
+
+    def encode_fields(
+        self,
+        value: T,
+        include: Optional[set[str]] = None,
+    ) -> dict[str, bytes]:
+        """
+        Кодує поля моделі для збереження в хеші Redis.
+
+        Кожне поле кодується в JSON окремо, тож його можна оновити
+        без перезапису інших полів.
+
+        Args:
+            value: Модель для кодування
+            include: Поля для кодування. Якщо не вказано, кодуються всі поля
+                     разом зі службовим полем версії формату.
+
+        Returns:
+            Словник назва поля -> закодоване значення
+        """
+        data: dict[str, Any] = self.adapter.dump_python(value, mode="json", include=include)
+        fields: dict[str, bytes] = {name: _json_encode(field) for name, field in data.items()}
+        if include is None:
+            fields[VERSION_FIELD] = str(CODEC_VERSION).encode()
+        return fields
+
+    def decode_fields(self, data: dict[bytes, bytes]) -> Optional[T]:
+        """
+        Декодує модель з полів хеша Redis.
+
+        Args:
+            data: Результат HGETALL
+
+        Returns:
+            Валідований об'єкт або None, якщо хеш порожній чи записаний
+            в іншій версії формату
+        """
+        if data.pop(VERSION_FIELD.encode(), None) != str(CODEC_VERSION).encode():
+            return None
+        return self.adapter.validate_python(
+            {name.decode(): _json_decode(field) for name, field in data.items()}
+        )
+
+
+class CodecRegistry:
+    """
+    Реєстр кодеків: по одному кешованому кодеку на кожен тип значень.
+
+    Attributes:
+        format: Формат, у якому кодуються нові значення
+    """
+
+    __slots__ = ("format", "_codecs")
+
+    def __init__(self, format_: CodecFormat = CodecFormat.JSON) -> None:
+        """
+        Ініціалізує порожній реєстр.
+
+        Args:
+            format_: Формат, у якому кодуються нові значення
+        """
+        self.format = format_
+        self._codecs: dict[Any, Codec[Any]] = {}
+
+    def get(self, validator: type[T]) -> Codec[T]:
+        """
+        Повертає кодек для типу, створюючи його при першому зверненні.
+
+        Args:
+            validator: Тип значень
+
+        Returns:
+            Кодек типу
+        """
+        codec: Optional[Codec[T]] = self._codecs.get(validator)
+        if codec is None:
+            codec = self._codecs[validator] = Codec(validator, self.format)
+        return codec
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Кодує значення кодеком його типу.
+
+        Args:
+            value: Дані для збереження (можуть бути Pydantic моделлю)
+
+        Returns:
+            Закодовані байти
+        """
+        return self.get(type(value)).encode(value)
+
+    def decode(self, data: bytes, validator: type[T]) -> Optional[T]:
+        """
+        Декодує значення кодеком вказаного типу.
+
+        Args:
+            data: Закодовані байти з Redis
+            validator: Тип для валідації отриманих даних
+
+        Returns:
+            Валідований об'єкт або None, якщо значення записане в іншій версії формату
+        """
+        return self.get(validator).decode(data)
@@ -18,8 +18,29 @@ class UserKey(StorageKey, prefix="users"):
     
     Examples:
         >>> user_key = UserKey(key=123456789)
-        >>> str(user_key)
+        >>> user_key.pack()
         'users:123456789'
+        >>> UserKey.pack_raw(key=123456789)  # без створення моделі
+        'users:123456789'
+    """
+    
+    key: Any  # Значення ключа (зазвичай telegram_id користувача)
+
+
+class UserFieldsKey(StorageKey, prefix="user_fields"):
+    """
+    Клас для генерації ключів Redis для користувачів, збережених як хеші.
+    
+    Використовує окремий префікс, щоб перемикання між зберіганням користувача
+    одним значенням і хешем не призводило до конфлікту типів ключів у Redis.
+    
+    Attributes:
+        key: Значення, яке буде додано до префіксу для формування повного ключа.
+             Зазвичай це ідентифікатор користувача (telegram_id).
+    
+    Examples:
+        >>> UserFieldsKey.pack_raw(key=123456789)
+        'user_fields:123456789'
     """
     
     key: Any  # Значення ключа (зазвичай telegram_id користувача)
@@ -0,0 +1,176 @@
+"""
+Модуль з пулом з'єднань Redis, завантаженість якого можна відстежувати.
+
+Блокуючий пул обмежує кількість з'єднань: при пікових навантаженнях запити
+стають у чергу на вільне з'єднання замість відкриття сотень нових сокетів.
+Лічильники пулу показують, як часто та як довго запити чекали в цій черзі,
+тож розмір пулу можна підібрати за фактичною завантаженістю. Метрики пулу
+періодично записуються в логи, як і метрики пулу з'єднань SQL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from time import monotonic
+from typing import Any, Optional
+
+from redis.asyncio import BlockingConnectionPool
+from redis.asyncio.connection import AbstractConnection
+from redis.exceptions import ConnectionError
+
+from app.utils.logging import database as logger
+
+
+class MonitoredConnectionPool(BlockingConnectionPool):
+    """
+    Блокуючий пул з'єднань Redis з лічильниками завантаженості.
+
+    Attributes:
+        acquired: Кількість виданих з'єднань
+        waits: Кількість запитів, яким довелося чекати на вільне з'єднання
+        wait_time: Сумарний час очікування вільного з'єднання (в секундах)
+        max_wait: Найдовше очікування вільного з'єднання (в секундах)
+        timeouts: Кількість запитів, що не дочекалися вільного з'єднання
+        peak_in_use: Найбільша кількість одночасно зайнятих з'єднань
+        metrics_interval: Інтервал запису метрик у логи (в секундах, 0 - не записувати)
+    """
+
+    def __init__(self, *args: Any, metrics_interval: float = 0.0, **kwargs: Any) -> None:
+        """
+        Ініціалізує пул з нульовими лічильниками.
+
+        Args:
+            *args: Позиційні параметри BlockingConnectionPool
+            metrics_interval: Інтервал запису метрик у логи (в секундах, 0 - не записувати)
+            **kwargs: Параметри BlockingConnectionPool (max_connections, timeout
+                      та параметри з'єднань)
+        """
+        super().__init__(*args, **kwargs)
+        self.acquired = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.peak_in_use = 0
+        self.metrics_interval = metrics_interval
+        self._logged_at = monotonic()
+        # Зайняті з'єднання обліковуються самим пулом, без внутрішніх структур redis-py
+        self._checked_out: set[AbstractConnection] = set()
+
+    @property
+    def in_use(self) -> int:
+        """
+        Повертає кількість зайнятих з'єднань.
+        """
+        return len(self._checked_out)
+
+    @property
+    def saturation(self) -> float:
+        """
+        Повертає частку зайнятих з'єднань від максимальної кількості.
+        """
+        return self.in_use / self.max_connections
+
+    @property
+    def average_wait(self) -> float:
+        """
+        Повертає середній час очікування вільного з'єднання серед запитів, що чекали.
+        """
+        return self.wait_time / self.waits if self.waits else 0.0
+
+    def metrics(self) -> dict[str, float]:
+        """
+        Повертає знімок метрик пулу.
+
+        Returns:
+            Словник з назвами та значеннями метрик
+        """
+        return {
+            "acquired": self.acquired,
+            "waits": self.waits,
+            "wait_time": self.wait_time,
+            "average_wait": self.average_wait,
+            "max_wait": self.max_wait,
+            "timeouts": self.timeouts,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "max_connections": self.max_connections,
+            "saturation": self.saturation,
+        }
+
+    async def get_connection(
+        self,
+        command_name: Optional[str],
+        *keys: Any,
+        **options: Any,
+    ) -> AbstractConnection:
+        """
+        Видає з'єднання з пулу, враховуючи очікування в лічильниках.
+
+        Args:
+            command_name: Назва команди, для якої потрібне з'єднання
+            *keys: Ключі команди
+            **options: Параметри команди
+
+        Returns:
+            З'єднання з пулу
+
+        Raises:
+            redis.ConnectionError: Якщо вільне з'єднання не з'явилося за timeout секунд
+        """
+        connection: AbstractConnection
+        if self.can_get_connection():
+            connection = await super().get_connection(  # type: ignore[no-untyped-call]
+                command_name, *keys, **options
+            )
+        else:
+            # Усі з'єднання зайняті: запит стає в чергу
+            self.waits += 1
+            start: float = monotonic()
+            try:
+                connection = await super().get_connection(  # type: ignore[no-untyped-call]
+                    command_name, *keys, **options
+                )
+            except ConnectionError as error:
+                if isinstance(error.__cause__, asyncio.TimeoutError):
+                    self.timeouts += 1
+                    logger.warning(
+                        "Redis pool exhausted: no connection within %ss (%d in use)",
+                        self.timeout,
+                        self.in_use,
+                    )
+                raise
+            finally:
+                waited: float = monotonic() - start
+                self.wait_time += waited
+                self.max_wait = max(self.max_wait, waited)
+        self._checked_out.add(connection)
+        self.acquired += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        self._observe(monotonic())
+        return connection
+
+    async def release(self, connection: AbstractConnection) -> None:
+        """
+        Повертає з'єднання до пулу.
+
+        Args:
+            connection: З'єднання, видане пулом
+        """
+        self._checked_out.discard(connection)
+        await super().release(connection)
+
+    def _observe(self, now: float) -> None:
+        """
+        Записує метрики в логи, якщо минув інтервал metrics_interval.
+
+        Args:
+            now: Поточний момент (monotonic)
+        """
+        if not self.metrics_interval or now - self._logged_at < self.metrics_interval:
+            return
+        self._logged_at = now
+        logger.info(
+            "Redis pool: %s",
+            ", ".join(f"{name}={value:g}" for name, value in self.metrics().items()),
+        )
@@ -1,19 +1,37 @@
 from __future__ import annotations
 
-from typing import Any, Optional, TypeVar
+from typing import Any, Callable, Final, Iterable, Optional, TypeVar, Union
 
-from pydantic import BaseModel, TypeAdapter
-from redis.asyncio import Redis
+from redis.asyncio import RedisCluster
 from redis.typing import ExpiryT
 
 from app.models.dto.user import UserDto
-from app.utils import mjson
-from app.utils.key_builder import StorageKey
+from app.utils.key_builder import StorageKeyLike, pack_key
+from app.utils.ttl_cache import TTLCache
 
-from .keys import UserKey
+from .batch import RedisBatch
+from .client import RedisClient, close_client
+from .codec import CodecRegistry
+from .keys import UserFieldsKey, UserKey
+from .tracking import ClientTracking
 
 # Типовий параметр для валідації даних
 T = TypeVar("T", bound=Any)
+# Час життя записів: одне значення для всіх або функція ключ -> час життя
+CacheTime = Union[int, Callable[[Any], int]]
+
+# Оновлює поля хеша лише якщо він існує (інакше часткові дані створили б неповний запис).
+# Час життя не скидається; встановлюється лише якщо у ключа його немає.
+UPDATE_FIELDS_SCRIPT: Final[str] = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+if redis.call('TTL', KEYS[1]) < 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return 1
+"""
 
 
 class RedisRepository:
@@ -22,65 +40,204 @@ class RedisRepository:
     
     Надає методи для збереження, отримання та видалення даних у Redis,
     включаючи спеціалізовані методи для роботи з користувачами.
+    
+    Користувачі додатково можуть кешуватися в пам'яті процесу (users_cache),
+    щоб повторні звернення одного користувача не виконували запит до Redis.
+    
+    У режимі users_hash користувачі зберігаються як хеші Redis: оновлення
+    записує лише змінені поля, тож конкурентні оновлення різних полів
+    з різних процесів не перезаписують одне одного.
+    
+    З відстеженням ключів (tracking) повторні читання відстежуваних ключів
+    обслуговуються з локального кешу, записи якого видаляє сам сервер Redis
+    при зміні ключа. Кеш користувачів тоді зберігає записи за упакованими
+    ключами Redis і теж інвалідується сервером. Значення, під час читання
+    або запису якого надійшло будь-яке повідомлення про інвалідацію,
+    локально не кешується, тож відповідь, що розминулася з інвалідацією,
+    не залишиться в кеші.
     """
     
-    def __init__(self, client: Redis) -> None:
+    def __init__(
+        self,
+        client: RedisClient,
+        users_cache: Optional[TTLCache[Any, UserDto]] = None,
+        codecs: Optional[CodecRegistry] = None,
+        users_hash: bool = False,
+        tracking: Optional[ClientTracking] = None,
+    ) -> None:
         """
         Ініціалізує репозиторій з клієнтом Redis.
         
         Args:
-            client: Асинхронний клієнт Redis для виконання операцій
+            client: Асинхронний клієнт Redis для виконання операцій (один вузол або кластер)
+            users_cache: Необов'язковий кеш користувачів у пам'яті процесу,
+                         який перевіряється перед зверненням до Redis
+            codecs: Реєстр кодеків для серіалізації значень (за замовчуванням - JSON)
+            users_hash: Зберігати користувачів як хеші Redis з оновленням окремих полів
+            tracking: Необов'язкове відстеження ключів сервером для локального
+                      кешування читань
         """
         self.client = client
+        self.users_cache = users_cache
+        self.codecs = codecs if codecs is not None else CodecRegistry()
+        self.users_hash = users_hash
+        self.tracking = tracking
+        if tracking is not None and users_cache is not None:
+            tracking.attach(users_cache)
+        # Скрипт працює з одним ключем, тож у кластері виконується на вузлі його слота
+        self._update_fields = client.register_script(  # type: ignore[misc]
+            UPDATE_FIELDS_SCRIPT
+        )
 
-    async def get(self, key: StorageKey, validator: type[T]) -> Optional[T]:
+    async def get(self, key: StorageKeyLike, validator: type[T]) -> Optional[T]:
         """
         Отримує дані з Redis та валідує їх за допомогою вказаного типу.
         
         Args:
-            key: Ключ для пошуку даних у Redis
+            key: Ключ для пошуку даних у Redis (модель ключа або упакований рядок)
             validator: Тип для валідації отриманих даних
             
         Returns:
             Валідований об'єкт або None, якщо дані не знайдено
         """
-        value: Optional[Any] = await self.client.get(key.pack())
+        packed: str = pack_key(key)
+        tracking: Optional[ClientTracking] = self.tracking
+        if tracking is None or not tracking.tracks(packed):
+            value: Optional[Any] = await self.client.get(packed)
+        else:
+            # Повторні читання відстежуваного ключа обслуговуються без мережевого запиту
+            value = tracking.cache.get(packed)
+            if value is None:
+                epoch: int = tracking.invalidations
+                value = await self.client.get(packed)
+                if value is not None and epoch == tracking.invalidations:
+                    tracking.cache.set(packed, value)
         if value is None:
             return None
-        # Декодуємо JSON-дані
-        value = mjson.decode(value)
-        # Валідуємо дані за допомогою TypeAdapter
-        return TypeAdapter[T](validator).validate_python(value)
+        return self.codecs.decode(value, validator)
 
-    async def set(self, key: StorageKey, value: Any, ex: Optional[ExpiryT] = None) -> None:
+    async def set(self, key: StorageKeyLike, value: Any, ex: Optional[ExpiryT] = None) -> None:
         """
         Зберігає дані в Redis.
         
         Args:
-            key: Ключ для збереження даних
+            key: Ключ для збереження даних (модель ключа або упакований рядок)
             value: Дані для збереження (можуть бути Pydantic моделлю)
             ex: Час життя запису (в секундах або як Redis ExpiryT)
         """
-        # Якщо значення є Pydantic моделлю, конвертуємо її в словник
-        if isinstance(value, BaseModel):
-            value = value.model_dump(exclude_defaults=True)
         # Зберігаємо закодовані дані в Redis
-        await self.client.set(name=key.pack(), value=mjson.encode(value), ex=ex)
+        packed: str = pack_key(key)
+        await self.client.set(name=packed, value=self.codecs.encode(value), ex=ex)
+        self._forget(packed)
 
-    async def delete(self, key: StorageKey) -> None:
+    async def delete(self, key: StorageKeyLike) -> None:
         """
         Видаляє дані з Redis за вказаним ключем.
         
         Args:
-            key: Ключ для видалення даних
+            key: Ключ для видалення даних (модель ключа або упакований рядок)
+        """
+        packed: str = pack_key(key)
+        await self.client.delete(packed)
+        self._forget(packed)
+
+    def batch(self, transaction: bool = False) -> RedisBatch:
+        """
+        Створює пакет операцій, що виконуються одним конвеєром.
+        
+        Args:
+            transaction: Виконувати пакет атомарно через MULTI/EXEC
+            
+        Returns:
+            Порожній пакет операцій
+            
+        Приклад:
+            async with redis.batch() as batch:
+                first = batch.get(UserKey(key=1), validator=UserDto)
+                batch.expire(UserKey(key=2), 60)
+            user = first.value
         """
-        await self.client.delete(key.pack())
+        return RedisBatch(client=self.client, codecs=self.codecs, transaction=transaction)
 
     async def close(self) -> None:
         """
         Закриває з'єднання з Redis.
         """
-        await self.client.aclose(close_connection_pool=True)
+        await close_client(self.client)
+
+    def _forget(self, packed: str) -> None:
+        """
+        Видаляє локальну копію щойно зміненого ключа, не чекаючи повідомлення сервера.
+        
+        Args:
+            packed: Упакований ключ Redis
+        """
+        if self.tracking is not None:
+            self.tracking.cache.pop(packed)
+
+    def _epoch(self) -> int:
+        """
+        Повертає кількість отриманих повідомлень про інвалідацію.
+        
+        Фіксується перед зверненням до Redis, щоб після нього визначити,
+        чи можна кешувати результат локально.
+        
+        Returns:
+            Лічильник інвалідацій (0 без відстеження)
+        """
+        return 0 if self.tracking is None else self.tracking.invalidations
+
+    def _local_key(self, key: Any) -> Any:
+        """
+        Формує ключ кешу користувачів у пам'яті процесу.
+        
+        З відстеженням ключів це упакований ключ Redis, за яким сервер
+        надсилає повідомлення про інвалідацію.
+        
+        Args:
+            key: Ідентифікатор користувача
+            
+        Returns:
+            Ключ запису в кеші процесу
+        """
+        return key if self.tracking is None else self._user_key(key)
+
+    def _cache_user(self, key: Any, value: UserDto, epoch: int) -> None:
+        """
+        Зберігає копію користувача в кеші процесу.
+        
+        З відстеженням ключів копія зберігається лише якщо з'єднання
+        відстеження встановлене і з моменту epoch не надійшло жодного
+        повідомлення про інвалідацію.
+        
+        Args:
+            key: Ідентифікатор користувача
+            value: DTO об'єкт користувача
+            epoch: Лічильник інвалідацій перед зверненням до Redis
+        """
+        if self.users_cache is None:
+            return
+        tracking: Optional[ClientTracking] = self.tracking
+        if tracking is None:
+            self.users_cache.set(key, value.model_detach())
+            return
+        user_key: str = self._user_key(key)
+        if tracking.tracks(user_key) and epoch == tracking.invalidations:
+            self.users_cache.set(user_key, value.model_detach())
+
+    def _user_key(self, key: Any) -> str:
+        """
+        Формує ключ Redis для користувача з урахуванням способу зберігання.
+        
+        Args:
+            key: Ідентифікатор користувача
+            
+        Returns:
+            Упакований ключ
+        """
+        if self.users_hash:
+            return UserFieldsKey.pack_raw(key=key)
+        return UserKey.pack_raw(key=key)
 
     async def save_user(self, key: Any, value: UserDto, cache_time: int) -> None:
         """
@@ -91,8 +248,54 @@ class RedisRepository:
             value: DTO об'єкт користувача для збереження
             cache_time: Час життя запису в секундах
         """
-        user_key: UserKey = UserKey(key=key)
-        await self.set(key=user_key, value=value, ex=cache_time)
+        if self.users_hash:
+            await self.save_users(values={key: value}, cache_time=cache_time)
+            return
+        epoch: int = self._epoch()
+        await self.set(key=self._user_key(key), value=value, ex=cache_time)
+        self._cache_user(key, value, epoch)
+
+    async def update_user(self, key: Any, value: UserDto, cache_time: int) -> None:
+        """
+        Зберігає зміни користувача в Redis.
+        
+        У режимі users_hash записуються лише поля з value.model_state, і лише
+        якщо користувач вже є в кеші; час життя запису при цьому не скидається.
+        Інакше користувач зберігається повністю, як у save_user.
+        
+        Args:
+            key: Ідентифікатор користувача
+            value: DTO об'єкт користувача зі змінами
+            cache_time: Час життя запису в секундах (для повного збереження
+                        або якщо у запису немає часу життя)
+        """
+        changed: set[str] = {name for name in value.model_state if name in UserDto.model_fields}
+        if not self.users_hash or not changed:
+            await self.save_user(key=key, value=value, cache_time=cache_time)
+            return
+            
+        fields: dict[str, bytes] = self.codecs.get(UserDto).encode_fields(value, include=changed)
+        args: list[Any] = [cache_time]
+        for name, field in fields.items():
+            args.extend((name, field))
+        epoch: int = self._epoch()
+        await self._update_fields(keys=[self._user_key(key)], args=args)
+        self._cache_user(key, value, epoch)
+
+    def get_cached_user(self, key: Any) -> Optional[UserDto]:
+        """
+        Отримує дані користувача лише з кешу процесу, без звернення до Redis.
+        
+        Args:
+            key: Ідентифікатор користувача
+            
+        Returns:
+            DTO об'єкт користувача або None, якщо його немає в кеші процесу
+        """
+        if self.users_cache is None:
+            return None
+        cached: Optional[UserDto] = self.users_cache.get(self._local_key(key))
+        return None if cached is None else cached.model_detach()
 
     async def get_user(self, key: Any) -> Optional[UserDto]:
         """
@@ -104,8 +307,116 @@ class RedisRepository:
         Returns:
             DTO об'єкт користувача або None, якщо користувача не знайдено
         """
-        user_key: UserKey = UserKey(key=key)
-        return await self.get(key=user_key, validator=UserDto)
+        # Спершу шукаємо користувача в кеші процесу
+        cached: Optional[UserDto] = self.get_cached_user(key)
+        if cached is not None:
+            return cached
+        users: dict[Any, UserDto] = await self.get_users(keys=(key,))
+        return users.get(key)
+
+    async def get_user_entry(self, key: Any) -> tuple[Optional[UserDto], Optional[float]]:
+        """
+        Отримує дані користувача разом з часом, що залишився до завершення життя запису.
+        
+        Значення та час життя отримуються одним конвеєром. Для користувача з кешу
+        процесу час життя не визначається.
+        
+        Args:
+            key: Ідентифікатор користувача
+            
+        Returns:
+            Кортеж з DTO об'єкта користувача (або None) та часу в секундах (або None)
+        """
+        cached: Optional[UserDto] = self.get_cached_user(key)
+        if cached is not None:
+            return cached, None
+            
+        user_key: str = self._user_key(key)
+        epoch: int = self._epoch()
+        async with self.batch() as batch:
+            value = (
+                batch.hgetall(user_key, UserDto)
+                if self.users_hash
+                else batch.get(user_key, UserDto)
+            )
+            remaining = batch.pttl(user_key)
+        user: Optional[UserDto] = value.value
+        if user is None:
+            return None, None
+        self._cache_user(key, user, epoch)
+        return user, remaining.value
+
+    async def get_users(self, keys: Iterable[Any]) -> dict[Any, UserDto]:
+        """
+        Отримує дані багатьох користувачів за один мережевий обмін.
+        
+        Користувачі, що є в кеші процесу, до Redis не запитуються. Значення
+        отримуються одним MGET (у кластері - окремим MGET для кожного слота),
+        а в режимі users_hash - конвеєром HGETALL.
+        
+        Args:
+            keys: Ідентифікатори користувачів
+            
+        Returns:
+            Словник ідентифікатор -> DTO об'єкт для знайдених користувачів
+        """
+        users: dict[Any, UserDto] = {}
+        missing: list[Any] = []
+        for key in keys:
+            cached: Optional[UserDto] = self.get_cached_user(key)
+            if cached is not None:
+                users[key] = cached
+            else:
+                missing.append(key)
+        if not missing:
+            return users
+            
+        loaded: list[Optional[UserDto]]
+        epoch: int = self._epoch()
+        if self.users_hash:
+            async with self.batch() as batch:
+                results = [batch.hgetall(self._user_key(key), UserDto) for key in missing]
+            loaded = [result.value for result in results]
+        else:
+            codec = self.codecs.get(UserDto)
+            user_keys: list[str] = [self._user_key(key) for key in missing]
+            values: list[Optional[bytes]] = (
+                await self.client.mget_nonatomic(user_keys)
+                if isinstance(self.client, RedisCluster)
+                else await self.client.mget(user_keys)
+            )
+            loaded = [None if value is None else codec.decode(value) for value in values]
+            
+        for key, user in zip(missing, loaded):
+            if user is None:
+                continue
+            self._cache_user(key, user, epoch)
+            users[key] = user
+        return users
+
+    async def save_users(self, values: dict[Any, UserDto], cache_time: CacheTime) -> None:
+        """
+        Зберігає дані багатьох користувачів в Redis одним конвеєром.
+        
+        Args:
+            values: Словник ідентифікатор -> DTO об'єкт користувача
+            cache_time: Час життя записів у секундах або функція,
+                        що повертає час життя для ключа
+        """
+        if not values:
+            return
+        epoch: int = self._epoch()
+        async with self.batch() as batch:
+            for key, value in values.items():
+                user_key: str = self._user_key(key)
+                ex: int = cache_time if isinstance(cache_time, int) else cache_time(key)
+                if self.users_hash:
+                    batch.hset(key=user_key, value=value)
+                    batch.expire(key=user_key, time=ex)
+                else:
+                    batch.set(key=user_key, value=value, ex=ex)
+        for key, value in values.items():
+            self._cache_user(key, value, epoch)
 
     async def delete_user(self, key: Any) -> None:
         """
@@ -114,5 +425,19 @@ class RedisRepository:
         Args:
             key: Ідентифікатор користувача
         """
-        user_key: UserKey = UserKey(key=key)
-        await self.delete(user_key)
+        await self.delete(self._user_key(key))
+        if self.users_cache is not None:
+            self.users_cache.pop(self._local_key(key))
+
+    async def delete_users(self, keys: Iterable[Any]) -> None:
+        """
+        Видаляє дані багатьох користувачів з Redis одним конвеєром.
+        
+        Args:
+            keys: Ідентифікатори користувачів
+        """
+        async with self.batch() as batch:
+            for key in keys:
+                batch.delete(self._user_key(key))
+                if self.users_cache is not None:
+                    self.users_cache.pop(self._local_key(key))
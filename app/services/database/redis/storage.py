@@ -0,0 +1,39 @@
+"""
+Модуль зі сховищем станів FSM у Redis.
+"""
+
+from __future__ import annotations
+
+from typing import Any, cast
+
+from aiogram.fsm.storage.redis import RedisStorage
+from redis.asyncio import Redis
+
+from .client import RedisClient, close_client
+
+
+class RedisFSMStorage(RedisStorage):
+    """
+    Сховище станів FSM, що працює як з одним вузлом Redis, так і з Redis Cluster.
+    
+    Сховище aiogram використовує лише команди для окремих ключів, які клієнт
+    кластера спрямовує на вузол слота ключа. Відрізняється лише закриття
+    клієнта, тому перевизначено тільки його.
+    """
+    
+    def __init__(self, redis: RedisClient, **kwargs: Any) -> None:
+        """
+        Ініціалізує сховище з клієнтом Redis.
+        
+        Args:
+            redis: Асинхронний клієнт Redis (один вузол або кластер)
+            **kwargs: Параметри RedisStorage (key_builder, state_ttl, json_loads тощо)
+        """
+        super().__init__(redis=cast(Redis, redis), **kwargs)
+        self.client = redis
+
+    async def close(self) -> None:
+        """
+        Закриває клієнт Redis разом з усіма його з'єднаннями.
+        """
+        await close_client(self.client)
@@ -0,0 +1,248 @@
+"""
+Модуль для кешування на стороні клієнта з відстеженням ключів сервером Redis.
+
+Окреме з'єднання за протоколом RESP3 вмикає CLIENT TRACKING у режимі BCAST
+для вказаних префіксів ключів. Сервер надсилає в це з'єднання повідомлення
+про інвалідацію щоразу, коли ключ з таким префіксом змінюється, видаляється
+або завершує своє життя - хоч би який процес його змінив. За цими
+повідомленнями з локальних кешів видаляються відповідні записи, тож повторні
+читання обслуговуються без мережевих запитів, а кілька екземплярів бота
+не бачать застарілих даних довше, ніж триває доставка повідомлення.
+
+Асинхронний клієнт redis-py не має вбудованого кешу на стороні клієнта,
+тому відстеження реалізовано вручну поверх його парсера RESP3. Парсер та
+обробник push-повідомлень - внутрішні частини redis-py (версія закріплена
+в pyproject.toml як redis~=5.2): якщо після оновлення їх не знайдено,
+supported() повертає False, і відстеження не вмикається.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Final, Optional, Sequence, cast
+
+from redis.asyncio import Redis
+from redis.asyncio.connection import AbstractConnection, Connection
+
+from app.utils.logging import database as logger
+from app.utils.ttl_cache import TTLCache
+
+try:
+    from redis._parsers import _AsyncRESP3Parser
+except ImportError:  # pragma: no cover - залежить від версії redis-py
+    _AsyncRESP3Parser = None  # type: ignore[assignment, misc]
+
+# Затримка перед повторним підключенням після розриву з'єднання (в секундах)
+RECONNECT_DELAY: Final[float] = 1.0
+
+
+def supported() -> bool:
+    """
+    Перевіряє, чи має встановлена версія redis-py внутрішні частини, на які
+    спирається відстеження: асинхронний парсер RESP3 з обробником повідомлень
+    про інвалідацію.
+
+    Returns:
+        True, якщо відстеження ключів можна увімкнути
+    """
+    return _AsyncRESP3Parser is not None and all(
+        callable(getattr(_AsyncRESP3Parser, name, None))
+        for name in ("set_invalidation_push_handler", "handle_push_response")
+    )
+
+
+class ClientTracking:
+    """
+    Локальний кеш значень Redis, записи якого інвалідує сам сервер.
+
+    Кеш зберігає сирі значення за упакованими ключами. До відстеження можна
+    підключити й інші кеші з упакованими ключами Redis (attach) - їх записи
+    видаляються за тими самими повідомленнями.
+
+    Поки з'єднання відстеження не встановлене, кеш не використовується
+    (tracks повертає False). При розриві з'єднання всі локальні записи
+    видаляються, адже повідомлення за цей час могли бути втрачені.
+
+    Attributes:
+        prefixes: Префікси ключів, що відстежуються
+        cache: Кеш сирих значень за упакованими ключами
+        invalidations: Кількість отриманих повідомлень про інвалідацію
+        reconnects: Кількість повторних підключень після розриву з'єднання
+    """
+
+    __slots__ = (
+        "prefixes",
+        "cache",
+        "invalidations",
+        "reconnects",
+        "_client",
+        "_caches",
+        "_connection",
+        "_task",
+    )
+
+    def __init__(
+        self,
+        client: Redis,
+        prefixes: Sequence[str],
+        cache: TTLCache[str, Any],
+    ) -> None:
+        """
+        Ініціалізує відстеження без встановленого з'єднання.
+
+        Args:
+            client: Асинхронний клієнт Redis, з пулу якого беруться параметри з'єднання
+            prefixes: Префікси ключів, що відстежуються (разом з розділювачем)
+            cache: Кеш сирих значень за упакованими ключами
+        """
+        self.prefixes = tuple(prefixes)
+        self.cache = cache
+        self.invalidations = 0
+        self.reconnects = 0
+        self._client = client
+        self._caches: list[TTLCache[str, Any]] = [cache]
+        self._connection: Optional[AbstractConnection] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def active(self) -> bool:
+        """
+        Повертає True, якщо з'єднання відстеження встановлене.
+        """
+        return self._connection is not None
+
+    def attach(self, cache: TTLCache[str, Any]) -> None:
+        """
+        Підключає до відстеження додатковий кеш з упакованими ключами Redis.
+
+        Args:
+            cache: Кеш, записи якого видаляються за повідомленнями сервера
+        """
+        if cache not in self._caches:
+            self._caches.append(cache)
+
+    def tracks(self, key: str) -> bool:
+        """
+        Перевіряє, чи можна кешувати значення ключа локально.
+
+        Args:
+            key: Упакований ключ Redis
+
+        Returns:
+            True, якщо з'єднання встановлене і ключ має один з відстежуваних префіксів
+        """
+        return self._connection is not None and key.startswith(self.prefixes)
+
+    def invalidate(self, keys: Optional[Sequence[Any]]) -> None:
+        """
+        Видаляє записи з усіх підключених кешів.
+
+        Args:
+            keys: Упаковані ключі (рядки або байти) або None, щоб очистити кеші повністю
+        """
+        self.invalidations += 1
+        if keys is None:
+            for cache in self._caches:
+                cache.clear()
+            return
+        for key in keys:
+            name: str = key.decode() if isinstance(key, bytes) else key
+            for cache in self._caches:
+                cache.pop(name)
+
+    async def start(self) -> None:
+        """
+        Запускає фонове отримання повідомлень про інвалідацію.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Зупиняє відстеження та закриває його з'єднання.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._disconnect()
+
+    async def _run(self) -> None:
+        """
+        Підтримує з'єднання відстеження та обробляє повідомлення сервера.
+
+        Після розриву з'єднання кеші очищуються, а підключення повторюється.
+        """
+        while True:
+            try:
+                connection: AbstractConnection = await self._connect()
+                while True:
+                    # Повідомлення обробляє _on_push, встановлений для парсера
+                    await connection.read_response(push_request=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Redis client tracking connection lost")
+            await self._disconnect()
+            self.reconnects += 1
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _connect(self) -> AbstractConnection:
+        """
+        Встановлює з'єднання RESP3 та вмикає для нього відстеження ключів.
+
+        Returns:
+            Встановлене з'єднання
+        """
+        pool = self._client.connection_pool
+        kwargs: dict[str, Any] = {
+            **pool.connection_kwargs,
+            "protocol": 3,
+            "parser_class": _AsyncRESP3Parser,
+            "socket_timeout": None,
+        }
+        if issubclass(pool.connection_class, Connection):
+            # З'єднання довго мовчить, тож розрив TCP виявляє keepalive
+            kwargs["socket_keepalive"] = True
+        connection: AbstractConnection = pool.connection_class(**kwargs)
+        args: list[str] = ["CLIENT", "TRACKING", "ON", "BCAST"]
+        for prefix in self.prefixes:
+            args.extend(("PREFIX", prefix))
+        try:
+            await connection.connect()  # type: ignore[no-untyped-call]
+            await connection.send_command(*args)
+            await connection.read_response()
+        except BaseException:
+            await connection.disconnect(nowait=True)
+            raise
+        # noinspection PyProtectedMember
+        parser: Any = getattr(connection, "_parser", None)
+        if not isinstance(parser, _AsyncRESP3Parser):
+            await connection.disconnect(nowait=True)
+            raise RuntimeError(f"Unexpected Redis connection parser: {type(parser).__name__}")
+        cast(_AsyncRESP3Parser, parser).set_invalidation_push_handler(  # type: ignore[no-untyped-call]
+            self._on_push
+        )
+        # Значення, закешовані до встановлення з'єднання, могли застаріти
+        self.invalidate(None)
+        self._connection = connection
+        return connection
+
+    async def _disconnect(self) -> None:
+        """
+        Закриває з'єднання відстеження та очищує кеші.
+        """
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        self.invalidate(None)
+        await connection.disconnect(nowait=True)
+
+    async def _on_push(self, message: list[Any]) -> None:
+        """
+        Обробляє повідомлення про інвалідацію.
+
+        Args:
+            message: Повідомлення сервера ["invalidate", ключі або None]
+        """
+        self.invalidate(message[1])
@@ -1,5 +1,6 @@
 from .context import SQLSessionContext
 from .repositories import Repository
+from .scope import SQLSessionScope
 from .uow import UoW
 
-__all__ = ["Repository", "UoW", "SQLSessionContext"]
+__all__ = ["Repository", "UoW", "SQLSessionContext", "SQLSessionScope"]
@@ -1,10 +1,12 @@
 import asyncio
 from types import TracebackType
-from typing import Optional
+from typing import Any, ClassVar, Hashable, Iterable, Optional, cast
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from .repositories import Repository
+from .routing import CONSISTENCY_INFO, ROUTER_INFO, ReplicaRouter
+from .transaction import DEFERRED_COMMIT_INFO
 from .uow import UoW
 
 
@@ -13,39 +15,159 @@ class SQLSessionContext:
     Контекст сесії SQL для керування з'єднанням з базою даних.
     
     Цей клас реалізує асинхронний контекстний менеджер для безпечної роботи
-    з базою даних. Він автоматично створює сесію при вході в контекст
-    та закриває її при виході, навіть у випадку виникнення винятків.
+    з базою даних. Сесія створюється ліниво - лише при першому зверненні
+    репозиторію або UoW до бази даних, тож контекст, в якому запити не
+    виконувалися (наприклад, при влучанні в кеш), не створює жодних об'єктів
+    SQLAlchemy. Сесія закривається при виході з контексту, навіть у випадку
+    виникнення винятків.
+    
+    Якщо пул сесій налаштовано з репліками, контекст у режимі лише читання
+    (read_only) створює сесію на одній з реплік. Ключі узгодженості (keys)
+    визначають, які дані читає або записує контекст: після запису з ключем
+    читання з тим самим ключем деякий час виконуються на основному сервері.
+    
+    У транзакційному режимі (transaction) записи репозиторіїв та UoW лише
+    надсилаються до бази даних (flush), а контекст виконує один commit при
+    успішному виході. Якщо блок завершується винятком одного з типів
+    rollback_on (за замовчуванням - будь-яким), усі зміни контексту
+    скасовуються; виняток інших типів не скасовує вже зроблених змін.
+    Частину змін можна скасувати окремо через точки збереження (uow.savepoint).
     
     Приклад використання:
         async with SQLSessionContext(session_pool) as (repo, uow):
             user = await repo.users.get_by_id(user_id)
             user.name = "Нове ім'я"
             await uow.commit()
+            
+        async with SQLSessionContext(session_pool, read_only=True, keys=(telegram_id,)) as (
+            repo,
+            uow,
+        ):
+            user = await repo.users.by_tg_id(telegram_id)
+            
+        async with SQLSessionContext(session_pool, transaction=True) as (repo, uow):
+            await repo.users.update(user_id=user_id, name="Нове ім'я")
+            await uow.delete(order)  # обидві зміни підтверджуються одним commit
     """
     
     # _session_pool - це "фабрика" для створення сесій бази даних
     # _session - це поточна активна сесія (з'єднання з базою даних)
+    # _read_only - чи можна виконати запити контексту на репліці
+    # _keys - ключі узгодженості даних, з якими працює контекст
+    # _transaction - чи підтверджує контекст усі записи одним commit при виході
+    # _rollback_on - типи винятків, при яких зміни контексту скасовуються
+    # sessions_opened - кількість створених сесій (для моніторингу та перевірки лінивості)
     _session_pool: async_sessionmaker[AsyncSession]
     _session: Optional[AsyncSession]
+    _read_only: bool
+    _keys: tuple[Hashable, ...]
+    _replica: Optional[AsyncEngine]
+    _transaction: bool
+    _rollback_on: tuple[type[BaseException], ...]
+    sessions_opened: ClassVar[int] = 0
 
     # __slots__ - це оптимізація Python для зменшення використання пам'яті
-    __slots__ = ("_session_pool", "_session")
+    __slots__ = (
+        "_session_pool",
+        "_session",
+        "_read_only",
+        "_keys",
+        "_replica",
+        "_transaction",
+        "_rollback_on",
+    )
 
-    def __init__(self, session_pool: async_sessionmaker[AsyncSession]) -> None:
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        read_only: bool = False,
+        keys: Iterable[Hashable] = (),
+        transaction: bool = False,
+        rollback_on: tuple[type[BaseException], ...] = (BaseException,),
+    ) -> None:
         """
         Ініціалізує контекст сесії SQL.
         
         Args:
             session_pool: Фабрика для створення асинхронних сесій SQLAlchemy.
+            read_only: Контекст лише читає дані, тож його можна виконати на репліці.
+            keys: Ключі узгодженості (наприклад, Telegram ID користувачів) даних,
+                  які контекст читає або записує.
+            transaction: Записи лише надсилаються до бази даних, а контекст
+                         підтверджує їх одним commit при виході.
+            rollback_on: Типи винятків, при яких транзакційний контекст
+                         скасовує зміни замість commit.
         """
         # Конструктор класу, який приймає пул сесій
         # Ми зберігаємо пул, але не створюємо сесію одразу
         self._session_pool = session_pool
         self._session = None
+        self._read_only = read_only
+        self._keys = tuple(keys)
+        self._replica = None
+        self._transaction = transaction
+        self._rollback_on = rollback_on
+
+    @property
+    def session(self) -> AsyncSession:
+        """
+        Повертає сесію контексту, створюючи її при першому зверненні.
+        
+        Returns:
+            Асинхронна сесія SQLAlchemy
+        """
+        if self._session is None:
+            self._session = self._create_session()
+            if self._transaction:
+                self._session.info[DEFERRED_COMMIT_INFO] = True
+            SQLSessionContext.sessions_opened += 1
+        return self._session
+
+    @property
+    def opened(self) -> bool:
+        """
+        Повертає True, якщо сесію контексту вже створено.
+        """
+        return self._session is not None
+
+    def add_keys(self, keys: Iterable[Hashable]) -> None:
+        """
+        Додає ключі узгодженості до контексту, зокрема до вже створеної сесії.
+        
+        Використовується, коли один контекст обслуговує кілька операцій
+        з різними даними (наприклад, спільна сесія оновлення).
+        
+        Args:
+            keys: Ключі узгодженості даних, які контекст записуватиме
+        """
+        added: tuple[Hashable, ...] = tuple(key for key in keys if key not in self._keys)
+        if not added:
+            return
+        self._keys += added
+        if self._session is not None and CONSISTENCY_INFO in self._session.info:
+            self._session.info[CONSISTENCY_INFO] = self._keys
+
+    def _create_session(self) -> AsyncSession:
+        """
+        Створює сесію на репліці або на основному сервері.
+        
+        Returns:
+            Асинхронна сесія SQLAlchemy
+        """
+        info: dict[str, Any] = self._session_pool.kw.get("info") or {}
+        router: Optional[ReplicaRouter] = info.get(ROUTER_INFO)
+        if router is None:
+            return self._session_pool()
+        if self._read_only:
+            self._replica = router.choose(self._keys)
+            if self._replica is not None:
+                return self._session_pool(bind=self._replica)
+        # Записи з ключами відкривають вікно узгодженості після commit
+        return self._session_pool(info={CONSISTENCY_INFO: self._keys})
 
     async def __aenter__(self) -> tuple[Repository, UoW]:
         """
-        Створює нову сесію та повертає репозиторій і UoW.
+        Повертає репозиторій і UoW, які створять сесію при першому запиті.
         
         Returns:
             Кортеж з двох об'єктів:
@@ -55,13 +177,22 @@ class SQLSessionContext:
         # Цей метод викликається, коли ми входимо в блок "async with"
         # Наприклад: async with SQLSessionContext(...) as (repo, uow):
         
-        # Створюємо нову сесію з пулу
-        self._session = await self._session_pool().__aenter__()
+        # Сесію не створюємо одразу: репозиторій та UoW отримують функцію,
+        # яка створить її при першому зверненні до бази даних
         
         # Повертаємо два об'єкти:
         # 1. Repository - для отримання даних з бази (SELECT запити)
         # 2. UoW (Unit of Work) - для збереження змін (INSERT, UPDATE, DELETE)
-        return Repository(session=self._session), UoW(session=self._session)
+        return Repository(session=self._get_session), UoW(session=self._get_session)
+
+    def _get_session(self) -> AsyncSession:
+        """
+        Функція-джерело сесії для репозиторіїв та UoW.
+        
+        Returns:
+            Асинхронна сесія SQLAlchemy
+        """
+        return self.session
 
     async def __aexit__(
         self,
@@ -80,20 +211,42 @@ class SQLSessionContext:
         # Цей метод викликається, коли ми виходимо з блоку "async with"
         # Він відповідає за закриття сесії та звільнення ресурсів
         
-        # Якщо сесія не була створена, нічого не робимо
+        # Якщо сесія не була створена (запитів не було), нічого не робимо
         if self._session is None:
             return
             
-        # Створюємо асинхронну задачу для закриття сесії
-        # Це дозволяє не блокувати основний потік виконання
-        task: asyncio.Task[None] = asyncio.create_task(self._session.close())
-        
-        # asyncio.shield захищає задачу від скасування
-        # Це гарантує, що сесія буде закрита навіть при помилках
-        await asyncio.shield(task)
+        # Репліка з помилкою з'єднання тимчасово виключається з розподілу читань
+        if self._replica is not None and exc_value is not None:
+            router: ReplicaRouter = self._session_pool.kw["info"][ROUTER_INFO]
+            router.report_error(self._replica, exc_value)
+            
+        try:
+            if self._transaction:
+                await self._finish(exc_value)
+        finally:
+            # Створюємо асинхронну задачу для закриття сесії
+            # Це дозволяє не блокувати основний потік виконання
+            task: asyncio.Task[None] = asyncio.create_task(self._session.close())
+            
+            # asyncio.shield захищає задачу від скасування
+            # Це гарантує, що сесія буде закрита навіть при помилках
+            await asyncio.shield(task)
+            
+            # Очищаємо посилання на сесію
+            self._session = None
+
+    async def _finish(self, exc_value: Optional[BaseException]) -> None:
+        """
+        Завершує транзакцію контексту: один commit або скасування всіх змін.
         
-        # Очищаємо посилання на сесію
-        self._session = None
+        Args:
+            exc_value: Виняток, з яким завершився блок контексту, або None
+        """
+        session: AsyncSession = cast(AsyncSession, self._session)
+        if exc_value is not None and isinstance(exc_value, self._rollback_on):
+            await session.rollback()
+        elif session.in_transaction():
+            await session.commit()
 
 # Приклад використання (не є частиною файлу):
 #
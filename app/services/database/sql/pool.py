@@ -0,0 +1,415 @@
+"""
+Модуль з пулом з'єднань SQLAlchemy, завантаженість якого можна відстежувати.
+
+Розмір пулу (pool_size, max_overflow, pool_timeout) зазвичай підбирають
+навмання, а про помилку дізнаються лише з TimeoutError під навантаженням.
+InstrumentedQueuePool рахує видачі з'єднань, очікування вільного з'єднання,
+використання додаткових з'єднань та тайм-аути і періодично записує ці
+метрики в логи. Необов'язковий PoolTuner за тими самими спостереженнями
+змінює межу додаткових з'єднань (max_overflow) у заданих межах.
+"""
+
+from __future__ import annotations
+
+from time import monotonic
+from typing import Any, Final, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from app.utils.logging import database as logger
+
+# Частка, на яку зменшується межа додаткових з'єднань при зростанні затримки бази даних
+_DECREASE_FACTOR: Final[float] = 0.25
+# Множник, на який базова затримка може зрости за одне вікно спостережень:
+# базова затримка повільно підлаштовується під зміну характеру запитів
+_BASELINE_DRIFT: Final[float] = 1.05
+# Кількість спокійних вікон поспіль, після яких межа зменшується на одне з'єднання
+_QUIET_WINDOWS: Final[int] = 3
+
+
+class PoolTuner:
+    """
+    Політика автоматичного налаштування межі додаткових з'єднань пулу.
+
+    Затримкою бази даних вважається середній час, протягом якого сесії
+    утримують з'єднання. Наприкінці кожного вікна спостережень межа:
+    - зменшується, якщо затримка перевищила базову в latency_tolerance разів:
+      база даних перевантажена, і нові з'єднання лише подовжать чергу на сервері;
+    - збільшується, якщо запити чекали на з'єднання в середньому довше
+      за target_wait або не дочекалися його;
+    - поступово зменшується на одне з'єднання, якщо кілька вікон поспіль
+      очікувань не було, а додаткові з'єднання не використовувалися повністю.
+
+    Attributes:
+        min_overflow: Найменша межа додаткових з'єднань
+        max_overflow: Найбільша межа додаткових з'єднань
+        target_wait: Допустимий середній час очікування з'єднання (в секундах)
+        latency_tolerance: Допустиме зростання затримки відносно базової (у разах)
+        interval: Тривалість вікна спостережень (в секундах)
+        baseline: Базова (найменша нещодавня) затримка бази даних (в секундах)
+    """
+
+    __slots__ = (
+        "min_overflow",
+        "max_overflow",
+        "target_wait",
+        "latency_tolerance",
+        "interval",
+        "baseline",
+        "_quiet",
+    )
+
+    def __init__(
+        self,
+        min_overflow: int,
+        max_overflow: int,
+        target_wait: float,
+        latency_tolerance: float,
+        interval: float,
+    ) -> None:
+        """
+        Ініціалізує політику без базової затримки.
+
+        Args:
+            min_overflow: Найменша межа додаткових з'єднань
+            max_overflow: Найбільша межа додаткових з'єднань
+            target_wait: Допустимий середній час очікування з'єднання (в секундах)
+            latency_tolerance: Допустиме зростання затримки відносно базової (у разах)
+            interval: Тривалість вікна спостережень (в секундах)
+        """
+        self.min_overflow = min_overflow
+        self.max_overflow = max(min_overflow, max_overflow)
+        self.target_wait = target_wait
+        self.latency_tolerance = latency_tolerance
+        self.interval = interval
+        self.baseline = 0.0
+        # Кількість спокійних вікон поспіль
+        self._quiet = 0
+
+    def clamp(self, overflow: int) -> int:
+        """
+        Обмежує межу додаткових з'єднань налаштованими межами.
+
+        Args:
+            overflow: Межа додаткових з'єднань
+
+        Returns:
+            Межа в проміжку від min_overflow до max_overflow
+        """
+        return min(max(overflow, self.min_overflow), self.max_overflow)
+
+    def adjust(
+        self,
+        overflow: int,
+        pool_size: int,
+        window: PoolWindow,
+    ) -> int:
+        """
+        Обчислює нову межу додаткових з'єднань за спостереженнями вікна.
+
+        Args:
+            overflow: Поточна межа додаткових з'єднань
+            pool_size: Кількість постійних з'єднань пулу
+            window: Спостереження за вікно
+
+        Returns:
+            Нова межа додаткових з'єднань
+        """
+        latency: float = window.average_hold
+        congested: bool = False
+        if latency > 0:
+            congested = 0 < self.baseline * self.latency_tolerance < latency
+            self.baseline = (
+                latency if self.baseline == 0 else min(latency, self.baseline * _BASELINE_DRIFT)
+            )
+        quiet: bool = not window.waits and window.peak_overflow < overflow
+        self._quiet = self._quiet + 1 if quiet else 0
+        if congested:
+            overflow -= max(1, int(overflow * _DECREASE_FACTOR))
+        elif window.timeouts or window.average_wait > self.target_wait:
+            overflow += max(1, pool_size // 5)
+        elif self._quiet >= _QUIET_WINDOWS:
+            self._quiet = 0
+            overflow -= 1
+        return self.clamp(overflow)
+
+
+class PoolWindow:
+    """
+    Спостереження за пулом протягом одного вікна.
+
+    Attributes:
+        started: Момент початку вікна (monotonic)
+        checkouts: Кількість виданих з'єднань
+        waits: Кількість запитів, яким довелося чекати на вільне з'єднання
+        wait_time: Сумарний час очікування вільного з'єднання (в секундах)
+        timeouts: Кількість запитів, що не дочекалися вільного з'єднання
+        returns: Кількість повернутих з'єднань
+        hold_time: Сумарний час утримання повернутих з'єднань (в секундах)
+        peak_overflow: Найбільша кількість одночасно відкритих додаткових з'єднань
+    """
+
+    __slots__ = (
+        "started",
+        "checkouts",
+        "waits",
+        "wait_time",
+        "timeouts",
+        "returns",
+        "hold_time",
+        "peak_overflow",
+    )
+
+    def __init__(self) -> None:
+        """
+        Починає нове вікно з нульовими лічильниками.
+        """
+        self.started = monotonic()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.returns = 0
+        self.hold_time = 0.0
+        self.peak_overflow = 0
+
+    @property
+    def average_wait(self) -> float:
+        """
+        Повертає середній час очікування вільного з'єднання серед запитів, що чекали.
+        """
+        return self.wait_time / self.waits if self.waits else 0.0
+
+    @property
+    def average_hold(self) -> float:
+        """
+        Повертає середній час утримання з'єднання сесією.
+        """
+        return self.hold_time / self.returns if self.returns else 0.0
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Асинхронний пул з'єднань SQLAlchemy з лічильниками завантаженості.
+
+    Пул створюється двигуном SQLAlchemy (poolclass), тож інтервал запису
+    метрик та політика налаштування задаються методом configure після
+    створення двигуна. Лічильники та налаштування переходять до нового пулу,
+    який створює engine.dispose().
+
+    Attributes:
+        checkouts: Кількість виданих з'єднань
+        waits: Кількість запитів, яким довелося чекати на вільне з'єднання
+        wait_time: Сумарний час очікування вільного з'єднання (в секундах)
+        max_wait: Найдовше очікування вільного з'єднання (в секундах)
+        timeouts: Кількість запитів, що не дочекалися вільного з'єднання
+        peak_in_use: Найбільша кількість одночасно зайнятих з'єднань
+        peak_overflow: Найбільша кількість одночасно відкритих додаткових з'єднань
+        metrics_interval: Інтервал запису метрик у логи (в секундах, 0 - не записувати)
+        tuner: Політика автоматичного налаштування межі додаткових з'єднань або None
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Ініціалізує пул з нульовими лічильниками.
+
+        Args:
+            *args: Позиційні параметри QueuePool (функція створення з'єднань)
+            **kwargs: Параметри QueuePool (pool_size, max_overflow, timeout та ін.)
+        """
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+        self.metrics_interval = 0.0
+        self.tuner: Optional[PoolTuner] = None
+        self._window = PoolWindow()
+        self._logged_at = monotonic()
+        # Момент видачі кожного зайнятого з'єднання
+        self._checked_out_at: dict[ConnectionPoolEntry, float] = {}
+
+    def configure(self, metrics_interval: float, tuner: Optional[PoolTuner] = None) -> None:
+        """
+        Задає інтервал запису метрик та політику налаштування пулу.
+
+        Args:
+            metrics_interval: Інтервал запису метрик у логи (в секундах, 0 - не записувати)
+            tuner: Політика автоматичного налаштування межі додаткових з'єднань
+        """
+        self.metrics_interval = metrics_interval
+        self.tuner = tuner
+        if tuner is not None:
+            self._max_overflow = tuner.clamp(self._max_overflow)
+
+    @property
+    def in_use(self) -> int:
+        """
+        Повертає кількість зайнятих з'єднань.
+        """
+        return self.checkedout()
+
+    @property
+    def overflow_in_use(self) -> int:
+        """
+        Повертає кількість відкритих додаткових з'єднань понад pool_size.
+        """
+        return max(0, self.overflow())
+
+    @property
+    def max_overflow(self) -> int:
+        """
+        Повертає поточну межу додаткових з'єднань.
+        """
+        return self._max_overflow
+
+    @property
+    def saturation(self) -> float:
+        """
+        Повертає частку зайнятих з'єднань від максимальної кількості.
+        """
+        # Від'ємна межа означає необмежену кількість додаткових з'єднань
+        return self.in_use / (self.size() + max(0, self._max_overflow))
+
+    @property
+    def average_wait(self) -> float:
+        """
+        Повертає середній час очікування вільного з'єднання серед запитів, що чекали.
+        """
+        return self.wait_time / self.waits if self.waits else 0.0
+
+    def metrics(self) -> dict[str, float]:
+        """
+        Повертає знімок метрик пулу.
+
+        Returns:
+            Словник з назвами та значеннями метрик
+        """
+        return {
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "wait_time": self.wait_time,
+            "average_wait": self.average_wait,
+            "max_wait": self.max_wait,
+            "timeouts": self.timeouts,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "overflow_in_use": self.overflow_in_use,
+            "peak_overflow": self.peak_overflow,
+            "max_overflow": self._max_overflow,
+            "saturation": self.saturation,
+        }
+
+    def recreate(self) -> InstrumentedQueuePool:
+        """
+        Створює новий пул з тими самими параметрами, лічильниками та налаштуваннями.
+
+        Returns:
+            Новий пул з'єднань
+        """
+        pool: InstrumentedQueuePool = super().recreate()  # type: ignore[assignment]
+        pool.checkouts = self.checkouts
+        pool.waits = self.waits
+        pool.wait_time = self.wait_time
+        pool.max_wait = self.max_wait
+        pool.timeouts = self.timeouts
+        pool.peak_in_use = self.peak_in_use
+        pool.peak_overflow = self.peak_overflow
+        pool.configure(metrics_interval=self.metrics_interval, tuner=self.tuner)
+        return pool
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        """
+        Видає з'єднання з пулу, враховуючи очікування в лічильниках.
+
+        Returns:
+            Запис пулу з видачею з'єднання
+
+        Raises:
+            sqlalchemy.exc.TimeoutError: Якщо вільне з'єднання не з'явилося за pool_timeout секунд
+        """
+        window: PoolWindow = self._window
+        record: ConnectionPoolEntry
+        if self._max_overflow < 0 or self.checkedout() < self.size() + self._max_overflow:
+            record = super()._do_get()
+        else:
+            # Усі з'єднання зайняті: запит стає в чергу
+            self.waits += 1
+            window.waits += 1
+            start: float = monotonic()
+            try:
+                record = super()._do_get()
+            except exc.TimeoutError:
+                self.timeouts += 1
+                window.timeouts += 1
+                logger.warning(
+                    "SQL pool exhausted: no connection within %ss (%d in use, max overflow %d)",
+                    self._timeout,
+                    self.in_use,
+                    self._max_overflow,
+                )
+                raise
+            finally:
+                waited: float = monotonic() - start
+                self.wait_time += waited
+                window.wait_time += waited
+                self.max_wait = max(self.max_wait, waited)
+        now: float = monotonic()
+        self._checked_out_at[record] = now
+        self.checkouts += 1
+        window.checkouts += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        self.peak_overflow = max(self.peak_overflow, self.overflow_in_use)
+        window.peak_overflow = max(window.peak_overflow, self.overflow_in_use)
+        self._observe(now)
+        return record
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        """
+        Повертає з'єднання до пулу, враховуючи час його утримання.
+
+        Args:
+            record: Запис пулу з поверненим з'єднанням
+        """
+        checked_out_at: Optional[float] = self._checked_out_at.pop(record, None)
+        if checked_out_at is not None:
+            self._window.returns += 1
+            self._window.hold_time += monotonic() - checked_out_at
+        super()._do_return_conn(record)
+
+    def _observe(self, now: float) -> None:
+        """
+        Записує метрики в логи та завершує вікно налаштування, якщо настав час.
+
+        Args:
+            now: Поточний момент (monotonic)
+        """
+        if self.metrics_interval and now - self._logged_at >= self.metrics_interval:
+            self._logged_at = now
+            logger.info(
+                "SQL pool: %s",
+                ", ".join(f"{name}={value:g}" for name, value in self.metrics().items()),
+            )
+        tuner: Optional[PoolTuner] = self.tuner
+        if tuner is None or now - self._window.started < tuner.interval:
+            return
+        window: PoolWindow = self._window
+        self._window = PoolWindow()
+        overflow: int = tuner.adjust(self._max_overflow, self.size(), window)
+        if overflow != self._max_overflow:
+            logger.info(
+                "SQL pool max overflow %d -> %d (average wait %.3fs, average hold %.3fs, "
+                "baseline %.3fs, timeouts %d)",
+                self._max_overflow,
+                overflow,
+                window.average_wait,
+                window.average_hold,
+                tuner.baseline,
+                window.timeouts,
+            )
+            # Зайві додаткові з'єднання закриваються пулом при поверненні
+            self._max_overflow = overflow
@@ -1,4 +1,5 @@
 from .general import Repository
+from .raw_users import RawUsersRepository
 from .users import UsersRepository
 
-__all__ = ["Repository", "UsersRepository"]
+__all__ = ["RawUsersRepository", "Repository", "UsersRepository"]
@@ -1,15 +1,32 @@
 from __future__ import annotations
 
-from typing import Any, Optional, TypeVar, Union, cast
+from typing import Any, AsyncIterator, Final, Optional, Sequence, TypeVar, Union, cast
 
-from sqlalchemy import ColumnExpressionArgument, delete, select, update
+from sqlalchemy import (
+    ColumnExpressionArgument,
+    Row,
+    Select,
+    delete,
+    inspect,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import InstrumentedAttribute
 
-from ..uow import UoW
+from app.models.sql.base import Base
+
+from ..bulk import DEFAULT_BATCH_SIZE, BulkResult, BulkSource, copy_upsert
+from ..transaction import commit_or_flush, is_deferred
+from ..uow import SessionSource, UoW, resolve_session
 
 # Типовий параметр для моделей даних
 T = TypeVar("T", bound=Any)
+# Розмір порції записів за замовчуванням при потоковому читанні
+DEFAULT_CHUNK_SIZE: Final[int] = 1000
+# Кількість спроб вставки, якщо запис, що спричинив конфлікт, вже видалено
+INSERT_ATTEMPTS: Final[int] = 3
 # Тип для колонок SQL-запитів
 ColumnClauseType = Union[
     type[T],
@@ -25,19 +42,30 @@ class BaseRepository:
     Надає основні методи для отримання, оновлення та видалення даних.
     Використовує SQLAlchemy для взаємодії з базою даних.
     """
-    session: AsyncSession
+    _session_source: SessionSource
     uow: UoW
 
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: SessionSource) -> None:
         """
         Ініціалізує репозиторій з асинхронною сесією SQLAlchemy.
         
         Args:
             session: Асинхронна сесія SQLAlchemy для виконання запитів до бази даних
+                     або функція, яка створює її при першому зверненні
         """
-        self.session = session
+        self._session_source = session
         self.uow = UoW(session=session)
 
+    @property
+    def session(self) -> AsyncSession:
+        """
+        Повертає сесію, створюючи її при першому зверненні.
+        
+        Returns:
+            Асинхронна сесія SQLAlchemy
+        """
+        return resolve_session(self._session_source)
+
     async def _get(
         self,
         model: ColumnClauseType[T],
@@ -72,6 +100,103 @@ class BaseRepository:
         """
         return list(await self.session.scalars(select(model).where(*conditions)))
 
+    async def _iterate(
+        self,
+        model: type[T],
+        *conditions: ColumnExpressionArgument[Any],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[Sequence[T]]:
+        """
+        Потоково читає записи порціями з пагінацією за первинним ключем (keyset).
+        
+        Кожна порція - окремий запит WHERE id > <останній id> ORDER BY id LIMIT n,
+        який використовує індекс первинного ключа і не сповільнюється зі зсувом,
+        як OFFSET. У пам'яті одночасно перебуває лише одна порція: карта
+        ідентичності сесії тримає незмінені об'єкти за слабкими посиланнями,
+        тож об'єкти оброблених порцій звільняються, щойно на них не лишається
+        посилань. Записи, вставлені під час читання, потрапляють до результату,
+        якщо їх id більший за вже прочитані.
+        
+        Пагінація за ключем не потребує знімка даних, спільного для всіх порцій,
+        тому після кожного запиту транзакція сесії завершується (commit) і
+        з'єднання повертається до пулу, поки викликач обробляє порцію. Лише
+        у транзакційному режимі (commit виконує контекст) транзакція
+        залишається відкритою до виходу з контексту.
+        
+        Args:
+            model: Модель даних для вибірки
+            conditions: Умови фільтрації запитів (WHERE)
+            chunk_size: Кількість записів у порції
+            
+        Yields:
+            Порції об'єктів моделі, впорядковані за первинним ключем
+        """
+        key: InstrumentedAttribute[Any] = _primary_key(model)
+        query: Select[tuple[T]] = select(model).where(*conditions).order_by(key).limit(chunk_size)
+        chunk: Sequence[T] = (await self.session.scalars(query)).all()
+        while chunk:
+            await self._end_reads()
+            last: Any = getattr(chunk[-1], key.key)
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            chunk = (await self.session.scalars(query.where(key > last))).all()
+        await self._end_reads()
+
+    async def _iterate_columns(
+        self,
+        columns: Sequence[InstrumentedAttribute[Any]],
+        *conditions: ColumnExpressionArgument[Any],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[Sequence[Row[Any]]]:
+        """
+        Потоково читає лише вказані колонки порціями з пагінацією за первинним ключем.
+        
+        Працює так само, як _iterate, але не створює ORM-об'єктів: кожен рядок
+        містить лише вказані колонки. Якщо первинного ключа серед них немає,
+        він додається останньою колонкою рядка - за ним обчислюється наступна порція.
+        
+        Args:
+            columns: Атрибути моделі, які потрібно прочитати
+            conditions: Умови фільтрації запитів (WHERE)
+            chunk_size: Кількість рядків у порції
+            
+        Yields:
+            Порції рядків, впорядковані за первинним ключем
+            
+        Raises:
+            ValueError: Якщо не вказано жодної колонки
+        """
+        if not columns:
+            raise ValueError("At least one column is required")
+        key: InstrumentedAttribute[Any] = _primary_key(cast(type[Any], columns[0].class_))
+        selected: list[InstrumentedAttribute[Any]] = list(columns)
+        if not any(column is key for column in selected):
+            selected.append(key)
+        index: int = next(i for i, column in enumerate(selected) if column is key)
+        query: Select[Any] = select(*selected).where(*conditions).order_by(key).limit(chunk_size)
+        chunk: Sequence[Row[Any]] = (await self.session.execute(query)).all()
+        while chunk:
+            await self._end_reads()
+            last: Any = chunk[-1][index]
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            chunk = (await self.session.execute(query.where(key > last))).all()
+        await self._end_reads()
+
+    async def _end_reads(self) -> None:
+        """
+        Завершує транзакцію, розпочату читанням, і повертає з'єднання до пулу.
+        
+        Записи поза транзакційним режимом вже підтверджені, тож commit лише
+        завершує транзакцію читань; на відміну від rollback, він не робить
+        застарілими прочитані об'єкти (expire_on_commit=False). У транзакційному
+        режимі транзакцію завершує контекст сесії.
+        """
+        if not is_deferred(self.session) and self.session.in_transaction():
+            await self.session.commit()
+
     async def _update(
         self,
         model: ColumnClauseType[T],
@@ -104,10 +229,109 @@ class BaseRepository:
             
         # Виконуємо запит та зберігаємо зміни
         result = await self.session.execute(query)
-        await self.session.commit()
+        await commit_or_flush(self.session)
         
         return result.scalar_one_or_none() if load_result else None
 
+    async def _update_many(self, model: type[T], values: list[dict[str, Any]]) -> None:
+        """
+        Оновлює багато записів за первинним ключем одним пакетом.
+        
+        Кожен словник має містити первинний ключ та поля для оновлення.
+        SQLAlchemy групує словники з однаковим набором полів і виконує
+        для кожної групи один UPDATE через executemany.
+        
+        Args:
+            model: Модель даних для оновлення
+            values: Список словників з первинним ключем та новими значеннями полів
+        """
+        if not values:
+            return
+        await self.session.execute(update(model), values)
+        await commit_or_flush(self.session)
+
+    async def _get_or_insert(
+        self,
+        model: type[T],
+        index_elements: list[InstrumentedAttribute[Any]],
+        **values: Any,
+    ) -> tuple[T, bool]:
+        """
+        Вставляє запис, якщо запису з таким унікальним ключем ще немає, інакше повертає наявний.
+        
+        Виконує INSERT ... ON CONFLICT (...) DO NOTHING RETURNING: наявний запис
+        не змінюється (без нової версії рядка, блокування та запису в WAL),
+        а за конфлікту він читається окремим SELECT за значеннями ключа.
+        Конкурентні вставки одного запису не завершуються IntegrityError.
+        Якщо запис, що спричинив конфлікт, видалено до SELECT, вставка
+        повторюється.
+        
+        Args:
+            model: Модель даних для вставки
+            index_elements: Колонки унікального обмеження для ON CONFLICT
+            values: Пари ключ-значення для нового запису (включно з колонками ключа)
+        
+        Returns:
+            Кортеж із запису (вставленого або наявного) та прапорця,
+            чи був запис щойно створений
+            
+        Raises:
+            LookupError: Запис з цим ключем не вдалося ні вставити, ні прочитати
+        """
+        query = (
+            insert(model)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=index_elements)
+            .returning(model)
+        )
+        for _ in range(INSERT_ATTEMPTS):
+            instance: Optional[T] = (await self.session.execute(query)).scalar_one_or_none()
+            if instance is not None:
+                await commit_or_flush(self.session)
+                return instance, True
+            
+            # Запис з цим ключем вже існує (або щойно вставлений іншою транзакцією)
+            existing: Optional[T] = await self._get(
+                model,
+                *(column == values[column.key] for column in index_elements),
+            )
+            if existing is not None:
+                return existing, False
+        raise LookupError(f"Unable to insert or read {model.__name__} by its unique key")
+
+    async def _copy_upsert(
+        self,
+        model: type[Base],
+        items: BulkSource,
+        index_elements: Sequence[str],
+        columns: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> BulkResult:
+        """
+        Масово вставляє або оновлює записи через COPY у тимчасову таблицю.
+        
+        Args:
+            model: Модель цільової таблиці
+            items: DTO або ORM-об'єкти (звичайний або асинхронний ітератор)
+            index_elements: Колонки унікального обмеження для ON CONFLICT
+            columns: Колонки, що записуються (за замовчуванням - без серверних значень)
+            update_columns: Колонки наявного запису, що перезаписуються
+            batch_size: Кількість записів в одному пакеті COPY
+            
+        Returns:
+            Результат запису з кількістю рядків і швидкістю
+        """
+        return await copy_upsert(
+            self.session,
+            model,
+            items,
+            index_elements=index_elements,
+            columns=columns,
+            update_columns=update_columns,
+            batch_size=batch_size,
+        )
+
     async def _delete(
         self,
         model: ColumnClauseType[T],
@@ -124,5 +348,27 @@ class BaseRepository:
             True, якщо був видалений хоча б один запис, інакше False
         """
         result = await self.session.execute(delete(model).where(*conditions))
-        await self.session.commit()
+        await commit_or_flush(self.session)
         return cast(bool, result.rowcount > 0)
+
+
+def _primary_key(model: type[Any]) -> InstrumentedAttribute[Any]:
+    """
+    Повертає атрибут первинного ключа моделі для пагінації за ключем.
+    
+    Args:
+        model: Модель даних з простим (не складеним) первинним ключем
+        
+    Returns:
+        Атрибут моделі, що відповідає первинному ключу
+        
+    Raises:
+        ValueError: Якщо первинний ключ моделі складений
+    """
+    mapper = inspect(model)
+    if len(mapper.primary_key) != 1:
+        raise ValueError(f"{model.__name__} must have a single-column primary key")
+    return cast(
+        InstrumentedAttribute[Any],
+        getattr(model, mapper.get_property_by_column(mapper.primary_key[0]).key),
+    )
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from sqlalchemy.ext.asyncio import AsyncSession
-
+from ..uow import SessionSource
 from .base import BaseRepository
+from .raw_users import RawUsersRepository
 from .users import UsersRepository
 
 
@@ -18,8 +18,10 @@ class Repository(BaseRepository):
     
     # Репозиторій для роботи з користувачами
     users: UsersRepository
+    # Репозиторій користувачів на підготовлених запитах asyncpg
+    raw_users: RawUsersRepository
 
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: SessionSource) -> None:
         """
         Ініціалізує головний репозиторій та всі підрепозиторії.
         
@@ -29,12 +31,14 @@ class Repository(BaseRepository):
         
         Args:
             session: Асинхронна сесія SQLAlchemy для взаємодії з базою даних
+                     або функція, яка створює її при першому зверненні
         """
         # Викликаємо конструктор базового класу, передаючи йому сесію
         super().__init__(session=session)
         
         # Ініціалізуємо репозиторій користувачів з тією ж сесією
         self.users = UsersRepository(session=session)
+        self.raw_users = RawUsersRepository(session=session)
         
         # Тут можна додати інші репозиторії, наприклад:
         # self.products = ProductsRepository(session=session)
@@ -0,0 +1,222 @@
+"""
+Модуль зі швидким репозиторієм користувачів на підготовлених запитах asyncpg.
+
+Найчастіші запити до користувачів (за Telegram ID, за ID, отримання або
+створення, оновлення полів) виконуються напряму на з'єднанні asyncpg, що
+лежить під сесією SQLAlchemy, без компіляції запитів ORM, карти ідентичності
+та перетворення ORM-моделі в DTO. Кожен запит готується на сервері один раз
+для з'єднання, а підготовлений запит зберігається в info з'єднання пулу
+та використовується повторно, доки з'єднання живе.
+
+Запити виконуються в межах тієї самої сесії, що й запити ORM: якщо сесія
+вже розпочала транзакцію, підготовлені запити виконуються в ній.
+
+За PgBouncer у режимі transaction pooling іменований підготовлений запит
+не переживає транзакцію, тому для сесій з прапорцем UNNAMED_STATEMENTS_INFO
+запити виконуються без збереження (неіменованими підготовленими запитами).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Final, Optional
+
+from asyncpg import Connection, InterfaceError, PostgresConnectionError, Record
+from asyncpg.prepared_stmt import PreparedStatement
+from sqlalchemy.pool import PoolProxiedConnection
+
+from app.models.dto.user import UserDto
+from app.models.sql import User
+
+from ..transaction import commit_or_flush, raw_connection
+from .base import INSERT_ATTEMPTS, BaseRepository
+
+# Ключ info з'єднання пулу з підготовленими запитами цього з'єднання
+STATEMENTS_INFO: Final[str] = "raw_users_statements"
+# Ключ Session.info з прапорцем виконання запитів без збереження підготовлених запитів
+UNNAMED_STATEMENTS_INFO: Final[str] = "unnamed_statements"
+
+# Колонки користувача, з яких складається UserDto
+_COLUMNS: Final[str] = "id, telegram_id, name, language, language_code, blocked_at"
+_BY_ID: Final[str] = f"SELECT {_COLUMNS} FROM users WHERE id = $1"
+_BY_TG_ID: Final[str] = f"SELECT {_COLUMNS} FROM users WHERE telegram_id = $1"
+# Наявний рядок не змінюється: за конфлікту запит не повертає рядків
+_INSERT: Final[str] = (
+    "INSERT INTO users (telegram_id, name, language, language_code) "
+    "VALUES ($1, $2, $3, $4) "
+    f"ON CONFLICT (telegram_id) DO NOTHING RETURNING {_COLUMNS}"
+)
+# Колонки, які можна оновлювати через update
+_UPDATABLE: Final[frozenset[str]] = frozenset(User.__table__.columns.keys()) - {"id"}
+
+
+class RawUsersRepository(BaseRepository):
+    """
+    Репозиторій користувачів на підготовлених запитах asyncpg.
+
+    Має ті самі методи, що й UsersRepository, але повертає одразу UserDto.
+    Рядки перетворюються в DTO без валідації: типи колонок asyncpg вже
+    збігаються з типами полів UserDto.
+    """
+
+    async def get(self, user_id: int) -> Optional[UserDto]:
+        """
+        Отримує користувача за його ID.
+
+        Args:
+            user_id: Унікальний ідентифікатор користувача
+
+        Returns:
+            DTO об'єкт користувача або None, якщо користувача не знайдено
+        """
+        record: Optional[Record] = await self._fetchrow(_BY_ID, user_id)
+        return None if record is None else _to_dto(record)
+
+    async def by_tg_id(self, telegram_id: int) -> Optional[UserDto]:
+        """
+        Отримує користувача за його Telegram ID.
+
+        Args:
+            telegram_id: ID користувача в Telegram
+
+        Returns:
+            DTO об'єкт користувача або None, якщо користувача не знайдено
+        """
+        record: Optional[Record] = await self._fetchrow(_BY_TG_ID, telegram_id)
+        return None if record is None else _to_dto(record)
+
+    async def get_or_create(
+        self,
+        telegram_id: int,
+        name: str,
+        language: str,
+        language_code: Optional[str],
+    ) -> tuple[UserDto, bool]:
+        """
+        Отримує користувача за Telegram ID або створює його, якщо його ще немає.
+
+        INSERT ... ON CONFLICT DO NOTHING не змінює наявний рядок; за конфлікту
+        користувач читається підготовленим запитом за Telegram ID. Якщо
+        користувача видалено до цього запиту, вставка повторюється.
+
+        Args:
+            telegram_id: ID користувача в Telegram
+            name: Ім'я нового користувача
+            language: Мова інтерфейсу нового користувача
+            language_code: Код мови користувача з Telegram
+
+        Returns:
+            Кортеж з DTO об'єкта користувача та прапорця, чи був він щойно створений
+
+        Raises:
+            LookupError: Користувача не вдалося ні створити, ні прочитати
+        """
+        for _ in range(INSERT_ATTEMPTS):
+            record: Optional[Record] = await self._fetchrow(
+                _INSERT,
+                telegram_id,
+                name,
+                language,
+                language_code,
+            )
+            if record is not None:
+                await commit_or_flush(self.session)
+                return _to_dto(record), True
+            # Конфлікт означає, що користувач існує, якщо його не видалили після вставки
+            record = await self._fetchrow(_BY_TG_ID, telegram_id)
+            if record is not None:
+                return _to_dto(record), False
+        raise LookupError(f"Unable to insert or read user {telegram_id}")
+
+    async def update(self, user_id: int, **kwargs: Any) -> None:
+        """
+        Оновлює дані користувача.
+
+        Для кожного набору полів готується окремий запит, тож часті оновлення
+        (наприклад, blocked_at) використовують вже підготовлений запит.
+
+        Args:
+            user_id: Унікальний ідентифікатор користувача
+            **kwargs: Поля та їх нові значення для оновлення
+
+        Raises:
+            ValueError: Якщо серед полів є такі, яких немає в таблиці користувачів
+        """
+        if not kwargs:
+            return
+        fields: list[str] = sorted(kwargs)
+        unknown: set[str] = set(fields).difference(_UPDATABLE)
+        if unknown:
+            raise ValueError(f"Unknown user columns: {', '.join(sorted(unknown))}")
+        assignments: str = ", ".join(
+            f"{field} = ${index}" for index, field in enumerate(fields, start=2)
+        )
+        await self._fetchrow(
+            f"UPDATE users SET {assignments} WHERE id = $1",
+            user_id,
+            *(kwargs[field] for field in fields),
+        )
+        await commit_or_flush(self.session)
+
+    async def _fetchrow(self, query: str, *args: Any) -> Optional[Record]:
+        """
+        Виконує підготовлений запит та повертає перший рядок результату.
+
+        Args:
+            query: Текст запиту з параметрами $1, $2, ...
+            *args: Значення параметрів
+
+        Returns:
+            Перший рядок результату або None, якщо запит не повернув рядків
+        """
+        connection, raw = await raw_connection(self.session)
+        try:
+            if self.session.info.get(UNNAMED_STATEMENTS_INFO):
+                driver: Connection = raw.driver_connection
+                return await driver.fetchrow(query, *args)
+            statement: PreparedStatement = await self._prepare(raw, query)
+            return await statement.fetchrow(*args)
+        except (InterfaceError, PostgresConnectionError, OSError):
+            # Пул SQLAlchemy не бачить помилок asyncpg, тож розірване з'єднання
+            # позначається недійсним вручну, щоб воно не повернулося до пулу
+            await connection.invalidate()
+            raise
+
+    @staticmethod
+    async def _prepare(raw: PoolProxiedConnection, query: str) -> PreparedStatement:
+        """
+        Повертає підготовлений запит з'єднання, готуючи його при першому зверненні.
+
+        Args:
+            raw: З'єднання пулу, під яким лежить з'єднання asyncpg
+            query: Текст запиту
+
+        Returns:
+            Підготовлений запит asyncpg
+        """
+        # info живе стільки, скільки саме з'єднання з базою даних
+        statements: dict[str, PreparedStatement] = raw.info.setdefault(STATEMENTS_INFO, {})
+        statement: Optional[PreparedStatement] = statements.get(query)
+        if statement is None:
+            driver: Connection = raw.driver_connection
+            statement = statements[query] = await driver.prepare(query)
+        return statement
+
+
+def _to_dto(record: Record) -> UserDto:
+    """
+    Створює DTO користувача з рядка результату без валідації.
+
+    Args:
+        record: Рядок з колонками користувача
+
+    Returns:
+        DTO об'єкт користувача
+    """
+    return UserDto.model_construct(
+        id=record["id"],
+        telegram_id=record["telegram_id"],
+        name=record["name"],
+        language=record["language"],
+        language_code=record["language_code"],
+        blocked_at=record["blocked_at"],
+    )
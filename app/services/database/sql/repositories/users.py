@@ -1,8 +1,13 @@
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Iterable, Optional, Sequence
+
+from sqlalchemy import BigInteger, ColumnExpressionArgument, Row, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import InstrumentedAttribute
 
 from app.models.sql import User
 
-from .base import BaseRepository
+from ..bulk import DEFAULT_BATCH_SIZE, BulkResult, BulkSource
+from .base import DEFAULT_CHUNK_SIZE, BaseRepository
 
 
 class UsersRepository(BaseRepository):
@@ -42,6 +47,149 @@ class UsersRepository(BaseRepository):
         # Шукаємо користувача за його Telegram ID замість звичайного ID
         return await self._get(User, User.telegram_id == telegram_id)
 
+    async def by_tg_ids(self, telegram_ids: Iterable[int]) -> list[User]:
+        """
+        Отримує користувачів за списком Telegram ID одним запитом.
+        
+        Список передається одним параметром-масивом (telegram_id = ANY(...)),
+        тому текст запиту не залежить від кількості ID.
+        
+        Args:
+            telegram_ids: ID користувачів в Telegram
+            
+        Returns:
+            Список знайдених користувачів (відсутні ID пропускаються)
+        """
+        ids = bindparam("telegram_ids", list(telegram_ids), type_=ARRAY(BigInteger))
+        return await self._get_many(User, User.telegram_id == any_(ids))
+
+    def iterate(
+        self,
+        *conditions: ColumnExpressionArgument[Any],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[Sequence[User]]:
+        """
+        Потоково перебирає користувачів порціями, не завантажуючи всю таблицю в пам'ять.
+        
+        Між порціями транзакція не утримується: з'єднання повертається до пулу,
+        поки обробляється порція (крім транзакційного режиму сесії).
+        
+        Args:
+            conditions: Умови фільтрації користувачів (WHERE)
+            chunk_size: Кількість користувачів у порції
+            
+        Returns:
+            Асинхронний ітератор порцій користувачів, впорядкованих за ID
+            
+        Приклад:
+            async for users in users_repo.iterate(User.blocked_at.is_(None)):
+                ...
+        """
+        return self._iterate(User, *conditions, chunk_size=chunk_size)
+
+    def iterate_columns(
+        self,
+        *columns: InstrumentedAttribute[Any],
+        conditions: Sequence[ColumnExpressionArgument[Any]] = (),
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[Sequence[Row[Any]]]:
+        """
+        Потоково перебирає лише вказані колонки користувачів без створення ORM-об'єктів.
+        
+        Args:
+            columns: Атрибути User, які потрібно прочитати
+            conditions: Умови фільтрації користувачів (WHERE)
+            chunk_size: Кількість рядків у порції
+            
+        Returns:
+            Асинхронний ітератор порцій рядків, впорядкованих за ID. Якщо User.id
+            немає серед колонок, він додається останньою колонкою рядка.
+            
+        Raises:
+            ValueError: Якщо не вказано жодної колонки
+            
+        Приклад:
+            async for rows in users_repo.iterate_columns(User.telegram_id, User.language):
+                for row in rows:
+                    print(row.telegram_id, row.language)
+        """
+        return self._iterate_columns(columns, *conditions, chunk_size=chunk_size)
+
+    async def get_or_create(
+        self,
+        telegram_id: int,
+        name: str,
+        language: str,
+        language_code: Optional[str],
+    ) -> tuple[User, bool]:
+        """
+        Отримує користувача за Telegram ID або створює його, якщо його ще немає.
+        
+        Використовує INSERT ... ON CONFLICT (telegram_id) DO NOTHING RETURNING,
+        а за конфлікту читає наявного користувача окремим SELECT, тому одночасні
+        перші оновлення від одного користувача не конфліктують на унікальному
+        обмеженні, а наявний рядок не перезаписується (без нової версії рядка
+        та запису в WAL).
+        
+        Args:
+            telegram_id: ID користувача в Telegram
+            name: Ім'я нового користувача
+            language: Мова інтерфейсу нового користувача
+            language_code: Код мови користувача з Telegram
+            
+        Returns:
+            Кортеж з об'єкта користувача та прапорця, чи був він щойно створений
+        """
+        return await self._get_or_insert(
+            User,
+            index_elements=[User.telegram_id],
+            telegram_id=telegram_id,
+            name=name,
+            language=language,
+            language_code=language_code,
+        )
+
+    async def bulk_upsert(
+        self,
+        users: BulkSource,
+        update_columns: Sequence[str] = (),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> BulkResult:
+        """
+        Масово імпортує або синхронізує користувачів за Telegram ID через COPY.
+        
+        Нові користувачі створюються. Наявні за замовчуванням не змінюються
+        (ON CONFLICT DO NOTHING): імпорт з іншого бота не перезаписує мову,
+        обрану користувачем у цьому боті, та дату блокування. Колонки, що
+        перезаписуються в наявних користувачів, вказуються в update_columns.
+        ID в базі даних з DTO не використовується.
+        
+        Кеш користувачів у Redis та в пам'яті процесу не оновлюється. Якщо
+        update_columns не порожній, після імпорту слід видалити змінених
+        користувачів з кешу (redis.delete_users) або імпортувати їх через
+        UserService.import_users, який робить це сам.
+        
+        Args:
+            users: DTO користувачів (звичайний або асинхронний ітератор)
+            update_columns: Колонки наявних користувачів, що перезаписуються
+            batch_size: Кількість користувачів в одному пакеті COPY
+            
+        Returns:
+            Результат запису з кількістю рядків і швидкістю
+            
+        Приклад:
+            result = await users_repo.bulk_upsert(load_users_from_previous_bot())
+            logger.info("Imported %d users (%.0f rows/s)", result.rows, result.rows_per_second)
+        """
+        return await self._copy_upsert(
+            User,
+            users,
+            index_elements=["telegram_id"],
+            columns=["telegram_id", "name", "language", "language_code", "blocked_at"],
+            update_columns=update_columns,
+            batch_size=batch_size,
+        )
+
     async def update(self, user_id: int, **kwargs: Any) -> Optional[User]:
         """
         Оновлює дані користувача.
@@ -69,6 +217,19 @@ class UsersRepository(BaseRepository):
             **kwargs,
         )
 
+    async def update_many(self, values: list[dict[str, Any]]) -> None:
+        """
+        Оновлює дані багатьох користувачів одним пакетом.
+        
+        Args:
+            values: Список словників, кожен з яких містить "id" користувача
+                    та поля з новими значеннями
+            
+        Приклад:
+            await users_repo.update_many([{"id": 1, "blocked_at": None}, {"id": 2, "name": "Ян"}])
+        """
+        await self._update_many(User, values)
+
     async def delete(self, user_id: int) -> bool:
         """
         Видаляє користувача з бази даних.
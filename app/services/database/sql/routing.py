@@ -0,0 +1,180 @@
+"""
+Модуль для розподілу читань між репліками бази даних.
+
+Контекст SQLSessionContext у режимі лише читання створює сесію, прив'язану
+до однієї з реплік (по черзі), а всі інші сесії працюють з основним сервером.
+Репліка, з'єднання з якою завершилося помилкою, на деякий час виключається
+з розподілу. Після запису з ключами узгодженості (наприклад, Telegram ID
+користувача) читання з тими самими ключами протягом вікна узгодженості
+виконуються на основному сервері, тож користувач, який щойно змінив свої
+дані, не отримає їх застарілу копію з репліки, що відстає.
+"""
+
+from __future__ import annotations
+
+from time import monotonic
+from typing import Final, Hashable, Iterable, Optional, Sequence
+
+from asyncpg import InterfaceError as DriverInterfaceError
+from asyncpg import PostgresConnectionError
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.utils.logging import database as logger
+from app.utils.ttl_cache import TTLCache
+
+# Ключ Session.info з маршрутизатором реплік
+ROUTER_INFO: Final[str] = "replica_router"
+# Ключ Session.info з ключами узгодженості сесії
+CONSISTENCY_INFO: Final[str] = "consistency_keys"
+
+
+class ReplicaRouter:
+    """
+    Маршрутизатор читань між репліками бази даних.
+
+    Attributes:
+        replicas: Двигуни реплік
+        eject_time: Час (у секундах), на який репліка з помилкою з'єднання
+                    виключається з розподілу
+        routed: Кількість сесій, спрямованих на репліки
+        fallbacks: Кількість сесій лише для читання, спрямованих на основний
+                   сервер (через вікно узгодженості або відсутність доступних реплік)
+        ejections: Кількість виключень реплік з розподілу
+    """
+
+    __slots__ = (
+        "replicas",
+        "eject_time",
+        "routed",
+        "fallbacks",
+        "ejections",
+        "_index",
+        "_ejected",
+        "_writes",
+    )
+
+    def __init__(
+        self,
+        replicas: Sequence[AsyncEngine],
+        eject_time: float,
+        consistency_window: float,
+        tracked: int = 100_000,
+    ) -> None:
+        """
+        Ініціалізує маршрутизатор.
+
+        Args:
+            replicas: Двигуни реплік
+            eject_time: Час (у секундах) виключення репліки після помилки з'єднання
+            consistency_window: Час (у секундах) після запису, протягом якого читання
+                                з тими самими ключами виконуються на основному сервері
+            tracked: Найбільша кількість ключів нещодавніх записів, що зберігаються
+        """
+        self.replicas = tuple(replicas)
+        self.eject_time = eject_time
+        self.routed = 0
+        self.fallbacks = 0
+        self.ejections = 0
+        self._index = 0
+        # Двигун репліки -> момент повернення до розподілу
+        self._ejected: dict[AsyncEngine, float] = {}
+        self._writes: TTLCache[Hashable, bool] = TTLCache(
+            maxsize=tracked,
+            ttl=consistency_window,
+        )
+
+    def choose(self, keys: Iterable[Hashable] = ()) -> Optional[AsyncEngine]:
+        """
+        Обирає репліку для сесії лише для читання.
+
+        Args:
+            keys: Ключі узгодженості даних, які читатиме сесія
+
+        Returns:
+            Двигун репліки або None, якщо читати потрібно з основного сервера
+        """
+        if not self.replicas:
+            return None
+        if any(key in self._writes for key in keys):
+            self.fallbacks += 1
+            return None
+        now: float = monotonic()
+        for _ in range(len(self.replicas)):
+            engine: AsyncEngine = self.replicas[self._index]
+            self._index = (self._index + 1) % len(self.replicas)
+            if self._ejected.get(engine, 0) <= now:
+                self.routed += 1
+                return engine
+        # Усі репліки виключені - читаємо з основного сервера
+        self.fallbacks += 1
+        return None
+
+    def eject(self, engine: AsyncEngine) -> None:
+        """
+        Виключає репліку з розподілу на eject_time секунд.
+
+        Args:
+            engine: Двигун репліки
+        """
+        if self._ejected.get(engine, 0) <= monotonic():
+            self.ejections += 1
+            logger.warning("Read replica %s ejected for %ss", engine.url.host, self.eject_time)
+        self._ejected[engine] = monotonic() + self.eject_time
+
+    def record_write(self, keys: Iterable[Hashable]) -> None:
+        """
+        Відкриває вікно узгодженості для ключів щойно записаних даних.
+
+        Args:
+            keys: Ключі узгодженості записаних даних
+        """
+        for key in keys:
+            self._writes.set(key, True)
+
+    def report_error(self, engine: AsyncEngine, error: BaseException) -> None:
+        """
+        Виключає репліку з розподілу, якщо помилка пов'язана з її з'єднанням.
+
+        Args:
+            engine: Двигун репліки, на якій виконувалися запити
+            error: Виняток, що виник під час роботи з реплікою
+        """
+        # Підготовлені запити RawUsersRepository передають помилки asyncpg без обгортки SQLAlchemy
+        connection_errors = (
+            OSError,
+            TimeoutError,
+            InterfaceError,
+            OperationalError,
+            DriverInterfaceError,
+            PostgresConnectionError,
+        )
+        if isinstance(error, connection_errors) or (
+            isinstance(error, DBAPIError) and error.connection_invalidated
+        ):
+            self.eject(engine)
+
+
+class RoutedSession(Session):
+    """
+    Сесія, що відкриває вікно узгодженості для своїх ключів після кожного commit.
+
+    Маршрутизатор та ключі узгодженості передаються через Session.info.
+    Сесіям, прив'язаним до реплік, ключі узгодженості не передаються.
+    """
+
+
+@event.listens_for(RoutedSession, "after_commit")
+def _record_write(session: Session) -> None:
+    """
+    Повідомляє маршрутизатор про запис з ключами узгодженості сесії.
+
+    Args:
+        session: Сесія, транзакцію якої щойно підтверджено
+    """
+    router: Optional[ReplicaRouter] = session.info.get(ROUTER_INFO)
+    keys: Optional[Sequence[Hashable]] = session.info.get(CONSISTENCY_INFO)
+    if router is not None and keys:
+        router.record_write(keys)
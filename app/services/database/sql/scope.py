@@ -0,0 +1,215 @@
+"""
+Модуль зі спільною сесією SQL для одного оновлення Telegram.
+
+Без спільної сесії кожна операція (пошук користувача в проміжному обробнику,
+оновлення в обробнику) відкриває власний SQLSessionContext: окреме взяття
+з'єднання з пулу та окреме закриття сесії. SQLSessionScope створюється
+на все оновлення, ліниво відкриває щонайбільше одну сесію, яку спільно
+використовують UserService, репозиторії та обробники, і закриває її один раз
+після завершення обробки оновлення.
+
+Поза транзакційним режимом транзакція сесії завершується після кожного блоку,
+тож з'єднання не лишається взятим з пулу (і в стані "idle in transaction")
+між запитами, наприклад, поки обробник звертається до Telegram API.
+"""
+
+from __future__ import annotations
+
+from types import TracebackType
+from typing import AsyncContextManager, Hashable, Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .context import SQLSessionContext
+from .repositories import Repository
+from .routing import ROUTER_INFO
+from .uow import UoW
+
+
+class SQLSessionScope:
+    """
+    Спільна сесія SQL в межах одного оновлення.
+
+    Метод context повертає контекстний менеджер з тим самим інтерфейсом,
+    що й SQLSessionContext, але вихід з нього не закриває сесію. Якщо блок
+    завершився винятком, транзакція сесії скасовується, щоб наступні операції
+    оновлення могли продовжити роботу з сесією. Поза транзакційним режимом
+    успішний вихід з останнього активного блоку підтверджує транзакцію, яку
+    автоматично розпочали його запити: з'єднання повертається до пулу до
+    наступного блоку.
+
+    Якщо пул налаштовано з репліками, читання до відкриття спільної сесії
+    виконуються в окремих контекстах на репліках: сесія на репліці не може
+    обслуговувати записи, тож ділити її немає сенсу.
+
+    Як і будь-яку сесію SQLAlchemy, спільну сесію не можна використовувати
+    з кількох задач одночасно: блоки context одного оновлення виконуються
+    послідовно.
+
+    Приклад використання (в обробнику):
+        async def handler(message: Message, sql_scope: SQLSessionScope) -> None:
+            async with sql_scope.context() as (repo, uow):
+                await repo.users.update(user_id=1, name="Іван")
+
+    Attributes:
+        session_pool: Фабрика асинхронних сесій SQLAlchemy
+    """
+
+    __slots__ = (
+        "session_pool",
+        "_context",
+        "_transaction",
+        "_entered",
+        "_active",
+        "_closed",
+        "_error",
+    )
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        transaction: bool = False,
+    ) -> None:
+        """
+        Ініціалізує спільну сесію без створення сесії SQLAlchemy.
+
+        Args:
+            session_pool: Фабрика асинхронних сесій SQLAlchemy
+            transaction: Спільна сесія працює в транзакційному режимі: записи
+                         підтверджуються одним commit при закритті
+        """
+        self.session_pool = session_pool
+        self._context = SQLSessionContext(session_pool, transaction=transaction)
+        self._transaction = transaction
+        self._entered: Optional[tuple[Repository, UoW]] = None
+        # Кількість блоків context, що виконуються зараз
+        self._active = 0
+        # Чи завершилася обробка оновлення та виняток, з яким вона завершилася
+        self._closed = False
+        self._error: Optional[BaseException] = None
+
+    @property
+    def opened(self) -> bool:
+        """
+        Повертає True, якщо спільну сесію вже створено.
+        """
+        return self._context.opened
+
+    def context(
+        self,
+        read_only: bool = False,
+        keys: Iterable[Hashable] = (),
+    ) -> AsyncContextManager[tuple[Repository, UoW]]:
+        """
+        Повертає контекст для роботи зі спільною сесією.
+
+        Args:
+            read_only: Операція лише читає дані
+            keys: Ключі узгодженості даних, які читає або записує операція
+
+        Returns:
+            Асинхронний контекстний менеджер, що повертає репозиторій та UoW
+        """
+        if self._closed:
+            # Операція, що пережила оновлення, працює з власною сесією
+            return SQLSessionContext(self.session_pool, read_only=read_only, keys=keys)
+        if read_only and not self.opened and self._has_replicas():
+            return SQLSessionContext(self.session_pool, read_only=True, keys=keys)
+        self._context.add_keys(keys)
+        return _SharedContext(self)
+
+    async def close(self, exc_value: Optional[BaseException] = None) -> None:
+        """
+        Закриває спільну сесію після завершення обробки оновлення.
+
+        Якщо сесією ще користується операція (наприклад, спільне завантаження
+        користувача, яке пережило скасування обробника), сесія закривається
+        після завершення цієї операції.
+
+        Args:
+            exc_value: Виняток, з яким завершилася обробка оновлення, або None
+        """
+        self._closed = True
+        self._error = exc_value
+        if self._active == 0:
+            await self._close()
+
+    async def _enter(self) -> tuple[Repository, UoW]:
+        """
+        Починає блок роботи зі спільною сесією.
+
+        Returns:
+            Кортеж з репозиторію та UoW спільної сесії
+        """
+        self._active += 1
+        if self._entered is None:
+            self._entered = await self._context.__aenter__()
+        return self._entered
+
+    async def _exit(self, exc_value: Optional[BaseException]) -> None:
+        """
+        Завершує блок роботи зі спільною сесією.
+
+        Args:
+            exc_value: Виняток, з яким завершився блок, або None
+        """
+        self._active -= 1
+        if self.opened and self._context.session.in_transaction():
+            if exc_value is not None:
+                await self._context.session.rollback()
+            elif not self._transaction and self._active == 0 and not self._closed:
+                # Записи поза транзакційним режимом вже підтверджені репозиторіями,
+                # тож commit лише завершує транзакцію читань і звільняє з'єднання.
+                # На відміну від rollback, він не робить застарілими завантажені
+                # об'єкти (expire_on_commit=False)
+                await self._context.session.commit()
+        if self._closed and self._active == 0:
+            await self._close()
+
+    async def _close(self) -> None:
+        """
+        Закриває сесію контексту, якщо вона була створена.
+        """
+        if self._entered is None:
+            return
+        self._entered = None
+        exc_value: Optional[BaseException] = self._error
+        await self._context.__aexit__(
+            None if exc_value is None else type(exc_value),
+            exc_value,
+            None if exc_value is None else exc_value.__traceback__,
+        )
+
+    def _has_replicas(self) -> bool:
+        """
+        Перевіряє, чи налаштовано пул сесій з репліками.
+        """
+        return ROUTER_INFO in (self.session_pool.kw.get("info") or {})
+
+
+class _SharedContext:
+    """
+    Контекстний менеджер одного блоку роботи зі спільною сесією.
+    """
+
+    __slots__ = ("_scope",)
+
+    def __init__(self, scope: SQLSessionScope) -> None:
+        """
+        Args:
+            scope: Спільна сесія оновлення
+        """
+        self._scope = scope
+
+    async def __aenter__(self) -> tuple[Repository, UoW]:
+        # noinspection PyProtectedMember
+        return await self._scope._enter()
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        # noinspection PyProtectedMember
+        await self._scope._exit(exc_value)
@@ -0,0 +1,75 @@
+"""
+Модуль з допоміжними функціями транзакційного режиму сесій.
+
+У транзакційному режимі SQLSessionContext позначає сесію прапорцем
+у Session.info. Репозиторії та UoW тоді не підтверджують транзакцію після
+кожного запису, а лише надсилають зміни до бази даних (flush): контекст
+виконує один commit при успішному виході, тож кілька змін обробника
+атомарні й коштують одного підтвердження транзакції.
+"""
+
+from __future__ import annotations
+
+from typing import Final, Optional
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import SessionTransaction
+from sqlalchemy.pool import PoolProxiedConnection
+
+# Ключ Session.info з прапорцем транзакційного режиму (commit виконує контекст)
+DEFERRED_COMMIT_INFO: Final[str] = "deferred_commit"
+# Ключ Session.info з транзакцією сесії, яку вже розпочато на сервері для запитів драйвера
+_DRIVER_TRANSACTION_INFO: Final[str] = "driver_transaction"
+
+
+def is_deferred(session: AsyncSession) -> bool:
+    """
+    Перевіряє, чи працює сесія в транзакційному режимі.
+
+    Args:
+        session: Асинхронна сесія SQLAlchemy
+
+    Returns:
+        True, якщо commit виконує контекст сесії
+    """
+    return bool(session.info.get(DEFERRED_COMMIT_INFO))
+
+
+async def commit_or_flush(session: AsyncSession) -> None:
+    """
+    Підтверджує транзакцію або, у транзакційному режимі, лише надсилає зміни.
+
+    Args:
+        session: Асинхронна сесія SQLAlchemy
+    """
+    if is_deferred(session):
+        await session.flush()
+    else:
+        await session.commit()
+
+
+async def raw_connection(session: AsyncSession) -> tuple[AsyncConnection, PoolProxiedConnection]:
+    """
+    Повертає з'єднання сесії разом з з'єднанням пулу, під яким лежить драйвер asyncpg.
+
+    Запити, виконані напряму через драйвер, не розпочинають транзакцію
+    SQLAlchemy і виконуються в режимі автоматичного підтвердження: адаптер asyncpg
+    надсилає BEGIN ліниво, лише перед першим запитом, виконаним через SQLAlchemy.
+    У транзакційному режимі ця функція один раз за транзакцію сесії виконує
+    через SQLAlchemy порожній запит (SELECT 1), щоб BEGIN було надіслано,
+    і запити драйвера увійшли до транзакції.
+
+    Args:
+        session: Асинхронна сесія SQLAlchemy з драйвером asyncpg
+
+    Returns:
+        Кортеж із з'єднання SQLAlchemy та з'єднання пулу
+    """
+    connection: AsyncConnection = await session.connection()
+    if is_deferred(session):
+        transaction: Optional[SessionTransaction] = session.sync_session.get_transaction()
+        if session.info.get(_DRIVER_TRANSACTION_INFO) is not transaction:
+            await connection.exec_driver_sql("SELECT 1")
+            session.info[_DRIVER_TRANSACTION_INFO] = transaction
+    raw: PoolProxiedConnection = await connection.get_raw_connection()
+    return connection, raw
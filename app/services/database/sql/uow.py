@@ -1,7 +1,30 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, Optional, Sequence, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncSessionTransaction
 
 from app.models.sql.base import Base
 
+from .bulk import DEFAULT_BATCH_SIZE, BulkResult, BulkSource, copy_upsert
+from .transaction import commit_or_flush
+
+# Джерело сесії: готова сесія або функція, яка створює її при першому зверненні
+SessionSource = Union[AsyncSession, Callable[[], AsyncSession]]
+
+
+def resolve_session(source: SessionSource) -> AsyncSession:
+    """
+    Повертає сесію з її джерела.
+    
+    Args:
+        source: Готова сесія або функція, що повертає сесію
+        
+    Returns:
+        Асинхронна сесія SQLAlchemy
+    """
+    if isinstance(source, AsyncSession):
+        return source
+    return source()
+
 
 class UoW:
     """
@@ -9,27 +32,39 @@ class UoW:
     
     Цей клас відповідає за збереження змін у базі даних, об'єднання об'єктів
     та видалення записів. Він інкапсулює логіку транзакцій та забезпечує
-    атомарність операцій.
+    атомарність операцій. У транзакційному режимі SQLSessionContext зміни
+    лише надсилаються до бази даних (flush), а commit виконує сам контекст.
     
     Приклад використання:
         user = User(name="Іван", email="ivan@example.com")
         await uow.commit(user)
     """
     
-    # Сесія SQLAlchemy для взаємодії з базою даних
-    session: AsyncSession
+    # Джерело сесії SQLAlchemy для взаємодії з базою даних
+    _session_source: SessionSource
 
     # __slots__ оптимізує використання пам'яті
-    __slots__ = ("session",)
+    __slots__ = ("_session_source",)
 
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: SessionSource) -> None:
         """
         Ініціалізує Unit of Work з сесією бази даних.
         
         Args:
             session: Асинхронна сесія SQLAlchemy для взаємодії з базою даних
+                     або функція, яка створює її при першому зверненні
         """
-        self.session = session
+        self._session_source = session
+
+    @property
+    def session(self) -> AsyncSession:
+        """
+        Повертає сесію, створюючи її при першому зверненні.
+        
+        Returns:
+            Асинхронна сесія SQLAlchemy
+        """
+        return resolve_session(self._session_source)
 
     async def commit(self, *instances: Base) -> None:
         """
@@ -49,7 +84,7 @@ class UoW:
         # Додаємо всі передані об'єкти до сесії
         self.session.add_all(instances)
         # Зберігаємо зміни в базі даних
-        await self.session.commit()
+        await commit_or_flush(self.session)
 
     async def merge(self, *instances: Base) -> None:
         """
@@ -71,6 +106,46 @@ class UoW:
             # merge перевіряє, чи існує об'єкт, і оновлює його або створює новий
             await self.session.merge(instance)
 
+    async def merge_many(
+        self,
+        model: type[Base],
+        items: BulkSource,
+        index_elements: Sequence[str],
+        columns: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> BulkResult:
+        """
+        Масово об'єднує записи з базою даних за унікальним ключем.
+        
+        На відміну від merge, не звертається до бази даних для кожного об'єкта:
+        записи пакетами завантажуються через COPY у тимчасову таблицю та
+        переносяться одним INSERT ... ON CONFLICT на пакет.
+        
+        Args:
+            model: Модель цільової таблиці
+            items: DTO або ORM-об'єкти (звичайний або асинхронний ітератор)
+            index_elements: Колонки унікального обмеження для ON CONFLICT
+            columns: Колонки, що записуються (за замовчуванням - без серверних значень)
+            update_columns: Колонки наявного запису, що перезаписуються
+            batch_size: Кількість записів в одному пакеті COPY
+            
+        Returns:
+            Результат запису з кількістю рядків і швидкістю
+            
+        Приклад:
+            await uow.merge_many(User, users, index_elements=["telegram_id"])
+        """
+        return await copy_upsert(
+            self.session,
+            model,
+            items,
+            index_elements=index_elements,
+            columns=columns,
+            update_columns=update_columns,
+            batch_size=batch_size,
+        )
+
     async def delete(self, *instances: Base) -> None:
         """
         Видаляє об'єкти з бази даних.
@@ -90,4 +165,25 @@ class UoW:
             # Позначаємо об'єкт як видалений
             await self.session.delete(instance)
         # Зберігаємо зміни (видалення) в базі даних
-        await self.session.commit()
+        await commit_or_flush(self.session)
+
+    def savepoint(self) -> AsyncSessionTransaction:
+        """
+        Створює точку збереження (SAVEPOINT) всередині поточної транзакції.
+        
+        Якщо блок завершується винятком, скасовуються лише зміни, зроблені
+        після точки збереження, а виняток передається далі. Найкорисніша
+        у транзакційному режимі SQLSessionContext, де всі записи контексту
+        підтверджуються одним commit.
+        
+        Returns:
+            Асинхронний контекстний менеджер точки збереження
+            
+        Приклад:
+            async with SQLSessionContext(session_pool, transaction=True) as (repo, uow):
+                await repo.users.update(user_id=1, name="Іван")
+                with suppress(IntegrityError):
+                    async with uow.savepoint():
+                        await uow.commit(Order(user_id=1))  # скасовується лише це
+        """
+        return self.session.begin_nested()
@@ -1,4 +1,19 @@
-from typing import Any, Awaitable, Callable, Optional, cast
+from time import monotonic
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from aiogram.types import User as AiogramUser
 from aiogram_i18n.cores import BaseCore
@@ -7,7 +22,19 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from app.models.config import AppConfig
 from app.models.dto.user import UserDto
 from app.models.sql import User
-from app.services.database import RedisRepository, SQLSessionContext
+from app.services.cache_policy import CachePolicy
+from app.services.database import RedisRepository, SQLSessionContext, SQLSessionScope, UoW
+from app.services.database.sql.bulk import DEFAULT_BATCH_SIZE, BulkResult, BulkSource
+from app.services.database.sql.repositories import (
+    RawUsersRepository,
+    Repository,
+    UsersRepository,
+)
+from app.services.user_writer import UserWriter
+from app.utils.single_flight import SingleFlight
+
+# Типовий параметр для результату завантаження
+T = TypeVar("T")
 
 
 class UserService:
@@ -15,17 +42,29 @@ class UserService:
     Сервіс для роботи з користувачами.
     
     Забезпечує створення, отримання та оновлення користувачів з використанням
-    SQL бази даних та Redis кешування.
+    SQL бази даних та Redis кешування. Конкурентні запити одного й того самого
+    користувача об'єднуються через SingleFlight, тому при серії оновлень
+    виконується лише одне звернення до Redis та бази даних. Час життя записів
+    у Redis та їх раннє оновлення визначає CachePolicy. Якщо передано спільну
+    сесію оновлення (SQLSessionScope), усі запити сервісу виконуються в ній.
     """
     session_pool: async_sessionmaker[AsyncSession]
     redis: RedisRepository
     config: AppConfig
+    flight: SingleFlight
+    writer: Optional[UserWriter]
+    cache_policy: CachePolicy
+    scope: Optional[SQLSessionScope]
 
     def __init__(
         self,
         session_pool: async_sessionmaker[AsyncSession],
         redis: RedisRepository,
         config: AppConfig,
+        flight: Optional[SingleFlight] = None,
+        writer: Optional[UserWriter] = None,
+        cache_policy: Optional[CachePolicy] = None,
+        scope: Optional[SQLSessionScope] = None,
     ) -> None:
         """
         Ініціалізує сервіс користувача.
@@ -34,10 +73,30 @@ class UserService:
             session_pool: Пул асинхронних сесій SQLAlchemy
             redis: Репозиторій для роботи з Redis
             config: Конфігурація додатку
+            flight: Спільний для всіх оновлень реєстр завантажень, що виконуються.
+                    Якщо не вказано, об'єднуються лише виклики цього екземпляра.
+            writer: Буфер відкладеного запису змін. Якщо вказано, update не виконує
+                    власну транзакцію, а передає зміни до буфера для пакетного запису.
+            cache_policy: Спільна для всіх оновлень політика часу життя записів у Redis.
+                          Якщо не вказано, створюється з налаштувань конфігурації.
+            scope: Спільна сесія оновлення. Якщо не вказано, кожна операція
+                   відкриває власний SQLSessionContext.
         """
         self.session_pool = session_pool
         self.redis = redis
         self.config = config
+        self.flight = flight if flight is not None else SingleFlight()
+        self.writer = writer
+        self.scope = scope
+        self.cache_policy = (
+            cache_policy
+            if cache_policy is not None
+            else CachePolicy(
+                ttl=config.common.users_cache_time,
+                jitter=config.common.users_cache_jitter,
+                beta=config.common.users_cache_early_refresh,
+            )
+        )
 
     async def create(
         self,
@@ -47,6 +106,8 @@ class UserService:
         """
         Створює нового користувача на основі даних з Telegram.
         
+        Якщо користувач вже існує, повертається наявний запис.
+        
         Args:
             aiogram_user: Об'єкт користувача Aiogram
             i18n_core: Ядро інтернаціоналізації для визначення мови
@@ -54,55 +115,184 @@ class UserService:
         Returns:
             DTO об'єкт створеного користувача
         """
-        async with SQLSessionContext(self.session_pool) as (repository, uow):
-            user: User = User(
-                telegram_id=aiogram_user.id,
-                name=aiogram_user.full_name,
-                language=(
-                    # Використовуємо мову користувача, якщо вона підтримується,
-                    # інакше використовуємо мову за замовчуванням
-                    aiogram_user.language_code
-                    if aiogram_user.language_code in i18n_core.locales
-                    else cast(str, i18n_core.default_locale)
-                ),
-                language_code=aiogram_user.language_code,
-            )
-            await uow.commit(user)
-        return user.dto()
+        # Конкурентні спроби створити одного користувача виконують один INSERT
+        user, _ = await self._do(
+            ("create", aiogram_user.id),
+            lambda: self._create(aiogram_user=aiogram_user, i18n_core=i18n_core),
+        )
+        return user.model_detach()
+
+    async def get_or_create(
+        self,
+        aiogram_user: AiogramUser,
+        i18n_core: BaseCore[Any],
+    ) -> tuple[UserDto, bool]:
+        """
+        Отримує користувача з кешу або бази даних, створюючи його за потреби.
+        
+        При промаху кешу користувач читається з бази даних (на репліці, якщо вона
+        налаштована), а вставка на основному сервері виконується лише для нового
+        користувача. Результат одразу зберігається в Redis.
+        
+        Args:
+            aiogram_user: Об'єкт користувача Aiogram
+            i18n_core: Ядро інтернаціоналізації для визначення мови
+            
+        Returns:
+            Кортеж з DTO об'єкта користувача та прапорця, чи був він щойно створений
+        """
+        self.cache_policy.touch(aiogram_user.id)
+        # Кеш процесу перевіряємо без створення задачі завантаження
+        cached: Optional[UserDto] = self.redis.get_cached_user(key=aiogram_user.id)
+        if cached is not None:
+            return cached, False
+            
+        user_dto, created = await self._do(
+            ("get_or_create", aiogram_user.id),
+            lambda: self._load_or_create(aiogram_user=aiogram_user, i18n_core=i18n_core),
+        )
+        return user_dto.model_detach(), created
+
+    async def _load_or_create(
+        self,
+        aiogram_user: AiogramUser,
+        i18n_core: BaseCore[Any],
+    ) -> tuple[UserDto, bool]:
+        """
+        Завантажує користувача з Redis, а за його відсутності - отримує або створює в базі даних.
+        
+        Args:
+            aiogram_user: Об'єкт користувача Aiogram
+            i18n_core: Ядро інтернаціоналізації для визначення мови
+            
+        Returns:
+            Кортеж з DTO об'єкта користувача та прапорця, чи був він щойно створений
+        """
+        user_dto, remaining = await self.redis.get_user_entry(key=aiogram_user.id)
+        self.cache_policy.record(hit=user_dto is not None)
+        if user_dto is not None and not self._should_refresh(remaining):
+            return user_dto, False
+        return await self._create(aiogram_user=aiogram_user, i18n_core=i18n_core)
 
-    async def _get(
+    async def _create(
         self,
-        getter: Callable[[Any], Awaitable[Optional[User]]],
-        key: Any,
-    ) -> Optional[UserDto]:
+        aiogram_user: AiogramUser,
+        i18n_core: BaseCore[Any],
+    ) -> tuple[UserDto, bool]:
+        """
+        Внутрішній метод для отримання або створення користувача в базі даних.
+        
+        Спочатку користувач читається за Telegram ID (на репліці, якщо вона
+        налаштована), і лише за його відсутності виконується вставка на основному
+        сервері: промах кешу для наявного користувача не пише в базу даних.
+        
+        Args:
+            aiogram_user: Об'єкт користувача Aiogram
+            i18n_core: Ядро інтернаціоналізації для визначення мови
+            
+        Returns:
+            Кортеж з DTO об'єкта користувача та прапорця, чи був він щойно створений
+        """
+        started: float = monotonic()
+        async with self._session(read_only=True, keys=(aiogram_user.id,)) as (
+            repository,
+            uow,
+        ):
+            user: Optional[Union[User, UserDto]] = await self._users(repository).by_tg_id(
+                aiogram_user.id
+            )
+        created: bool = False
+        if user is None:
+            async with self._session(keys=(aiogram_user.id,)) as (
+                repository,
+                uow,
+            ):
+                user, created = await self._users(repository).get_or_create(
+                    telegram_id=aiogram_user.id,
+                    name=aiogram_user.full_name,
+                    language=(
+                        # Використовуємо мову користувача, якщо вона підтримується,
+                        # інакше використовуємо мову за замовчуванням
+                        aiogram_user.language_code
+                        if aiogram_user.language_code in i18n_core.locales
+                        else cast(str, i18n_core.default_locale)
+                    ),
+                    language_code=aiogram_user.language_code,
+                )
+        self.cache_policy.observe(monotonic() - started)
+            
+        # Одразу кешуємо користувача, щоб наступні оновлення не зверталися до бази даних
+        await self.redis.save_user(
+            key=user.telegram_id,
+            value=(user_dto := self._to_dto(user)),
+            cache_time=self.cache_policy.expiry(user.telegram_id),
+        )
+        return user_dto, created
+
+    async def _get(self, getter: str, key: Any) -> Optional[UserDto]:
         """
         Внутрішній метод для отримання користувача з кешу або бази даних.
         
-        Спочатку перевіряє наявність користувача в Redis, якщо не знайдено,
-        шукає в базі даних і кешує результат.
+        Спочатку перевіряє наявність користувача в кеші процесу. Якщо його там немає,
+        завантаження з Redis або бази даних виконується через SingleFlight,
+        тож конкурентні запити з тим самим ключем чекають на один спільний результат.
         
         Args:
-            getter: Функція для отримання користувача з бази даних
+            getter: Назва методу репозиторію користувачів (get або by_tg_id)
             key: Ключ для пошуку користувача
             
         Returns:
             DTO об'єкт користувача або None, якщо користувача не знайдено
         """
-        # Спроба отримати користувача з Redis
-        user_dto: Optional[UserDto] = await self.redis.get_user(key=key)
+        # Кеш процесу перевіряємо без створення задачі завантаження
+        user_dto: Optional[UserDto] = self.redis.get_cached_user(key=key)
         if user_dto is not None:
             return user_dto
             
-        # Якщо користувача немає в кеші, шукаємо в базі даних
-        user: Optional[User] = await getter(key)
+        user_dto = await self._do(
+            (getter, key),
+            lambda: self._load(getter=getter, key=key),
+        )
+        # Кожен учасник отримує власну копію спільного результату
+        return None if user_dto is None else user_dto.model_detach()
+
+    async def _load(self, getter: str, key: Any) -> Optional[UserDto]:
+        """
+        Завантажує користувача з Redis, а за його відсутності - з бази даних.
+        
+        Args:
+            getter: Назва методу репозиторію користувачів (get або by_tg_id)
+            key: Ключ для пошуку користувача
+            
+        Returns:
+            DTO об'єкт користувача або None, якщо користувача не знайдено
+        """
+        # Спроба отримати користувача з Redis
+        user_dto, remaining = await self.redis.get_user_entry(key=key)
+        self.cache_policy.record(hit=user_dto is not None)
+        if user_dto is not None and not self._should_refresh(remaining):
+            return user_dto
+            
+        # Якщо користувача немає в кеші (або його час оновити), шукаємо в базі даних
+        started: float = monotonic()
+        # Читання можна виконати на репліці, якщо користувач нещодавно не змінювався
+        async with self._session(read_only=True, keys=(key,)) as (
+            repository,
+            uow,
+        ):
+            user: Optional[Union[User, UserDto]] = await getattr(
+                self._users(repository),
+                getter,
+            )(key)
+        self.cache_policy.observe(monotonic() - started)
         if user is None:
             return None
             
         # Зберігаємо користувача в Redis для майбутніх запитів
         await self.redis.save_user(
             key=user.telegram_id,
-            value=(user_dto := user.dto()),
-            cache_time=self.config.common.users_cache_time,
+            value=(user_dto := self._to_dto(user)),
+            cache_time=self.cache_policy.expiry(user.telegram_id),
         )
         return user_dto
 
@@ -116,8 +306,7 @@ class UserService:
         Returns:
             DTO об'єкт користувача або None, якщо користувача не знайдено
         """
-        async with SQLSessionContext(self.session_pool) as (repository, uow):
-            return await self._get(repository.users.get, user_id)
+        return await self._get("get", user_id)
 
     async def by_tg_id(self, telegram_id: int) -> Optional[UserDto]:
         """
@@ -129,14 +318,51 @@ class UserService:
         Returns:
             DTO об'єкт користувача або None, якщо користувача не знайдено
         """
-        async with SQLSessionContext(self.session_pool) as (repository, uow):
-            return await self._get(repository.users.by_tg_id, telegram_id)
+        self.cache_policy.touch(telegram_id)
+        return await self._get("by_tg_id", telegram_id)
+
+    async def prefetch(self, telegram_ids: Iterable[int]) -> dict[int, UserDto]:
+        """
+        Завантажує користувачів пакетом: один MGET до Redis та один SELECT для промахів.
+
+        Використовується для попереднього завантаження всіх користувачів пакета
+        оновлень. Користувачі, яких немає в базі даних, не створюються - вони
+        будуть створені при першому зверненні через get_or_create.
+
+        Args:
+            telegram_ids: ID користувачів в Telegram
+
+        Returns:
+            Словник Telegram ID -> DTO об'єкт для знайдених користувачів
+        """
+        keys: set[int] = set(telegram_ids)
+        users: dict[int, UserDto] = await self.redis.get_users(keys=keys)
+        missing: set[int] = keys.difference(users)
+        if not missing:
+            return users
+
+        async with self._session(read_only=True, keys=missing) as (
+            repository,
+            uow,
+        ):
+            loaded: list[User] = await repository.users.by_tg_ids(telegram_ids=missing)
+        if not loaded:
+            return users
+
+        # Знайдених у базі даних користувачів кешуємо одним конвеєром
+        found: dict[int, UserDto] = {user.telegram_id: self._to_dto(user) for user in loaded}
+        await self.redis.save_users(values=found, cache_time=self.cache_policy.expiry)
+        users.update(found)
+        return users
 
     async def update(self, user: UserDto, **kwargs: Any) -> None:
         """
         Оновлює дані користувача.
         
         Оновлює атрибути користувача в базі даних та в кеші Redis.
+        У режимі відкладеного запису зміни в базі даних записуються пакетом
+        пізніше, а кеш оновлюється одразу. Після зупинки буфера відкладеного
+        запису зміни записуються в базу даних напряму.
         
         Args:
             user: DTO об'єкт користувача для оновлення
@@ -146,13 +372,150 @@ class UserService:
         for key, value in kwargs.items():
             setattr(user, key, value)
             
-        # Оновлюємо користувача в базі даних
-        async with SQLSessionContext(self.session_pool) as (repository, uow):
-            await repository.users.update(user_id=user.id, **user.model_state)
+        if self.writer is not None and not self.writer.closed:
+            # Зміни об'єднуються з іншими та записуються пакетом
+            self.writer.add(
+                user_id=user.id,
+                changes=user.model_state,
+                telegram_id=user.telegram_id,
+            )
+        else:
+            # Оновлюємо користувача в базі даних; читання цього користувача
+            # (за Telegram ID або ID в базі даних) деякий час виконуються на основному сервері
+            async with self._session(keys=(user.telegram_id, user.id)) as (repository, uow):
+                await self._users(repository).update(user_id=user.id, **user.model_state)
             
-        # Оновлюємо користувача в Redis
-        await self.redis.save_user(
+        # Оновлюємо користувача в Redis (лише змінені поля в режимі хешів) та в кеші процесу
+        await self.redis.update_user(
             key=user.telegram_id,
             value=user,
-            cache_time=self.config.common.users_cache_time,
+            cache_time=self.cache_policy.expiry(user.telegram_id),
         )
+
+    async def import_users(
+        self,
+        users: BulkSource,
+        update_columns: Sequence[str] = (),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> BulkResult:
+        """
+        Масово імпортує користувачів (наприклад, з попереднього бота) через COPY.
+        
+        Наявні користувачі за замовчуванням не змінюються. Якщо вказано
+        update_columns, після імпорту імпортовані користувачі видаляються
+        з кешу Redis та кешу процесу, щоб наступне звернення прочитало
+        оновлені дані з бази даних.
+        
+        Args:
+            users: DTO користувачів (звичайний або асинхронний ітератор)
+            update_columns: Колонки наявних користувачів, що перезаписуються
+            batch_size: Кількість користувачів в одному пакеті COPY
+            
+        Returns:
+            Результат запису з кількістю рядків і швидкістю
+        """
+        telegram_ids: list[int] = []
+        
+        async def collect() -> AsyncIterator[UserDto]:
+            # Telegram ID запам'ятовуються по ходу імпорту: джерело читається один раз
+            if isinstance(users, AsyncIterable):
+                async for user in users:
+                    telegram_ids.append(user.telegram_id)
+                    yield user
+            else:
+                for user in users:
+                    telegram_ids.append(user.telegram_id)
+                    yield user
+        
+        async with self._session() as (repository, _):
+            result: BulkResult = await repository.users.bulk_upsert(
+                collect() if update_columns else users,
+                update_columns=update_columns,
+                batch_size=batch_size,
+            )
+        if telegram_ids:
+            await self.redis.delete_users(keys=telegram_ids)
+        return result
+
+    async def _do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Виконує завантаження через SingleFlight, враховуючи об'єднані звернення.
+        
+        Args:
+            key: Ключ, за яким об'єднуються виклики
+            func: Функція без аргументів, що повертає корутину завантаження
+            
+        Returns:
+            Результат завантаження
+        """
+        if key in self.flight:
+            # Звернення, яке без SingleFlight стало б ще одним запитом до бази даних
+            self.cache_policy.stampedes += 1
+        return await self.flight.do(key, func)
+
+    def _should_refresh(self, remaining: Optional[float]) -> bool:
+        """
+        Перевіряє, чи слід оновити запис Redis до завершення його життя.
+        
+        Args:
+            remaining: Час до завершення життя запису в секундах (None - невідомо)
+            
+        Returns:
+            True, якщо користувача слід завантажити з бази даних заздалегідь
+        """
+        return remaining is not None and self.cache_policy.should_refresh(remaining)
+
+    def _session(
+        self,
+        read_only: bool = False,
+        keys: Iterable[Hashable] = (),
+    ) -> AsyncContextManager[tuple[Repository, UoW]]:
+        """
+        Повертає контекст сесії: спільної сесії оновлення або власної.
+        
+        Args:
+            read_only: Операція лише читає дані, тож її можна виконати на репліці
+            keys: Ключі узгодженості даних, які читає або записує операція
+            
+        Returns:
+            Асинхронний контекстний менеджер, що повертає репозиторій та UoW
+        """
+        if self.scope is not None:
+            return self.scope.context(read_only=read_only, keys=keys)
+        return SQLSessionContext(self.session_pool, read_only=read_only, keys=keys)
+
+    def _users(self, repository: Repository) -> Union[UsersRepository, RawUsersRepository]:
+        """
+        Обирає репозиторій користувачів відповідно до конфігурації.
+        
+        Args:
+            repository: Головний репозиторій контексту сесії
+            
+        Returns:
+            Репозиторій на підготовлених запитах asyncpg, якщо їх увімкнено,
+            інакше репозиторій ORM
+        """
+        if self.config.common.users_raw_queries:
+            return repository.raw_users
+        return repository.users
+
+    def _to_dto(self, user: Union[User, UserDto]) -> UserDto:
+        """
+        Перетворює прочитаного з бази даних користувача в DTO з урахуванням незаписаних змін.
+        
+        У режимі відкладеного запису база даних може ще не містити останніх змін,
+        тому вони накладаються на прочитані дані перед збереженням у кеш.
+        
+        Args:
+            user: ORM-модель користувача або DTO, прочитаний підготовленим запитом
+            
+        Returns:
+            DTO об'єкт користувача
+        """
+        user_dto: UserDto = user if isinstance(user, UserDto) else user.dto()
+        if self.writer is None:
+            return user_dto
+        changes: Optional[dict[str, Any]] = self.writer.pending(user_id=user.id)
+        if not changes:
+            return user_dto
+        return user_dto.model_copy(update=changes).model_detach()
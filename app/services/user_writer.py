@@ -0,0 +1,228 @@
+"""
+Модуль для відкладеного (write-behind) збереження змін користувачів.
+
+Зміни полів користувачів накопичуються в пам'яті, об'єднуються для кожного
+користувача та записуються в базу даних пакетами - за розміром пакета або
+за таймером. Це замінює тисячі дрібних транзакцій (наприклад, під час хвилі
+блокувань після розсилки) кількома пакетними UPDATE.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.database import SQLSessionContext
+from app.utils.logging import database as logger
+
+
+class UserWriter:
+    """
+    Буфер відкладеного запису змін користувачів у базу даних.
+
+    Зміни одного користувача об'єднуються: у базу даних потрапляє лише
+    останнє значення кожного поля. Буфер скидається, коли кількість
+    користувачів зі змінами досягає batch_size, або щонайменше раз на
+    flush_interval секунд. Метод close гарантує запис усіх змін при зупинці.
+
+    Attributes:
+        session_pool: Пул асинхронних сесій SQLAlchemy
+        batch_size: Кількість користувачів зі змінами, що запускає запис
+        flush_interval: Максимальний час (у секундах) між записами
+        flushed: Кількість записаних в базу даних оновлень користувачів
+        batches: Кількість виконаних пакетних записів
+    """
+
+    __slots__ = (
+        "session_pool",
+        "batch_size",
+        "flush_interval",
+        "flushed",
+        "batches",
+        "_pending",
+        "_in_flight",
+        "_telegram_ids",
+        "_lock",
+        "_timer",
+        "_tasks",
+        "_closed",
+    )
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        batch_size: int,
+        flush_interval: float,
+    ) -> None:
+        """
+        Ініціалізує буфер відкладеного запису.
+
+        Args:
+            session_pool: Пул асинхронних сесій SQLAlchemy
+            batch_size: Кількість користувачів зі змінами, що запускає запис
+            flush_interval: Максимальний час (у секундах) між записами
+        """
+        self.session_pool = session_pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flushed = 0
+        self.batches = 0
+        # Незаписані зміни: id користувача -> {поле: значення}
+        self._pending: dict[int, dict[str, Any]] = {}
+        # Зміни пакета, що записується зараз (ще не підтверджені в базі даних)
+        self._in_flight: dict[int, dict[str, Any]] = {}
+        # Telegram ID користувачів зі змінами (ключі узгодженості читань з реплік)
+        self._telegram_ids: dict[int, int] = {}
+        # Записи виконуються послідовно, щоб старіші зміни не перезаписали новіші
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task[None]] = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @property
+    def closed(self) -> bool:
+        """
+        Чи зупинено буфер методом close.
+
+        Після зупинки зміни більше не приймаються: їх нікому було б записати.
+        """
+        return self._closed
+
+    def pending(self, user_id: int) -> Optional[dict[str, Any]]:
+        """
+        Повертає ще не записані зміни користувача.
+
+        Використовується, щоб дані, прочитані з бази даних до запису буфера,
+        не затерли нові значення в кеші. Зміни пакета, що записується зараз,
+        також вважаються незаписаними, доки транзакцію не буде підтверджено.
+
+        Args:
+            user_id: ID користувача в базі даних
+
+        Returns:
+            Словник незаписаних змін або None, якщо змін немає
+        """
+        in_flight: Optional[dict[str, Any]] = self._in_flight.get(user_id)
+        changes: Optional[dict[str, Any]] = self._pending.get(user_id)
+        if in_flight is None and changes is None:
+            return None
+        # Зміни, додані після початку запису, новіші за зміни пакета
+        return {**(in_flight or {}), **(changes or {})}
+
+    def add(
+        self,
+        user_id: int,
+        changes: dict[str, Any],
+        telegram_id: Optional[int] = None,
+    ) -> None:
+        """
+        Додає зміни користувача до буфера.
+
+        Args:
+            user_id: ID користувача в базі даних
+            changes: Змінені поля та їх нові значення
+            telegram_id: ID користувача в Telegram, за яким після запису
+                         читання користувача деякий час виконуються на основному сервері
+
+        Raises:
+            RuntimeError: Якщо буфер уже зупинено методом close
+        """
+        if self._closed:
+            # Після зупинки диспетчера буфер ніхто не запише - зміни були б втрачені
+            raise RuntimeError("UserWriter is closed, write the changes directly")
+        if not changes:
+            return
+        self._pending.setdefault(user_id, {}).update(changes)
+        if telegram_id is not None:
+            self._telegram_ids[user_id] = telegram_id
+
+        if len(self._pending) >= self.batch_size and not self._tasks:
+            # Буфер заповнений - записуємо зміни, не чекаючи таймера
+            self._spawn()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """
+        Записує всі накопичені зміни в базу даних одним пакетом.
+
+        Якщо запис не вдався, зміни повертаються до буфера (не затираючи
+        новіших значень) і будуть записані під час наступного скидання.
+        """
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._in_flight = batch
+            # Ключі узгодженості: ID в базі даних та Telegram ID користувачів пакета
+            keys: list[int] = [*batch]
+            keys.extend(
+                self._telegram_ids[user_id] for user_id in batch if user_id in self._telegram_ids
+            )
+            try:
+                async with SQLSessionContext(self.session_pool, keys=keys) as (repository, uow):
+                    await repository.users.update_many(
+                        [{"id": user_id, **changes} for user_id, changes in batch.items()]
+                    )
+            except BaseException:
+                # BaseException: скасування під час запису також не повинно втратити зміни
+                for user_id, changes in batch.items():
+                    # Новіші зміни, додані під час запису, мають пріоритет
+                    self._pending[user_id] = {**changes, **self._pending.get(user_id, {})}
+                raise
+            finally:
+                self._in_flight = {}
+            for user_id in batch:
+                if user_id not in self._pending:
+                    self._telegram_ids.pop(user_id, None)
+            self.flushed += len(batch)
+            self.batches += 1
+
+    async def close(self) -> None:
+        """
+        Зупиняє таймер і записує всі зміни, що залишилися в буфері.
+
+        Викликається при зупинці диспетчера. Після виклику метод add
+        більше не приймає змін.
+        """
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Чекаємо на вже запущені записи, щоб не втратити їх помилки
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+
+    async def _flush_later(self) -> None:
+        """
+        Записує буфер після завершення інтервалу flush_interval.
+        """
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        await self._safe_flush()
+
+    def _spawn(self) -> None:
+        """
+        Запускає запис буфера у фоновій задачі.
+        """
+        task: asyncio.Task[None] = asyncio.create_task(self._safe_flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _safe_flush(self) -> None:
+        """
+        Записує буфер у фоновому режимі, логуючи помилки замість їх поширення.
+        """
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to flush %d pending user updates", len(self._pending))
+            if not self._closed and self._timer is None:
+                # Повторюємо спробу на наступному інтервалі
+                self._timer = asyncio.create_task(self._flush_later())
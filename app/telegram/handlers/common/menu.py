@@ -46,6 +46,7 @@ async def greeting(message: Message, i18n: I18nContext, user: UserDto) -> Any:
 
 @router.callback_query(CDPing.filter())
 @flags.callback_answer(disabled=True)
+@flags.locale
 async def answer_pong(query: CallbackQuery, i18n: I18nContext) -> Any:
     """
     Обробник натискання на кнопку "ping".
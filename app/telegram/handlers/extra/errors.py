@@ -18,7 +18,7 @@ from app.exceptions.base import BotError
 router: Final[Router] = Router(name=__name__)
 
 
-@router.error(ExceptionTypeFilter(BotError), F.update.message)
+@router.error(ExceptionTypeFilter(BotError), F.update.message, flags={"locale": True})
 async def handle_some_error(error: ErrorEvent, i18n: I18nContext) -> Any:
     """
     Обробник для помилок типу BotError, які виникають при обробці повідомлень.
@@ -1,3 +1,4 @@
+from .sql_session import SQLSessionMiddleware
 from .user import UserMiddleware
 
-__all__ = ["UserMiddleware"]
+__all__ = ["SQLSessionMiddleware", "UserMiddleware"]
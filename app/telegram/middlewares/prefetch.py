@@ -0,0 +1,135 @@
+"""
+Модуль, що містить попереднє завантаження користувачів для пакета оновлень.
+
+У режимі polling один запит getUpdates повертає до 100 оновлень. Замість
+завантаження кожного користувача окремо (N запитів до Redis та бази даних)
+проміжний обробник запитів бота завантажує всіх користувачів пакета одним
+MGET та одним SELECT, а UserMiddleware бере готові дані для кожного оновлення.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.methods import GetUpdates, Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Update
+
+from app.utils.logging import database as logger
+
+if TYPE_CHECKING:
+    from app.models.dto.user import UserDto
+    from app.services.user import UserService
+
+
+class UserPrefetchMiddleware(BaseRequestMiddleware):
+    """
+    Проміжний обробник запитів бота, що завантажує користувачів пакета getUpdates.
+
+    Після кожного успішного getUpdates збирає Telegram ID авторів оновлень
+    і завантажує їх через UserService.prefetch. Результати зберігаються окремо
+    для кожного бота до отримання його наступного пакета: один обробник
+    підключається до сесій усіх ботів, і пакет одного бота не повинен
+    витісняти ще не видані дані іншого. Кожен користувач видається лише один
+    раз, тож наступні оновлення того ж користувача отримують актуальні дані
+    з кешу, а не знімок, зроблений до обробки попереднього оновлення.
+
+    Attributes:
+        user_service: Сервіс користувачів (встановлюється при запуску диспетчера)
+        batches: Кількість оброблених пакетів оновлень
+        prefetched: Кількість попередньо завантажених користувачів
+        used: Кількість користувачів, виданих оновленням з попереднього завантаження
+    """
+
+    __slots__ = ("user_service", "batches", "prefetched", "used", "_users")
+
+    def __init__(self) -> None:
+        """
+        Ініціалізує проміжний обробник без сервісу користувачів.
+        """
+        self.user_service: Optional[UserService] = None
+        self.batches = 0
+        self.prefetched = 0
+        self.used = 0
+        # ID бота -> попередньо завантажені користувачі його останнього пакета
+        self._users: dict[int, dict[int, UserDto]] = {}
+
+    def pop(self, bot_id: int, telegram_id: int) -> Optional[UserDto]:
+        """
+        Видає попередньо завантаженого користувача.
+
+        Args:
+            bot_id: ID бота, який отримав оновлення
+            telegram_id: ID користувача в Telegram
+
+        Returns:
+            DTO об'єкт користувача або None, якщо його не завантажено
+        """
+        users: Optional[dict[int, UserDto]] = self._users.get(bot_id)
+        if users is None:
+            return None
+        user: Optional[UserDto] = users.pop(telegram_id, None)
+        if user is not None:
+            self.used += 1
+        return user
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        """
+        Виконує запит і для getUpdates завантажує користувачів отриманого пакета.
+
+        Args:
+            make_request: Наступний обробник у ланцюжку запитів
+            bot: Бот, що виконує запит
+            method: Метод Telegram API
+
+        Returns:
+            Відповідь Telegram API без змін
+        """
+        response: Response[TelegramType] = await make_request(bot, method)
+        if isinstance(method, GetUpdates) and self.user_service is not None:
+            await self._prefetch(bot_id=bot.id, updates=response.result)
+        return response
+
+    async def _prefetch(self, bot_id: int, updates: Any) -> None:
+        """
+        Завантажує користувачів пакета оновлень.
+
+        Помилки лише логуються: без попереднього завантаження кожне оновлення
+        завантажить свого користувача самостійно.
+
+        Args:
+            bot_id: ID бота, який отримав пакет
+            updates: Список оновлень з відповіді getUpdates
+        """
+        if self.user_service is None or not updates:
+            return
+        telegram_ids: set[int] = set()
+        for update in updates:
+            if not isinstance(update, Update):
+                continue
+            user = UserContextMiddleware.resolve_event_context(event=update).user
+            if user is not None and not user.is_bot:
+                telegram_ids.add(user.id)
+        if not telegram_ids:
+            return
+
+        try:
+            users: dict[int, UserDto] = await self.user_service.prefetch(telegram_ids)
+        except Exception:
+            logger.exception("Failed to prefetch %d users", len(telegram_ids))
+            return
+        # Дані попереднього пакета цього бота на цей момент вже видані його оновленням
+        self._users[bot_id] = users
+        self.batches += 1
+        self.prefetched += len(users)
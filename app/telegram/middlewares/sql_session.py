@@ -0,0 +1,55 @@
+"""
+Модуль, що містить проміжний обробник спільної сесії SQL.
+
+Для кожного оновлення до контексту додається SQLSessionScope: сесія
+створюється лише при першому зверненні до бази даних, використовується
+спільно всіма сервісами та обробниками оновлення і закривається один раз
+після завершення його обробки.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Final, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.services.database import SQLSessionScope
+
+# Назва аргументу обробника, через який передається спільна сесія
+SQL_SCOPE_KEY: Final[str] = "sql_scope"
+
+
+class SQLSessionMiddleware(BaseMiddleware):
+    """
+    Проміжний обробник, що надає оновленню спільну сесію SQL.
+
+    Реєструється як зовнішній обробник оновлень, тож спільна сесія доступна
+    всім подальшим проміжним обробникам, фільтрам та обробникам.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Optional[Any]:
+        """
+        Додає до контексту спільну сесію та закриває її після обробки оновлення.
+
+        Args:
+            handler: Наступний обробник у ланцюжку
+            event: Об'єкт події Telegram
+            data: Словник з даними контексту
+
+        Returns:
+            Результат виконання наступного обробника
+        """
+        scope = data[SQL_SCOPE_KEY] = SQLSessionScope(session_pool=data["session_pool"])
+        try:
+            result: Optional[Any] = await handler(event, data)
+        except BaseException as error:
+            await scope.close(error)
+            raise
+        await scope.close()
+        return result
@@ -1,38 +1,271 @@
 """
-Модуль, що містить проміжний обробник для роботи з користувачами.
+Модуль, що містить проміжні обробники для роботи з користувачами.
 
 Цей модуль відповідає за отримання або створення користувачів у базі даних
-на основі даних, отриманих від Telegram API.
+на основі даних, отриманих від Telegram API. Користувач завантажується ліниво:
+лише для тих оновлень, обробники або фільтри яких дійсно його потребують.
 """
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Final, Optional
 
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.flags import get_flag
+from aiogram.filters import MagicData
 from aiogram.types import TelegramObject
 from aiogram.types import User as AiogramUser
-from aiogram_i18n import I18nMiddleware
+from aiogram_i18n import I18nContext, I18nMiddleware
 
+from app.enums import MiddlewareEventType
 from app.services.user import UserService
 from app.telegram.middlewares.event_typed import EventTypedMiddleware
+from app.telegram.middlewares.prefetch import UserPrefetchMiddleware
+from app.telegram.middlewares.sql_session import SQL_SCOPE_KEY
 from app.utils.logging import database as logger
+from app.utils.single_flight import SingleFlight
 
 if TYPE_CHECKING:
+    from aiogram_i18n.cores import BaseCore
+
     from app.models.dto.user import UserDto
 
+# Назва аргументу обробника або фільтра, через який передається користувач
+USER_KEY: Final[str] = "user"
+# Назва прапорця обробника, який вимагає завантажити користувача до перевірки фільтрів
+USER_FLAG: Final[str] = "user"
+# Назва прапорця обробника, який відповідає перекладеним текстом, але не приймає user:
+# мова інтерфейсу для нього визначається з профілю користувача після вибору обробника
+LOCALE_FLAG: Final[str] = "locale"
+
+
+class LazyUser:
+    """
+    Відкладене завантаження користувача в межах одного оновлення.
+
+    Зберігає все необхідне для отримання або створення користувача, але
+    звертається до Redis та бази даних лише при першому виклику get.
+    Повторні виклики повертають вже завантаженого користувача. Користувач,
+    завантажений заздалегідь разом з усім пакетом оновлень, видається без запитів.
+    """
+
+    __slots__ = ("user_service", "aiogram_user", "i18n_core", "_user")
+
+    def __init__(
+        self,
+        user_service: UserService,
+        aiogram_user: AiogramUser,
+        i18n_core: BaseCore[Any],
+        user: Optional[UserDto] = None,
+    ) -> None:
+        """
+        Ініціалізує відкладене завантаження користувача.
+
+        Args:
+            user_service: Сервіс для роботи з користувачами
+            aiogram_user: Об'єкт користувача Telegram з події
+            i18n_core: Ядро інтернаціоналізації для визначення мови нового користувача
+            user: Попередньо завантажений користувач, якщо він є
+        """
+        self.user_service = user_service
+        self.aiogram_user = aiogram_user
+        self.i18n_core = i18n_core
+        self._user = user
+
+    async def get(self) -> UserDto:
+        """
+        Отримує користувача з кешу або бази даних, створюючи його за потреби.
+
+        Returns:
+            DTO об'єкт користувача
+        """
+        if self._user is not None:
+            return self._user
+
+        # Новий користувач створюється тим самим запитом, без окремого пошуку перед вставкою
+        user, created = await self.user_service.get_or_create(
+            aiogram_user=self.aiogram_user,
+            i18n_core=self.i18n_core,
+        )
+        if created:
+            logger.info(
+                "New user in database: %s (%d)",
+                self.aiogram_user.full_name,
+                self.aiogram_user.id,
+            )
+        self._user = user
+        return user
+
+    def peek(self) -> Optional[UserDto]:
+        """
+        Повертає вже відомого користувача без запитів до Redis та бази даних.
+
+        Користувач шукається серед завантаженого заздалегідь (або вже завантаженого
+        через get) та в кеші процесу. Звернення не враховується політикою кешу,
+        тож не впливає на адаптивний час зберігання користувача.
+
+        Returns:
+            DTO об'єкт користувача або None, якщо його немає в пам'яті процесу
+        """
+        if self._user is not None:
+            return self._user
+        return self.user_service.redis.get_cached_user(key=self.aiogram_user.id)
+
+
+class UserResolverMiddleware(EventTypedMiddleware):
+    """
+    Проміжний обробник, який додає користувача до контексту лише за потреби.
+
+    Як внутрішній обробник (після фільтрів) завантажує користувача, якщо обраний
+    обробник приймає аргумент user. Як зовнішній обробник (до фільтрів) реєструється
+    лише для тих типів подій, фільтри яких приймають user або обробники яких
+    позначені прапорцем user, і тоді завантажує користувача для кожної такої події.
+
+    Мова інтерфейсу до завантаження користувача визначається лише з кешу процесу
+    (або з налаштувань Telegram). Обробник, що відповідає перекладеним текстом
+    без аргументу user, позначається прапорцем locale: тоді після вибору обробника
+    користувач завантажується, а мова узгоджується з його профілем.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Optional[Any]:
+        """
+        Завантажує користувача, якщо він потрібен, та передає подію далі.
+
+        Args:
+            handler: Наступний обробник у ланцюжку
+            event: Об'єкт події Telegram
+            data: Словник з даними контексту
+
+        Returns:
+            Результат виконання наступного обробника
+        """
+        lazy_user: Optional[LazyUser] = data.get("lazy_user")
+        if lazy_user is not None and USER_KEY not in data:
+            user: Optional[UserDto] = None
+            if self._is_required(data):
+                user = data[USER_KEY] = await lazy_user.get()
+            elif self._requires_locale(data):
+                user = await lazy_user.get()
+            # Мова інтерфейсу визначалася до завантаження користувача,
+            # тому узгоджуємо її з мовою з його профілю
+            i18n: Optional[I18nContext] = data.get("i18n")
+            if user is not None and i18n is not None:
+                i18n.locale = user.language
+        return await handler(event, data)
+
+    @staticmethod
+    def _is_required(data: dict[str, Any]) -> bool:
+        """
+        Перевіряє, чи потребує обраний обробник користувача.
+
+        Args:
+            data: Словник з даними контексту
+
+        Returns:
+            True, якщо користувача потрібно завантажити
+        """
+        handler: Optional[HandlerObject] = data.get("handler")
+        if handler is None:
+            # Зовнішній обробник реєструється лише для подій, яким користувач потрібен
+            return True
+        return handler.varkw or USER_KEY in handler.params
+
+    @staticmethod
+    def _requires_locale(data: dict[str, Any]) -> bool:
+        """
+        Перевіряє, чи позначений обраний обробник прапорцем locale.
+
+        Args:
+            data: Словник з даними контексту
+
+        Returns:
+            True, якщо мову інтерфейсу потрібно визначити з профілю користувача
+        """
+        handler: Optional[HandlerObject] = data.get("handler")
+        return handler is not None and bool(get_flag(handler, LOCALE_FLAG))
+
 
 class UserMiddleware(EventTypedMiddleware):
     """
     Проміжний обробник для роботи з користувачами.
-    
+
     Цей клас відповідає за:
-    1. Отримання даних користувача з бази даних за його Telegram ID
-    2. Створення нового користувача, якщо він не існує в базі даних
-    3. Додавання об'єкта користувача до контексту обробника
-    
+    1. Додавання сервісу користувачів до контексту обробника
+    2. Підготовку відкладеного завантаження користувача (без запитів до Redis та бази даних)
+    3. Реєстрацію UserResolverMiddleware, який додає користувача до контексту лише
+       для тих обробників та фільтрів, яким він потрібен
+
     Наслідує EventTypedMiddleware для автоматичної реєстрації на відповідні типи подій.
+
+    Attributes:
+        flight: Спільний для всіх оновлень реєстр завантажень користувачів, завдяки
+                якому конкурентні оновлення одного користувача не дублюють запити
+        resolver: Проміжний обробник, що завантажує користувача за потреби
+        prefetcher: Проміжний обробник запитів бота, що завантажує користувачів
+                    усього пакета getUpdates (у режимі polling)
     """
-    
+
+    def __init__(self) -> None:
+        """
+        Ініціалізує проміжний обробник зі спільним реєстром завантажень.
+        """
+        self.flight = SingleFlight()
+        self.resolver = UserResolverMiddleware()
+        self.prefetcher = UserPrefetchMiddleware()
+
+    def setup(self, dispatcher: Dispatcher) -> None:
+        """
+        Реєструє проміжні обробники користувачів у диспетчері.
+
+        Args:
+            dispatcher: Диспетчер, в якому реєструються проміжні обробники
+        """
+        dispatcher.update.outer_middleware(self)
+        self.resolver.setup_inner(dispatcher)
+        dispatcher.startup.register(self.startup)
+
+    async def startup(self, dispatcher: Dispatcher, bots: Optional[list[Bot]] = None) -> None:
+        """
+        Реєструє завантаження користувача до фільтрів для подій, які цього потребують.
+
+        Фільтри перевіряються до внутрішніх проміжних обробників, тому для типів
+        подій, фільтри яких приймають аргумент user або **kwargs (або обробники яких
+        позначені прапорцем user), користувач завантажується ще до перевірки фільтрів.
+        Фільтри MagicData оголошеного аргументу не мають: обробники з ними
+        позначаються прапорцем user.
+        У режимі polling також підключає попереднє завантаження користувачів
+        пакета getUpdates до сесій ботів.
+
+        Args:
+            dispatcher: Диспетчер з усіма підключеними маршрутизаторами
+            bots: Боти, що отримують оновлення через polling (у режимі webhook не передаються)
+        """
+        if bots and dispatcher["config"].common.users_prefetch:
+            self.prefetcher.user_service = UserService(
+                session_pool=dispatcher["session_pool"],
+                redis=dispatcher["redis"],
+                config=dispatcher["config"],
+                flight=self.flight,
+                writer=dispatcher.get("user_writer"),
+                cache_policy=dispatcher.get("user_cache_policy"),
+            )
+            for bot in bots:
+                if self.prefetcher not in bot.session.middleware:
+                    bot.session.middleware(self.prefetcher)
+
+        for event_type in self.resolver.__event_types__:
+            observer = dispatcher.observers[event_type]
+            if self.resolver in observer.outer_middleware:
+                continue
+            if _requires_user_before_filters(dispatcher, event_type):
+                observer.outer_middleware(self.resolver)
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
@@ -40,13 +273,13 @@ class UserMiddleware(EventTypedMiddleware):
         data: dict[str, Any],
     ) -> Optional[Any]:
         """
-        Обробляє подію та додає дані користувача до контексту.
-        
+        Додає до контексту сервіс користувачів та відкладене завантаження користувача.
+
         Args:
             handler: Наступний обробник у ланцюжку
             event: Об'єкт події Telegram
             data: Словник з даними контексту
-            
+
         Returns:
             Результат виконання наступного обробника
         """
@@ -63,20 +296,56 @@ class UserMiddleware(EventTypedMiddleware):
             session_pool=data["session_pool"],
             redis=data["redis"],
             config=data["config"],
+            flight=self.flight,
+            writer=data.get("user_writer"),
+            cache_policy=data.get("user_cache_policy"),
+            scope=data.get(SQL_SCOPE_KEY),
         )
 
-        # Спроба отримати користувача з бази даних за його Telegram ID
-        user: Optional[UserDto] = await user_service.by_tg_id(telegram_id=aiogram_user.id)
-        if user is None:
-            # Якщо користувач не знайдений, створюємо нового
-            i18n: I18nMiddleware = data["i18n_middleware"]
-            user = await user_service.create(aiogram_user=aiogram_user, i18n_core=i18n.core)
-            logger.info(
-                "New user in database: %s (%d)",
-                aiogram_user.full_name,
-                aiogram_user.id,
-            )
-
-        # Додаємо об'єкт користувача до контексту для використання в обробниках
-        data["user"] = user
+        # Користувач буде завантажений лише тоді, коли він знадобиться обробнику
+        i18n: I18nMiddleware = data["i18n_middleware"]
+        data["lazy_user"] = LazyUser(
+            user_service=user_service,
+            aiogram_user=aiogram_user,
+            i18n_core=i18n.core,
+            user=self.prefetcher.pop(bot_id=data["bot"].id, telegram_id=aiogram_user.id),
+        )
         return await handler(event, data)
+
+
+def _requires_user_before_filters(dispatcher: Dispatcher, event_type: MiddlewareEventType) -> bool:
+    """
+    Перевіряє, чи потрібен користувач фільтрам подій вказаного типу.
+
+    Args:
+        dispatcher: Диспетчер з усіма підключеними маршрутизаторами
+        event_type: Тип події
+
+    Фільтри, що приймають довільні іменовані аргументи (**kwargs), можуть
+    звертатися до user, тож теж вважаються такими, що його потребують.
+    Виняток - фільтр MagicData: він теж приймає **kwargs, але здебільшого
+    перевіряє інші дані контексту (як ADMIN_FILTER), тому не вимагає
+    користувача. Обробник з фільтром MagicData, що читає user (наприклад,
+    MagicData(F.user.blocked_at.is_(None))), має бути позначений прапорцем
+    user (flags={"user": True}), інакше фільтр не побачить користувача.
+
+    Returns:
+        True, якщо хоча б один фільтр приймає аргумент user (або **kwargs)
+        або хоча б один обробник позначений прапорцем user
+    """
+    for router in dispatcher.chain_tail:
+        observer = router.observers.get(event_type)
+        if observer is None:
+            continue
+        # Глобальні фільтри маршрутизатора та фільтри окремих обробників
+        # noinspection PyProtectedMember
+        handlers: list[HandlerObject] = [observer._handler, *observer.handlers]
+        for handler_object in handlers:
+            if get_flag(handler_object, USER_FLAG):
+                return True
+            for filter_ in handler_object.filters or ():
+                if USER_KEY in filter_.params:
+                    return True
+                if filter_.varkw and not isinstance(filter_.callback, MagicData):
+                    return True
+    return False
@@ -6,11 +6,84 @@
 """
 
 from enum import Enum
-from typing import TYPE_CHECKING, Any, ClassVar, Optional
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Optional, Union
 from uuid import UUID
 
 from pydantic import BaseModel
 
+# Функція швидкого пакування: значення полів і прапорець "значення вже валідовані"
+# -> ключ або None, якщо значення потребують звичайного шляху через модель
+KeyPacker = Callable[[dict[str, Any], bool], Optional[str]]
+
+# Типи значень, які пакуються напряму (str(value) збігається з кодуванням моделі)
+_PLAIN_TYPES: frozenset[type] = frozenset((int, str))
+# Типи сирих значень, які поле з відповідною анотацією приймає без перетворення,
+# тому ключ з такими значеннями можна сформувати без створення моделі
+_FAST_TYPES: dict[Any, frozenset[type]] = {
+    Any: _PLAIN_TYPES,
+    int: frozenset((int,)),
+    str: frozenset((str,)),
+}
+
+
+def _check_part(name: str, encoded: str, separator: str, tagged: bool) -> str:
+    """
+    Перевіряє закодоване значення поля та за потреби обгортає його хеш-тегом.
+    
+    Args:
+        name: Назва поля
+        encoded: Закодоване значення
+        separator: Символ-розділювач
+        tagged: Чи є поле хеш-тегом ключа
+        
+    Returns:
+        Частина ключа
+        
+    Raises:
+        ValueError: Якщо значення містить розділювач, а значення хеш-тегу - фігурні дужки
+    """
+    if separator in encoded:
+        raise ValueError(
+            f"Separator symbol {separator!r} can not be used "
+            f"in value {name}={encoded!r}"
+        )
+    if not tagged:
+        return encoded
+    if "{" in encoded or "}" in encoded:
+        raise ValueError(f"Braces can not be used in hash tag value {name}={encoded!r}")
+    return "{" + encoded + "}"
+
+
+def _compile_packer(
+    head: str,
+    separator: str,
+    fields: tuple[tuple[str, frozenset[type]], ...],
+    hash_tag: Optional[str] = None,
+) -> KeyPacker:
+    """
+    Створює функцію швидкого пакування для схеми ключа.
+    
+    Args:
+        head: Префікс разом з розділювачем (або порожній рядок)
+        separator: Символ-розділювач
+        fields: Назви полів у порядку пакування та типи сирих значень,
+                які поле приймає без перетворення
+        hash_tag: Назва поля, значення якого обгортається хеш-тегом
+                
+    Returns:
+        Функція швидкого пакування
+    """
+    def packer(values: dict[str, Any], validated: bool) -> Optional[str]:
+        parts: list[str] = []
+        for name, fast_types in fields:
+            value: Any = values.get(name)
+            if type(value) not in (_PLAIN_TYPES if validated else fast_types):
+                return None
+            parts.append(_check_part(name, str(value), separator, name == hash_tag))
+        return head + separator.join(parts)
+
+    return packer
+
 
 class StorageKey(BaseModel):
     """
@@ -20,9 +93,25 @@ class StorageKey(BaseModel):
     з підтримкою префіксів та розділювачів. Ключі формуються на основі
     полів моделі та можуть бути серіалізовані в рядок.
     
+    У Redis Cluster ключі розподіляються між вузлами за хешем ключа. Щоб
+    пов'язані ключі різних типів потрапляли в один слот (і їх можна було
+    використовувати разом у конвеєрі, скрипті чи MGET), значення одного
+    з полів можна обгорнути хеш-тегом: тоді слот обчислюється лише за ним.
+    Спільний для всіх ключів типу хеш-тег можна вказати прямо в префіксі
+    (наприклад, prefix="{users}"), але тоді всі вони потраплять на один вузол.
+    
     Attributes:
         __separator__: Символ-розділювач для частин ключа (за замовчуванням ":")
         __prefix__: Необов'язковий префікс для всіх ключів цього типу
+        __hash_tag__: Необов'язкова назва поля, значення якого обгортається
+                      хеш-тегом ({значення})
+    
+    Examples:
+        >>> class DialogKey(StorageKey, prefix="dialog", hash_tag="user_id"):
+        ...     user_id: int
+        ...     step: str
+        >>> DialogKey.pack_raw(user_id=42, step="name")
+        'dialog:{42}:name'
     """
     
     if TYPE_CHECKING:
@@ -30,6 +119,12 @@ class StorageKey(BaseModel):
         """Символ-розділювач даних (за замовчуванням :code:`:`)"""
         __prefix__: ClassVar[Optional[str]]
         """Префікс ключа зберігання"""
+        __hash_tag__: ClassVar[Optional[str]]
+        """Назва поля, значення якого визначає слот Redis Cluster"""
+
+        @staticmethod
+        def __key_packer__(values: dict[str, Any], validated: bool) -> Optional[str]:
+            """Попередньо скомпільована функція швидкого пакування ключа"""
 
     # noinspection PyMethodOverriding
     def __init_subclass__(cls, **kwargs: Any) -> None:
@@ -43,12 +138,14 @@ class StorageKey(BaseModel):
             **kwargs: Параметри для налаштування підкласу
                 separator: Символ-розділювач (за замовчуванням ":")
                 prefix: Префікс для ключів (за замовчуванням None)
+                hash_tag: Назва поля для хеш-тегу (за замовчуванням None)
                 
         Raises:
             ValueError: Якщо розділювач міститься в префіксі
         """
         cls.__separator__ = kwargs.pop("separator", ":")
         cls.__prefix__ = kwargs.pop("prefix", None)
+        cls.__hash_tag__ = kwargs.pop("hash_tag", None)
         if cls.__separator__ in (cls.__prefix__ or ""):
             raise ValueError(
                 f"Separator symbol {cls.__separator__!r} can not be used "
@@ -56,6 +153,37 @@ class StorageKey(BaseModel):
             )
         super().__init_subclass__(**kwargs)
 
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        """
+        Компілює функцію пакування ключа підкласу після створення його полів.
+        
+        Поля моделі стають відомими лише після __init_subclass__, тому схема
+        ключа (початок ключа та порядок полів) обчислюється тут один раз для класу.
+        
+        Args:
+            **kwargs: Параметри підкласу
+            
+        Raises:
+            ValueError: Якщо поле хеш-тегу не є полем моделі
+        """
+        super().__pydantic_init_subclass__(**kwargs)
+        if cls.__hash_tag__ is not None and cls.__hash_tag__ not in cls.model_fields:
+            raise ValueError(
+                f"Hash tag field {cls.__hash_tag__!r} is not a field of {cls.__name__}"
+            )
+        cls.__key_packer__ = staticmethod(  # type: ignore[assignment]
+            _compile_packer(
+                head=f"{cls.__prefix__}{cls.__separator__}" if cls.__prefix__ else "",
+                separator=cls.__separator__,
+                fields=tuple(
+                    (name, _FAST_TYPES.get(field.annotation, frozenset()))
+                    for name, field in cls.model_fields.items()
+                ),
+                hash_tag=cls.__hash_tag__,
+            )
+        )
+
     @classmethod
     def encode_value(cls, value: Any) -> str:
         """
@@ -79,26 +207,79 @@ class StorageKey(BaseModel):
             return str(int(value))
         return str(value)
 
+    @classmethod
+    def pack_raw(cls, **values: Any) -> str:
+        """
+        Формує ключ з сирих значень полів без створення моделі.
+        
+        Якщо кожне значення має тип, який поле приймає без перетворення
+        (наприклад, int для поля Any або int), ключ формується одразу.
+        Інакше створюється модель, тож валідація та результат збігаються
+        з cls(**values).pack().
+        
+        Args:
+            **values: Значення полів ключа
+            
+        Returns:
+            str: Повний ключ для зберігання
+            
+        Raises:
+            ValueError: Якщо значення не проходять валідацію моделі
+                        або містять символ-розділювач
+            
+        Examples:
+            >>> UserKey.pack_raw(key=123456789)
+            'users:123456789'
+        """
+        key: Optional[str] = cls.__key_packer__(values, False)
+        if key is None:
+            return cls(**values).pack()
+        return key
+
     def pack(self) -> str:
         """
         Упаковує всі поля моделі в єдиний рядок-ключ.
         
         Формує ключ, об'єднуючи префікс та закодовані значення полів
-        за допомогою розділювача.
+        за допомогою розділювача. Якщо всі значення мають тип int або str,
+        ключ формується напряму, без серіалізації моделі.
         
         Returns:
             str: Повний ключ для зберігання
             
         Raises:
             ValueError: Якщо будь-яке значення містить символ-розділювач
+                        або значення хеш-тегу містить фігурні дужки
         """
+        key: Optional[str] = self.__key_packer__(self.__dict__, True)
+        if key is not None:
+            return key
+        
         result = [self.__prefix__] if self.__prefix__ else []
         for key, value in self.model_dump(mode="json").items():
-            encoded = self.encode_value(value)
-            if self.__separator__ in encoded:
-                raise ValueError(
-                    f"Separator symbol {self.__separator__!r} can not be used "
-                    f"in value {key}={encoded!r}"
+            result.append(
+                _check_part(
+                    key,
+                    self.encode_value(value),
+                    self.__separator__,
+                    key == self.__hash_tag__,
                 )
-            result.append(encoded)
+            )
         return self.__separator__.join(result)
+
+
+# Ключ зберігання: модель ключа або вже упакований рядок
+StorageKeyLike = Union[StorageKey, str]
+
+
+def pack_key(key: StorageKeyLike) -> str:
+    """
+    Повертає упакований ключ зберігання.
+    
+    Args:
+        key: Модель ключа або вже упакований рядок
+        
+    Returns:
+        str: Повний ключ для зберігання
+    """
+    return key if isinstance(key, str) else key.pack()
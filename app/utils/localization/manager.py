@@ -14,6 +14,7 @@ from aiogram_i18n.managers import BaseManager
 
 if TYPE_CHECKING:
     from app.models.dto.user import UserDto
+    from app.telegram.middlewares.user import LazyUser
 
 
 class UserManager(BaseManager):
@@ -30,6 +31,7 @@ class UserManager(BaseManager):
         self,
         event_from_user: Optional[AiogramUser] = None,
         user: Optional[UserDto] = None,
+        lazy_user: Optional[LazyUser] = None,
     ) -> str:
         """
         Отримує мовний код для користувача.
@@ -39,14 +41,24 @@ class UserManager(BaseManager):
         2. Мова з налаштувань Telegram користувача (якщо доступна)
         3. Мова за замовчуванням з конфігурації бота
         
+        Мова визначається для кожного оновлення ще до вибору обробника, а
+        користувач завантажується ліниво. Тому профіль шукається лише серед
+        завантажених заздалегідь користувачів та в кеші процесу, без запитів
+        до Redis чи бази даних. Для обробників, які приймають user або позначені
+        прапорцем locale, UserResolverMiddleware після вибору обробника
+        узгоджує мову з профілем користувача.
+        
         Args:
             event_from_user: Об'єкт користувача Telegram з події
             user: Об'єкт користувача з бази даних
+            lazy_user: Відкладене завантаження користувача поточного оновлення
             
         Returns:
             str: Код мови для використання в повідомленнях
         """
         locale: Optional[str] = None
+        if user is None and lazy_user is not None:
+            user = lazy_user.peek()
         if user is not None:
             # Спочатку перевіряємо мову з профілю користувача
             locale = user.language
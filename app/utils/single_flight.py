@@ -0,0 +1,87 @@
+"""
+Модуль для об'єднання однакових конкурентних запитів.
+
+Цей модуль містить реалізацію патерну "single flight": якщо кілька
+корутин одночасно запитують дані за одним і тим самим ключем, реальне
+завантаження виконується лише один раз, а всі учасники отримують спільний результат.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+# Типовий параметр для результату завантаження
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Об'єднує конкурентні виклики з однаковим ключем в одне завантаження.
+
+    Завантаження виконується в окремій задачі, тому скасування будь-якого
+    з очікувачів (включно з тим, хто його запустив) не перериває завантаження
+    для інших учасників. Після завершення задачі ключ звільняється, тож
+    наступні виклики виконують нове завантаження.
+
+    Attributes:
+        calls: Кількість запущених завантажень
+        shared: Кількість викликів, які приєдналися до вже запущеного завантаження
+    """
+
+    __slots__ = ("calls", "shared", "_flights")
+
+    def __init__(self) -> None:
+        """
+        Ініціалізує порожній реєстр завантажень.
+        """
+        self.calls = 0
+        self.shared = 0
+        self._flights: dict[Hashable, asyncio.Task[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Виконує завантаження або приєднується до вже запущеного.
+
+        Args:
+            key: Ключ, за яким об'єднуються виклики
+            func: Функція без аргументів, що повертає корутину завантаження
+
+        Returns:
+            Результат завантаження (спільний для всіх учасників)
+
+        Raises:
+            Exception: Виняток, що виник під час завантаження, отримують усі учасники
+        """
+        task: asyncio.Task[Any]
+        if key in self._flights:
+            task = self._flights[key]
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(func())
+            self._flights[key] = task
+            self.calls += 1
+            task.add_done_callback(lambda _: self._release(key, task))
+        # shield захищає спільну задачу від скасування одним з очікувачів
+        result: T = await asyncio.shield(task)
+        return result
+
+    def _release(self, key: Hashable, task: asyncio.Task[Any]) -> None:
+        """
+        Звільняє ключ після завершення завантаження.
+
+        Args:
+            key: Ключ завантаження
+            task: Задача, що завершилася
+        """
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Позначаємо виняток як отриманий, навіть якщо всі очікувачі були скасовані
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,167 @@
+"""
+Модуль з обмеженим кешем у пам'яті процесу.
+
+Цей модуль містить простий LRU-кеш з часом життя записів (TTL), який
+використовується як перший рівень кешування перед Redis, щоб часті
+звернення до одних і тих самих даних обслуговувалися без мережевих запитів.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Generic, Hashable, Optional, TypeVar
+
+# Типові параметри для ключів та значень кешу
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    LRU-кеш з обмеженим розміром та часом життя записів.
+
+    Записи видаляються з кешу у двох випадках: коли минув їх час життя
+    (перевіряється при зверненні) або коли кеш переповнений (видаляється
+    запис, до якого найдовше не зверталися). Кеш веде лічильники влучань,
+    промахів та витіснень для моніторингу ефективності.
+
+    Attributes:
+        maxsize: Максимальна кількість записів у кеші
+        ttl: Час життя запису в секундах
+        hits: Кількість успішних звернень до кешу
+        misses: Кількість звернень, для яких запис не знайдено або він застарів
+        evictions: Кількість записів, витіснених через переповнення кешу
+        expirations: Кількість записів, видалених через завершення часу життя
+    """
+
+    __slots__ = (
+        "maxsize",
+        "ttl",
+        "hits",
+        "misses",
+        "evictions",
+        "expirations",
+        "_data",
+    )
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """
+        Ініціалізує кеш з вказаними обмеженнями.
+
+        Args:
+            maxsize: Максимальна кількість записів у кеші
+            ttl: Час життя запису в секундах
+
+        Raises:
+            ValueError: Якщо розмір або час життя не є додатними
+        """
+        if maxsize <= 0:
+            raise ValueError(f"Cache maxsize must be positive, got {maxsize!r}")
+        if ttl <= 0:
+            raise ValueError(f"Cache ttl must be positive, got {ttl!r}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Значення зберігаються разом з моментом завершення їх життя
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        entry: Optional[tuple[float, V]] = self._data.get(key)
+        return entry is not None and entry[0] > monotonic()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Повертає частку успішних звернень до кешу.
+
+        Returns:
+            float: Значення від 0 до 1 або 0, якщо звернень ще не було
+        """
+        total: int = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def metrics(self) -> dict[str, float]:
+        """
+        Повертає знімок лічильників кешу.
+
+        Returns:
+            Словник з назвами та значеннями метрик
+        """
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Отримує значення з кешу.
+
+        Застарілий запис видаляється і вважається промахом.
+
+        Args:
+            key: Ключ запису
+
+        Returns:
+            Збережене значення або None, якщо запис відсутній чи застарів
+        """
+        entry: Optional[tuple[float, V]] = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= monotonic():
+            # Час життя запису минув
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        # Позначаємо запис як нещодавно використаний
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Зберігає значення в кеші.
+
+        Якщо кеш переповнений, витісняються записи, до яких найдовше не зверталися.
+
+        Args:
+            key: Ключ запису
+            value: Значення для збереження
+            ttl: Індивідуальний час життя запису (за замовчуванням - ttl кешу)
+        """
+        self._data[key] = (monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K) -> Optional[V]:
+        """
+        Видаляє запис з кешу.
+
+        Args:
+            key: Ключ запису
+
+        Returns:
+            Видалене значення або None, якщо запису не було
+        """
+        entry: Optional[tuple[float, V]] = self._data.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """
+        Очищує кеш без скидання лічильників.
+        """
+        self._data.clear()
@@ -0,0 +1,143 @@
+"""
+Швидка перевірка актуальності схеми бази даних перед запуском бота.
+
+Порівнює ревізії в таблиці alembic_version з головними ревізіями файлів
+migrations/versions без завантаження середовища міграцій (env.py, моделей
+та двигуна SQLAlchemy). Файли міграцій розбираються як синтаксичне дерево
+без виконання, а база даних опитується одним запитом через asyncpg.
+
+Код завершення 0 означає, що схема актуальна, 1 - що потрібно виконати
+міграції (або перевірити стан не вдалося):
+    python -m migrations._check_revision || alembic upgrade head
+"""
+
+import ast
+import asyncio
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from sys import argv
+from typing import Any, Final, Optional
+
+import asyncpg
+
+from app.models.config.env import PostgresConfig
+
+# Шлях до директорії з міграціями за замовчуванням
+_DEFAULT_PATH: Final[str] = "./migrations/versions"
+# Час очікування з'єднання з базою даних (в секундах)
+_CONNECT_TIMEOUT: Final[float] = 5
+
+
+def _read_identifiers(path: Path) -> tuple[Optional[str], tuple[str, ...]]:
+    """
+    Зчитує ідентифікатор ревізії та попередні ревізії з файлу міграції.
+
+    Args:
+        path: Шлях до файлу міграції
+
+    Returns:
+        Ідентифікатор ревізії (або None, якщо файл не є міграцією)
+        та ідентифікатори попередніх ревізій
+    """
+    values: dict[str, Any] = {}
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        target: ast.expr
+        value: Optional[ast.expr]
+        if isinstance(node, ast.AnnAssign):
+            target, value = node.target, node.value
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target, value = node.targets[0], node.value
+        else:
+            continue
+        if isinstance(target, ast.Name) and value is not None:
+            if target.id in ("revision", "down_revision"):
+                values[target.id] = ast.literal_eval(value)
+    down_revision: Any = values.get("down_revision")
+    if down_revision is None:
+        down_revisions: tuple[str, ...] = ()
+    elif isinstance(down_revision, str):
+        down_revisions = (down_revision,)
+    else:
+        # Міграція злиття гілок має кілька попередніх ревізій
+        down_revisions = tuple(down_revision)
+    return values.get("revision"), down_revisions
+
+
+def get_head_revisions(path: Path) -> set[str]:
+    """
+    Визначає головні ревізії міграцій: ревізії, від яких не залежить жодна інша.
+
+    Args:
+        path: Шлях до директорії з файлами міграцій
+
+    Returns:
+        Множина ідентифікаторів головних ревізій
+    """
+    revisions: set[str] = set()
+    parents: set[str] = set()
+    for file in path.glob("*.py"):
+        revision, down_revisions = _read_identifiers(path=file)
+        if revision is not None:
+            revisions.add(revision)
+            parents.update(down_revisions)
+    return revisions - parents
+
+
+async def get_current_revisions() -> set[str]:
+    """
+    Отримує поточні ревізії бази даних з таблиці alembic_version.
+
+    Returns:
+        Множина ідентифікаторів ревізій (порожня, якщо міграції ще не виконувалися)
+    """
+    # noinspection PyArgumentList
+    config: PostgresConfig = PostgresConfig()
+    connection: Any = await asyncpg.connect(
+        host=config.host,
+        port=config.port,
+        user=config.user,
+        password=config.password.get_secret_value(),
+        database=config.db,
+        timeout=_CONNECT_TIMEOUT,
+    )
+    try:
+        # to_regclass повертає NULL, якщо таблиці ще немає
+        if await connection.fetchval("SELECT to_regclass('alembic_version')") is None:
+            return set()
+        rows: list[Any] = await connection.fetch("SELECT version_num FROM alembic_version")
+        return {row[0] for row in rows}
+    finally:
+        await connection.close()
+
+
+def main() -> int:
+    """
+    Головна функція: порівнює ревізії бази даних з головними ревізіями міграцій.
+
+    Returns:
+        0, якщо схема бази даних актуальна, інакше 1
+    """
+    # Створюємо парсер аргументів командного рядка
+    parser: ArgumentParser = ArgumentParser()
+    # Додаємо опцію для вказання шляху до директорії з міграціями
+    parser.add_argument("-p", "--path", dest="path", type=Path, default=_DEFAULT_PATH)
+    # Парсимо аргументи командного рядка
+    namespace: Namespace = parser.parse_args(argv[1:])
+    heads: set[str] = get_head_revisions(path=namespace.path)
+    try:
+        current: set[str] = asyncio.run(get_current_revisions())
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as error:
+        # Стан не вдалося перевірити: вирішувати (і повідомляти про помилку) буде alembic
+        print(f"Unable to check database revision: {error!r}")  # noqa: T201
+        return 1
+    if current != heads:
+        print(  # noqa: T201
+            f"Database revision {', '.join(sorted(current)) or 'none'} "
+            f"differs from head {', '.join(sorted(heads))}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
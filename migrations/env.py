@@ -1,8 +1,9 @@
 import asyncio
+from typing import Final
 
 from alembic import context
 from alembic.config import Config
-from sqlalchemy import URL, MetaData
+from sqlalchemy import URL, MetaData, text
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
@@ -24,6 +25,10 @@ setup_logger()
 # target_metadata = mymodel.Base.metadata
 target_metadata: MetaData = Base.metadata
 
+# Ключ advisory lock, під яким виконуються міграції: при одночасному запуску
+# кількох реплік міграції застосовує лише одна, решта чекає на її завершення
+_MIGRATIONS_LOCK_ID: Final[int] = 7_263_915_408_112
+
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -64,6 +69,14 @@ def do_run_migrations(connection: Connection) -> None:
     context.configure(connection=connection, target_metadata=target_metadata)
 
     with context.begin_transaction():
+        # Блокування на рівні транзакції знімається при її завершенні (також за
+        # PgBouncer у режимі transaction pooling). Поточну ревізію alembic читає
+        # вже після отримання блокування, тож репліка, що дочекалася його,
+        # не застосовує міграції повторно
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_id)"),
+            {"lock_id": _MIGRATIONS_LOCK_ID},
+        )
         context.run_migrations()
 
 
@@ -0,0 +1,201 @@
+"""
+Порівняння швидкодії запитів до користувачів через ORM та через підготовлені запити asyncpg.
+
+Для кожного запиту (за Telegram ID, за ID, отримання або створення, оновлення)
+вимірюється час виконання в окремому SQLSessionContext - так само, як його
+виконує UserService. Для бенчмарку створюється тимчасовий користувач,
+який видаляється після завершення.
+
+Запуск з кореня проєкту (потрібні налаштування PostgreSQL з .env):
+    python -m scripts.benchmark_user_queries -n 5000
+"""
+
+import asyncio
+from argparse import ArgumentParser, Namespace
+from statistics import mean, quantiles
+from sys import argv
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Final
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.factory import create_app_config, create_session_pool
+from app.models.config import AppConfig
+from app.models.dto.user import UserDto
+from app.services.database import SQLSessionContext
+from app.services.database.sql.repositories import Repository
+
+# Кількість запитів за замовчуванням для кожного випадку
+_DEFAULT_ITERATIONS: Final[int] = 2000
+# Telegram ID тимчасового користувача (від'ємних ID у Telegram немає)
+_DEFAULT_TELEGRAM_ID: Final[int] = -1
+
+# Запит бенчмарку: отримує репозиторій та DTO тимчасового користувача
+Query = Callable[[Repository, UserDto], Awaitable[Any]]
+
+
+async def _orm_by_tg_id(repository: Repository, user: UserDto) -> Any:
+    """Отримує користувача за Telegram ID через ORM та перетворює його в DTO."""
+    return (await repository.users.by_tg_id(user.telegram_id)).dto()  # type: ignore[union-attr]
+
+
+async def _orm_get(repository: Repository, user: UserDto) -> Any:
+    """Отримує користувача за ID через ORM та перетворює його в DTO."""
+    return (await repository.users.get(user.id)).dto()  # type: ignore[union-attr]
+
+
+async def _orm_get_or_create(repository: Repository, user: UserDto) -> Any:
+    """Отримує наявного користувача через INSERT ... ON CONFLICT DO NOTHING та SELECT (ORM)."""
+    instance, _ = await repository.users.get_or_create(
+        telegram_id=user.telegram_id,
+        name=user.name,
+        language=user.language,
+        language_code=user.language_code,
+    )
+    return instance.dto()
+
+
+async def _orm_update(repository: Repository, user: UserDto) -> Any:
+    """Оновлює ім'я користувача тим самим значенням через ORM."""
+    return await repository.users.update(user_id=user.id, name=user.name)
+
+
+async def _raw_by_tg_id(repository: Repository, user: UserDto) -> Any:
+    """Отримує користувача за Telegram ID підготовленим запитом asyncpg."""
+    return await repository.raw_users.by_tg_id(user.telegram_id)
+
+
+async def _raw_get(repository: Repository, user: UserDto) -> Any:
+    """Отримує користувача за ID підготовленим запитом asyncpg."""
+    return await repository.raw_users.get(user.id)
+
+
+async def _raw_get_or_create(repository: Repository, user: UserDto) -> Any:
+    """Отримує наявного користувача через INSERT ... ON CONFLICT DO NOTHING та SELECT."""
+    return await repository.raw_users.get_or_create(
+        telegram_id=user.telegram_id,
+        name=user.name,
+        language=user.language,
+        language_code=user.language_code,
+    )
+
+
+async def _raw_update(repository: Repository, user: UserDto) -> Any:
+    """Оновлює ім'я користувача тим самим значенням підготовленим запитом asyncpg."""
+    return await repository.raw_users.update(user_id=user.id, name=user.name)
+
+
+# Назва випадку -> (запит через ORM, запит через asyncpg)
+_CASES: Final[dict[str, tuple[Query, Query]]] = {
+    "by_tg_id": (_orm_by_tg_id, _raw_by_tg_id),
+    "get": (_orm_get, _raw_get),
+    "get_or_create": (_orm_get_or_create, _raw_get_or_create),
+    "update": (_orm_update, _raw_update),
+}
+
+
+async def measure(
+    session_pool: async_sessionmaker[AsyncSession],
+    query: Query,
+    user: UserDto,
+    iterations: int,
+) -> list[float]:
+    """
+    Виконує запит вказану кількість разів, кожен раз у новому контексті сесії.
+
+    Args:
+        session_pool: Пул асинхронних сесій SQLAlchemy
+        query: Запит бенчмарку
+        user: DTO тимчасового користувача
+        iterations: Кількість виконань
+
+    Returns:
+        Тривалість кожного виконання в секундах
+    """
+    timings: list[float] = []
+    for _ in range(iterations):
+        started: float = perf_counter()
+        async with SQLSessionContext(session_pool) as (repository, uow):
+            await query(repository, user)
+        timings.append(perf_counter() - started)
+    return timings
+
+
+def report(name: str, path: str, timings: list[float]) -> None:
+    """
+    Виводить рядок результатів: запитів за секунду, середню, медіанну та p99 тривалість.
+
+    Args:
+        name: Назва випадку
+        path: Назва шляху виконання (orm або asyncpg)
+        timings: Тривалість кожного виконання в секундах
+    """
+    percentiles: list[float] = quantiles(timings, n=100)
+    print(  # noqa: T201
+        f"{name:<14} {path:<8} {len(timings) / sum(timings):>10.0f} "
+        f"{mean(timings) * 1000:>9.3f} {percentiles[49] * 1000:>9.3f} "
+        f"{percentiles[98] * 1000:>9.3f}"
+    )
+
+
+async def run(iterations: int, telegram_id: int) -> None:
+    """
+    Створює тимчасового користувача, виконує всі випадки обома шляхами та видаляє його.
+
+    Args:
+        iterations: Кількість виконань кожного запиту
+        telegram_id: Telegram ID тимчасового користувача
+    """
+    config: AppConfig = create_app_config()
+    session_pool: async_sessionmaker[AsyncSession] = create_session_pool(config=config)
+    engine: AsyncEngine = session_pool.kw["bind"]
+    try:
+        async with SQLSessionContext(session_pool) as (repository, uow):
+            instance, _ = await repository.users.get_or_create(
+                telegram_id=telegram_id,
+                name="Benchmark",
+                language="en",
+                language_code="en",
+            )
+        user: UserDto = instance.dto()
+
+        print(  # noqa: T201
+            f"{'query':<14} {'path':<8} {'ops/s':>10} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}"
+        )
+        for name, (orm_query, raw_query) in _CASES.items():
+            for path, query in (("orm", orm_query), ("asyncpg", raw_query)):
+                # Розігрів: з'єднання пулу та підготовлені запити
+                await measure(session_pool, query, user, min(iterations, 100))
+                report(name, path, await measure(session_pool, query, user, iterations))
+
+        async with SQLSessionContext(session_pool) as (repository, uow):
+            await repository.users.delete(user_id=user.id)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """
+    Головна функція: розбирає аргументи командного рядка та запускає бенчмарк.
+    """
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        dest="iterations",
+        type=int,
+        default=_DEFAULT_ITERATIONS,
+    )
+    parser.add_argument(
+        "-t",
+        "--telegram-id",
+        dest="telegram_id",
+        type=int,
+        default=_DEFAULT_TELEGRAM_ID,
+    )
+    namespace: Namespace = parser.parse_args(argv[1:])
+    asyncio.run(run(iterations=namespace.iterations, telegram_id=namespace.telegram_id))
+
+
+if __name__ == "__main__":
+    main()
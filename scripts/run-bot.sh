@@ -2,14 +2,16 @@
 # 
 # Скрипт для запуску Telegram бота.
 # 
-# Цей скрипт виконує міграції бази даних та запускає бота
-# з оптимізацією Python для продуктивності.
+# Цей скрипт виконує міграції бази даних (якщо схема застаріла) та запускає
+# бота з оптимізацією Python для продуктивності.
 
 # Зупинка скрипта при помилці
 set -e
 
-# Виконання міграцій бази даних перед запуском бота
-alembic upgrade head
+# Швидка перевірка ревізії бази даних без завантаження середовища міграцій;
+# міграції виконуються лише для застарілої схеми (під advisory lock у env.py,
+# тож при одночасному запуску кількох реплік їх застосовує лише одна)
+python -m migrations._check_revision || alembic upgrade head
 
 # Запуск бота з оптимізацією Python (-O)
 # -O вимикає assert та __debug__
@@ -0,0 +1,136 @@
+"""
+Тести кешування на стороні клієнта з інвалідацією сервером Redis.
+
+Сервер Redis не потрібен: з'єднання-замінник передає справжньому парсеру RESP3
+redis-py байти, які надіслав би сервер, тож перевіряється саме той шлях
+обробки push-повідомлень, на який спирається ClientTracking.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Optional, cast
+
+from redis._parsers import Encoder
+from redis.asyncio import Redis
+
+from app.services.database.redis.tracking import ClientTracking, supported
+from app.utils.ttl_cache import TTLCache
+
+
+class _StubConnection:
+    """З'єднання-замінник, відповіді «сервера» якого записуються в потік вручну."""
+
+    instances: list[_StubConnection] = []
+
+    def __init__(self, parser_class: Any, **kwargs: Any) -> None:
+        self.kwargs = kwargs
+        self.commands: list[tuple[Any, ...]] = []
+        self.encoder: Encoder = Encoder("utf-8", "strict", False)  # type: ignore[no-untyped-call]
+        self._reader: asyncio.StreamReader = asyncio.StreamReader()
+        self._parser: Any = parser_class(socket_read_size=65536)
+        _StubConnection.instances.append(self)
+
+    async def connect(self) -> None:
+        self._parser.on_connect(self)
+
+    async def disconnect(self, nowait: bool = False) -> None:
+        self._reader.feed_eof()
+
+    async def send_command(self, *args: Any) -> None:
+        self.commands.append(args)
+        self._reader.feed_data(b"+OK\r\n")
+
+    async def read_response(self, push_request: bool = False) -> Any:
+        return await self._parser.read_response(push_request=push_request)
+
+    def push(self, *keys: str) -> None:
+        """
+        Надсилає повідомлення про інвалідацію ключів у форматі RESP3.
+
+        Args:
+            *keys: Упаковані ключі Redis
+        """
+        data: bytes = b">2\r\n$10\r\ninvalidate\r\n" + f"*{len(keys)}\r\n".encode()
+        for key in keys:
+            data += f"${len(key)}\r\n{key}\r\n".encode()
+        self._reader.feed_data(data)
+
+
+async def _wait_for(condition: Any) -> None:
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition was not met")
+
+
+def test_redis_py_internals_are_available() -> None:
+    assert supported()
+
+
+def test_invalidation_push_evicts_local_entries() -> None:
+    cache: TTLCache[str, Any] = TTLCache(maxsize=10, ttl=60)
+    other: TTLCache[str, Any] = TTLCache(maxsize=10, ttl=60)
+    client: Any = SimpleNamespace(
+        connection_pool=SimpleNamespace(connection_class=_StubConnection, connection_kwargs={})
+    )
+    tracking: ClientTracking = ClientTracking(
+        client=cast(Redis, client),
+        prefixes=["user:"],
+        cache=cache,
+    )
+    tracking.attach(other)
+
+    async def main() -> None:
+        _StubConnection.instances.clear()
+        await tracking.start()
+        await _wait_for(lambda: tracking.active)
+        connection: _StubConnection = _StubConnection.instances[-1]
+        assert connection.commands == [("CLIENT", "TRACKING", "ON", "BCAST", "PREFIX", "user:")]
+        assert tracking.tracks("user:1")
+        assert not tracking.tracks("other:1")
+
+        cache.set("user:1", b"first")
+        cache.set("user:2", b"second")
+        other.set("user:1", "first")
+        invalidations: int = tracking.invalidations
+        connection.push("user:1")
+        await _wait_for(lambda: tracking.invalidations > invalidations)
+        try:
+            assert cache.get("user:1") is None
+            assert other.get("user:1") is None
+            assert cache.get("user:2") == b"second"
+        finally:
+            await tracking.close()
+        assert not tracking.active
+
+    asyncio.run(main())
+
+
+def test_lost_connection_clears_local_entries() -> None:
+    cache: TTLCache[str, Any] = TTLCache(maxsize=10, ttl=60)
+    client: Any = SimpleNamespace(
+        connection_pool=SimpleNamespace(connection_class=_StubConnection, connection_kwargs={})
+    )
+    tracking: ClientTracking = ClientTracking(
+        client=cast(Redis, client),
+        prefixes=["user:"],
+        cache=cache,
+    )
+
+    async def main() -> Optional[Any]:
+        _StubConnection.instances.clear()
+        await tracking.start()
+        await _wait_for(lambda: tracking.active)
+        cache.set("user:1", b"first")
+        # Сервер закрив з'єднання: повідомлення могли бути втрачені
+        _StubConnection.instances[-1]._reader.feed_eof()
+        await _wait_for(lambda: not tracking.active)
+        try:
+            return cache.get("user:1")
+        finally:
+            await tracking.close()
+
+    assert asyncio.run(main()) is None
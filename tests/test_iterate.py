@@ -0,0 +1,90 @@
+"""
+Тести потокового читання порціями з пагінацією за первинним ключем.
+
+Замість PostgreSQL використовується файлова база SQLite через aiosqlite:
+запити пагінації не залежать від діалекту.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+from sqlalchemy import QueuePool, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from app.services.database.sql.repositories.base import BaseRepository
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class _Item(_Base):
+    __tablename__ = "items"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+
+
+def _iterate(path: Path, columns: bool) -> tuple[list[int], list[int]]:
+    """
+    Читає 25 записів порціями по 10 і повертає їх ID та зайнятість пулу.
+
+    Args:
+        path: Директорія для файлу бази даних
+        columns: Читати лише колонки замість ORM-об'єктів
+
+    Returns:
+        ID прочитаних записів та кількість взятих з пулу з'єднань під час
+        обробки кожної порції
+    """
+
+    async def main() -> tuple[list[int], list[int]]:
+        engine: AsyncEngine = create_async_engine(f"sqlite+aiosqlite:///{path / 'items.db'}")
+        pool: QueuePool = cast(QueuePool, engine.sync_engine.pool)
+        async with engine.begin() as connection:
+            await connection.run_sync(_Base.metadata.create_all)
+            await connection.execute(
+                insert(_Item), [{"id": i, "name": f"item {i}"} for i in range(1, 26)]
+            )
+        session_pool = async_sessionmaker(engine, expire_on_commit=False)
+        ids: list[int] = []
+        checked_out: list[int] = []
+        try:
+            async with session_pool() as session:
+                repository: BaseRepository = BaseRepository(session=session)
+                chunks: Any = (
+                    repository._iterate_columns([_Item.name], chunk_size=10)
+                    if columns
+                    else repository._iterate(_Item, chunk_size=10)
+                )
+                async for chunk in chunks:
+                    checked_out.append(pool.checkedout())
+                    ids.extend(row.id for row in chunk)
+        finally:
+            await engine.dispose()
+        return ids, checked_out
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("columns", [False, True])
+def test_iterate_releases_connection_between_chunks(tmp_path: Path, columns: bool) -> None:
+    ids, checked_out = _iterate(tmp_path, columns=columns)
+
+    assert ids == list(range(1, 26))
+    assert checked_out == [0, 0, 0]
+
+
+def test_iterate_columns_requires_columns() -> None:
+    async def main() -> None:
+        repository: BaseRepository = BaseRepository(session=lambda: pytest.fail("no session"))
+        async for _ in repository._iterate_columns([]):
+            pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Тести попереднього завантаження користувачів пакета getUpdates для кількох ботів.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Iterable, cast
+
+from aiogram import Bot
+from aiogram.methods import GetUpdates, Response
+from aiogram.types import Message, Update, User
+
+from app.models.dto.user import UserDto
+from app.services.user import UserService
+from app.telegram.middlewares.prefetch import UserPrefetchMiddleware
+
+
+class _StubUserService:
+    """Сервіс-замінник, що «знаходить» усіх запитаних користувачів."""
+
+    async def prefetch(self, telegram_ids: Iterable[int]) -> dict[int, UserDto]:
+        return {
+            telegram_id: UserDto(id=telegram_id, telegram_id=telegram_id, name="", language="uk")
+            for telegram_id in telegram_ids
+        }
+
+
+def _updates(*telegram_ids: int) -> list[Update]:
+    return [
+        Update.model_validate(
+            {
+                "update_id": index,
+                "message": Message.model_validate(
+                    {
+                        "message_id": index,
+                        "date": 0,
+                        "chat": {"id": telegram_id, "type": "private"},
+                        "from": User(id=telegram_id, is_bot=False, first_name="user"),
+                    }
+                ),
+            }
+        )
+        for index, telegram_id in enumerate(telegram_ids)
+    ]
+
+
+def _respond(updates: list[Update]) -> Any:
+    """
+    Повертає замінник запиту getUpdates з готовою відповіддю.
+
+    Args:
+        updates: Оновлення, які «повертає» Telegram
+
+    Returns:
+        Функція виконання запиту для проміжного обробника
+    """
+
+    async def make_request(bot: Bot, method: Any) -> Response[Any]:
+        return Response[Any](ok=True, result=updates)
+
+    return make_request
+
+
+def test_batches_of_different_bots_do_not_overwrite_each_other() -> None:
+    prefetcher: UserPrefetchMiddleware = UserPrefetchMiddleware()
+    prefetcher.user_service = cast(UserService, _StubUserService())
+    first: Bot = Bot(token="1:first")
+    second: Bot = Bot(token="2:second")
+
+    async def main() -> None:
+        await prefetcher(_respond(_updates(10, 11)), first, GetUpdates())
+        await prefetcher(_respond(_updates(20, 10)), second, GetUpdates())
+
+    asyncio.run(main())
+
+    assert prefetcher.pop(bot_id=first.id, telegram_id=11) is not None
+    assert prefetcher.pop(bot_id=first.id, telegram_id=10) is not None
+    assert prefetcher.pop(bot_id=second.id, telegram_id=10) is not None
+    assert prefetcher.pop(bot_id=second.id, telegram_id=20) is not None
+    # Кожен користувач видається лише один раз
+    assert prefetcher.pop(bot_id=first.id, telegram_id=10) is None
+    assert prefetcher.used == 4
@@ -0,0 +1,84 @@
+"""
+Тести лічильників та метрик блокуючого пулу з'єднань Redis.
+
+Сервер Redis не потрібен: пул видає з'єднання-замінники, які лише
+вдають успішне підключення.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import pytest
+from redis.asyncio.connection import AbstractConnection
+from redis.exceptions import ConnectionError
+
+from app.services.database.redis.pool import MonitoredConnectionPool
+
+
+class _StubConnection:
+    """З'єднання-замінник з тими методами, які викликає пул."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.kwargs = kwargs
+
+    async def connect(self) -> None:
+        pass
+
+    async def disconnect(self, nowait: bool = False) -> None:
+        pass
+
+    async def can_read_destructive(self) -> bool:
+        return False
+
+
+def _pool(max_connections: int, metrics_interval: float = 0.0) -> MonitoredConnectionPool:
+    return MonitoredConnectionPool(
+        max_connections=max_connections,
+        timeout=0.05,
+        connection_class=_StubConnection,
+        metrics_interval=metrics_interval,
+    )
+
+
+def test_counts_waits_timeouts_and_releases() -> None:
+    async def main() -> dict[str, float]:
+        pool: MonitoredConnectionPool = _pool(max_connections=2)
+        first: AbstractConnection = await pool.get_connection("GET")
+        await pool.get_connection("GET")
+        with pytest.raises(ConnectionError):
+            await pool.get_connection("GET")
+        assert pool.saturation == 1
+
+        # Звільнене з'єднання отримує запит, що чекав у черзі
+        waiter: asyncio.Task[AbstractConnection] = asyncio.create_task(pool.get_connection("GET"))
+        await asyncio.sleep(0)
+        await pool.release(first)
+        await waiter
+        await pool.release(waiter.result())
+        return pool.metrics()
+
+    metrics: dict[str, float] = asyncio.run(main())
+
+    assert metrics["acquired"] == 3
+    assert metrics["waits"] == 2
+    assert metrics["timeouts"] == 1
+    assert metrics["in_use"] == 1
+    assert metrics["peak_in_use"] == 2
+    assert metrics["max_connections"] == 2
+    assert metrics["saturation"] == 0.5
+
+
+def test_logs_metrics_periodically(caplog: pytest.LogCaptureFixture) -> None:
+    async def main() -> None:
+        pool: MonitoredConnectionPool = _pool(max_connections=2, metrics_interval=1e-9)
+        await pool.release(await pool.get_connection("GET"))
+
+    with caplog.at_level(logging.INFO, logger="bot.database"):
+        asyncio.run(main())
+
+    assert any(
+        record.getMessage().startswith("Redis pool: acquired=1") for record in caplog.records
+    )
@@ -0,0 +1,149 @@
+"""
+Тести створення двигуна та пулу сесій у режимі сумісності з PgBouncer.
+
+Сервер бази даних не потрібен: параметри з'єднання перехоплюються подією
+do_connect до звернення драйвера до мережі.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+from pydantic import SecretStr
+from sqlalchemy import URL, NullPool, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.factory.session_pool import _statement_name, create_engine, create_session_pool
+from app.models.config import AppConfig
+from app.models.config.env import PostgresConfig, SQLAlchemyConfig
+from app.services.database.sql.pool import InstrumentedQueuePool
+from app.services.database.sql.repositories.raw_users import UNNAMED_STATEMENTS_INFO
+
+_URL: URL = URL.create(
+    drivername="postgresql+asyncpg",
+    username="bot",
+    password="secret",
+    host="127.0.0.1",
+    port=6432,
+    database="bot",
+)
+
+
+class _InterceptedError(Exception):
+    """Зупиняє підключення після перехоплення його параметрів."""
+
+
+def _config(**sql_alchemy: Any) -> AppConfig:
+    """
+    Створює конфігурацію лише з налаштуваннями PostgreSQL та SQLAlchemy.
+
+    Args:
+        **sql_alchemy: Параметри SQLAlchemyConfig
+
+    Returns:
+        Конфігурація додатку
+    """
+    # Решта розділів (telegram, redis, server, common) двигуну не потрібна
+    sections: dict[str, Any] = {
+        "postgres": PostgresConfig.model_construct(
+            host="127.0.0.1",
+            db="bot",
+            password=SecretStr("secret"),
+            port=6432,
+            user="bot",
+            data="",
+            replicas=None,
+        ),
+        "sql_alchemy": SQLAlchemyConfig(**sql_alchemy),
+    }
+    return AppConfig.model_construct(**sections)
+
+
+def _connect_params(engine: AsyncEngine) -> dict[str, Any]:
+    """
+    Повертає параметри, з якими двигун викликав би asyncpg.connect.
+
+    Args:
+        engine: Асинхронний двигун SQLAlchemy
+
+    Returns:
+        Іменовані параметри підключення драйвера
+    """
+    captured: dict[str, Any] = {}
+
+    def intercept(dialect: Any, record: Any, cargs: Any, cparams: dict[str, Any]) -> None:
+        captured.update(cparams)
+        raise _InterceptedError
+
+    event.listen(engine.sync_engine, "do_connect", intercept)
+
+    async def connect() -> None:
+        try:
+            async with engine.connect():
+                pass
+        finally:
+            await engine.dispose()
+
+    with pytest.raises(_InterceptedError):
+        asyncio.run(connect())
+    return captured
+
+
+def test_pgbouncer_disables_statement_caches() -> None:
+    engine: AsyncEngine = create_engine(
+        url=_URL,
+        config=_config(pgbouncer=True, application_name="bot-test"),
+    )
+    params: dict[str, Any] = _connect_params(engine)
+
+    assert params["statement_cache_size"] == 0
+    assert params["prepared_statement_cache_size"] == 0
+    assert params["prepared_statement_name_func"] is _statement_name
+    assert params["server_settings"] == {"application_name": "bot-test"}
+
+
+def test_pgbouncer_without_pool_size_uses_null_pool() -> None:
+    engine: AsyncEngine = create_engine(url=_URL, config=_config(pgbouncer=True))
+
+    assert isinstance(engine.sync_engine.pool, NullPool)
+
+
+def test_pgbouncer_pool_size_has_no_overflow_and_no_tuner() -> None:
+    engine: AsyncEngine = create_engine(
+        url=_URL,
+        config=_config(pgbouncer=True, pgbouncer_pool_size=3, max_overflow=25, pool_autotune=True),
+    )
+    pool = engine.sync_engine.pool
+
+    assert isinstance(pool, InstrumentedQueuePool)
+    assert pool.size() == 3
+    assert pool.max_overflow == 0
+    assert pool.tuner is None
+
+
+def test_default_mode_keeps_statement_caches() -> None:
+    engine: AsyncEngine = create_engine(url=_URL, config=_config(pool_size=5, max_overflow=7))
+    pool = engine.sync_engine.pool
+    params: dict[str, Any] = _connect_params(engine)
+
+    assert isinstance(pool, InstrumentedQueuePool)
+    assert pool.size() == 5
+    assert pool.max_overflow == 7
+    assert "statement_cache_size" not in params
+    assert "prepared_statement_name_func" not in params
+
+
+def test_statement_names_are_unique() -> None:
+    names: set[str] = {_statement_name() for _ in range(1000)}
+
+    assert len(names) == 1000
+    assert all(name.startswith("__asyncpg_") for name in names)
+
+
+@pytest.mark.parametrize("pgbouncer", [True, False])
+def test_session_pool_marks_unnamed_statements(pgbouncer: bool) -> None:
+    session_pool = create_session_pool(config=_config(pgbouncer=pgbouncer))
+
+    assert session_pool.kw["info"].get(UNNAMED_STATEMENTS_INFO, False) is pgbouncer
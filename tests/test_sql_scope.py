@@ -0,0 +1,115 @@
+"""
+Тести звільнення з'єднання спільною сесією оновлення (SQLSessionScope).
+
+Замість PostgreSQL використовується файлова база SQLite через aiosqlite:
+перевіряється лише те, коли сесія повертає з'єднання до пулу.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, cast
+
+from sqlalchemy import QueuePool, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.services.database import SQLSessionScope
+
+
+def _engine(path: Path) -> AsyncEngine:
+    """
+    Створює двигун з пулом з'єднань до файлової бази SQLite.
+
+    Args:
+        path: Директорія для файлу бази даних
+
+    Returns:
+        Асинхронний двигун SQLAlchemy
+    """
+    return create_async_engine(f"sqlite+aiosqlite:///{path / 'scope.db'}")
+
+
+Scenario = Callable[[SQLSessionScope, QueuePool], Awaitable[list[int]]]
+
+
+def _run(path: Path, transaction: bool, scenario: Scenario) -> list[int]:
+    """
+    Виконує сценарій зі спільною сесією та повертає кількість взятих з'єднань.
+
+    Args:
+        path: Директорія для файлу бази даних
+        transaction: Транзакційний режим спільної сесії
+        scenario: Асинхронна функція (scope, pool) -> list[int]
+
+    Returns:
+        Кількість взятих з пулу з'єднань у точках перевірки сценарію
+    """
+
+    async def main() -> list[int]:
+        engine: AsyncEngine = _engine(path)
+        session_pool = async_sessionmaker(engine, expire_on_commit=False)
+        scope = SQLSessionScope(session_pool=session_pool, transaction=transaction)
+        pool: QueuePool = cast(QueuePool, engine.sync_engine.pool)
+        try:
+            checkpoints: list[int] = await scenario(scope, pool)
+            await scope.close()
+            checkpoints.append(pool.checkedout())
+            return checkpoints
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+async def _read(session: AsyncSession) -> None:
+    await session.execute(text("SELECT 1"))
+
+
+def test_read_releases_connection_after_block(tmp_path: Path) -> None:
+    async def scenario(scope: SQLSessionScope, pool: QueuePool) -> list[int]:
+        async with scope.context(read_only=True) as (repo, _):
+            await _read(repo.session)
+            inside: int = pool.checkedout()
+        return [inside, pool.checkedout()]
+
+    assert _run(tmp_path, transaction=False, scenario=scenario) == [1, 0, 0]
+
+
+def test_nested_block_keeps_connection_until_outer_exit(tmp_path: Path) -> None:
+    async def scenario(scope: SQLSessionScope, pool: QueuePool) -> list[int]:
+        async with scope.context() as (outer, _):
+            async with scope.context(read_only=True) as (inner, _):
+                await _read(inner.session)
+            after_inner: int = pool.checkedout()
+            await _read(outer.session)
+        return [after_inner, pool.checkedout()]
+
+    assert _run(tmp_path, transaction=False, scenario=scenario) == [1, 0, 0]
+
+
+def test_session_is_reused_after_release(tmp_path: Path) -> None:
+    async def scenario(scope: SQLSessionScope, pool: QueuePool) -> list[int]:
+        async with scope.context(read_only=True) as (repo, _):
+            await _read(repo.session)
+            first: AsyncSession = repo.session
+        async with scope.context(read_only=True) as (repo, _):
+            await _read(repo.session)
+            assert repo.session is first
+        return [pool.checkedout()]
+
+    assert _run(tmp_path, transaction=False, scenario=scenario) == [0, 0]
+
+
+def test_transaction_mode_holds_connection_until_close(tmp_path: Path) -> None:
+    async def scenario(scope: SQLSessionScope, pool: QueuePool) -> list[int]:
+        async with scope.context(read_only=True) as (repo, _):
+            await _read(repo.session)
+        return [pool.checkedout()]
+
+    assert _run(tmp_path, transaction=True, scenario=scenario) == [1, 0]
@@ -0,0 +1,66 @@
+"""
+Тести підготовки з'єднання драйвера для транзакційного режиму сесії.
+
+Замість PostgreSQL використовується файлова база SQLite через aiosqlite:
+перевіряється, що транзакцію розпочинає звичайний запит SQLAlchemy,
+без звернення до внутрішніх частин адаптера драйвера.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.services.database.sql.transaction import DEFERRED_COMMIT_INFO, raw_connection
+
+
+def _begin_queries(path: Path, deferred: bool) -> list[int]:
+    """
+    Викликає raw_connection двічі в одній транзакції та раз у наступній.
+
+    Args:
+        path: Директорія для файлу бази даних
+        deferred: Сесія працює в транзакційному режимі
+
+    Returns:
+        Кількість запитів, якими розпочиналася транзакція, після кожного виклику
+    """
+    statements: list[str] = []
+
+    async def main() -> list[int]:
+        engine: AsyncEngine = create_async_engine(f"sqlite+aiosqlite:///{path / 'raw.db'}")
+
+        def record(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        counts: list[int] = []
+        try:
+            async with AsyncSession(engine) as session:
+                if deferred:
+                    session.info[DEFERRED_COMMIT_INFO] = True
+                for _ in range(2):
+                    await raw_connection(session)
+                    counts.append(statements.count("SELECT 1"))
+                await session.commit()
+                await raw_connection(session)
+                counts.append(statements.count("SELECT 1"))
+        finally:
+            await engine.dispose()
+        return counts
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize(("deferred", "expected"), [(True, [1, 1, 2]), (False, [0, 0, 0])])
+def test_deferred_session_begins_once_per_transaction(
+    tmp_path: Path,
+    deferred: bool,
+    expected: list[int],
+) -> None:
+    assert _begin_queries(tmp_path, deferred=deferred) == expected
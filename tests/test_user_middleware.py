@@ -0,0 +1,73 @@
+"""
+Тести визначення подій, фільтрам яких користувач потрібен ще до їх перевірки.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from aiogram import Dispatcher, F, Router
+from aiogram.types import CallbackQuery, Message
+
+from app.enums import MiddlewareEventType
+from app.models.dto.user import UserDto
+from app.telegram.filters import ADMIN_FILTER, MagicData
+from app.telegram.middlewares.user import _requires_user_before_filters
+
+
+def _dispatcher(router: Router) -> Dispatcher:
+    dispatcher: Dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    return dispatcher
+
+
+async def _handler(event: Any) -> None:
+    pass
+
+
+def test_filter_with_user_argument_requires_user() -> None:
+    async def not_blocked(message: Message, user: UserDto) -> bool:
+        return user.blocked_at is None
+
+    router: Router = Router()
+    router.message.register(_handler, not_blocked)
+
+    assert _requires_user_before_filters(_dispatcher(router), MiddlewareEventType.MESSAGE)
+
+
+def test_filter_with_kwargs_requires_user() -> None:
+    async def not_blocked(message: Message, **kwargs: Any) -> bool:
+        return kwargs["user"].blocked_at is None
+
+    router: Router = Router()
+    router.message.register(_handler, not_blocked)
+
+    assert _requires_user_before_filters(_dispatcher(router), MiddlewareEventType.MESSAGE)
+
+
+def test_magic_data_filter_requires_user_flag() -> None:
+    router: Router = Router()
+    router.message.filter(ADMIN_FILTER)
+    router.message.register(_handler, MagicData(F.user.blocked_at.is_(None)))
+    router.callback_query.register(
+        _handler,
+        MagicData(F.user.blocked_at.is_(None)),
+        flags={"user": True},
+    )
+    dispatcher: Dispatcher = _dispatcher(router)
+
+    assert not _requires_user_before_filters(dispatcher, MiddlewareEventType.MESSAGE)
+    assert _requires_user_before_filters(dispatcher, MiddlewareEventType.CALLBACK_QUERY)
+
+
+def test_filters_without_user_do_not_require_it() -> None:
+    async def is_ping(query: CallbackQuery) -> bool:
+        return query.data == "ping"
+
+    router: Router = Router()
+    router.callback_query.register(_handler, is_ping)
+
+    assert not _requires_user_before_filters(
+        _dispatcher(router),
+        MiddlewareEventType.CALLBACK_QUERY,
+    )
@@ -0,0 +1,35 @@
+"""
+Тести буфера відкладеного запису змін користувачів.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, cast
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.user_writer import UserWriter
+
+
+def test_closed_writer_rejects_changes() -> None:
+    session_pool: Any = lambda: pytest.fail("no session")  # noqa: E731
+    writer: UserWriter = UserWriter(
+        session_pool=cast(async_sessionmaker[AsyncSession], session_pool),
+        batch_size=10,
+        flush_interval=60,
+    )
+
+    async def main() -> None:
+        await writer.close()
+        assert writer.closed
+        with pytest.raises(RuntimeError):
+            writer.add(user_id=1, changes={"name": "user"}, telegram_id=10)
+
+    asyncio.run(main())
+
+    # Зміни не залишились у буфері, і таймер запису не запущено
+    assert len(writer) == 0
+    assert writer.pending(1) is None
+    assert writer._timer is None